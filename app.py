@@ -1,28 +1,180 @@
-import os
 import random
-import joblib
+import zlib
+from collections import namedtuple
+from types import MappingProxyType
+import numpy as np
 from flask import Flask, render_template, jsonify, request, send_from_directory
 from flask_cors import CORS
+from app.logging_config import begin_request_logging, configure_logging, get_logger
+from app.services.model_registry import registry
 
 app = Flask(__name__, template_folder='app/templates', static_folder='static')
 CORS(app)
 
-# Load the trained meal recommendation model
-try:
-    model_path = os.path.join('app', 'models', 'meal_recommender.pkl')
-    meal_model = joblib.load(model_path)
-    print(f"✅ Loaded meal recommendation model from: {model_path}")
-    print(f"🔍 Model type: {type(meal_model)}")
-    print(f"🔍 Model attributes: {dir(meal_model)}")
-    if hasattr(meal_model, 'predict'):
-        print(f"🔍 Model has predict method")
-    if hasattr(meal_model, 'transform'):
-        print(f"🔍 Model has transform method")
-    if hasattr(meal_model, '__call__'):
-        print(f"🔍 Model is callable")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    meal_model = None
+# ✅ Leveled, sampled logging (LOG_LEVEL / LOG_DEBUG_SAMPLE_RATE), written off the request thread
+configure_logging()
+app.before_request(begin_request_logging)
+log = get_logger("legacy")
+
+# The trained meal recommendation model is loaded lazily, once, by the shared registry
+# (which logs a failed load once and remembers it, so requests fall back quietly)
+def get_meal_model():
+    try:
+        return registry.get('meal_recommender')
+    except Exception:
+        return None
+
+# ✅ Deterministic model input encoding. hash() of a str is salted per process, so every
+# worker used to encode the same region / meal time differently; crc32 is stable everywhere.
+KNOWN_REGIONS = ('North India', 'South India', 'East India', 'West India')
+KNOWN_MEAL_TIMES = ('breakfast', 'lunch', 'dinner', 'snacks')
+
+def stable_code(value, modulo):
+    """Process-independent replacement for hash(value) % modulo"""
+    return zlib.crc32(str(value).encode('utf-8')) % modulo
+
+REGION_CODES = {region: stable_code(region, 1000) for region in KNOWN_REGIONS}
+MEAL_TIME_CODES = {meal_time: stable_code(meal_time, 100) for meal_time in KNOWN_MEAL_TIMES}
+
+# Column order: target calories, region, meal time, time encoding, random factor
+MODEL_INPUT_TEMPLATE = np.zeros((1, 5), dtype=np.float64)
+
+def encode_model_input(target_calories, region, meal_time, timestamp, random_val):
+    """One model input row; identical requests give identical rows in every process"""
+    row = MODEL_INPUT_TEMPLATE.copy()
+    row[0, 0] = target_calories
+    row[0, 1] = REGION_CODES[region] if region in REGION_CODES else stable_code(region, 1000)
+    row[0, 2] = MEAL_TIME_CODES[meal_time] if meal_time in MEAL_TIME_CODES else stable_code(meal_time, 100)
+    row[0, 3] = timestamp % 10000
+    row[0, 4] = random_val * 100
+    return row
+
+# ✅ Region / meal-time meal tables, built once at import and never mutated.
+# Each entry: (name, calories as a fraction of the meal-time target, portion)
+_STATIC_MEALS = {
+    'North India': {
+        'breakfast': (
+            ('Poha with Nuts', 0.85, '1 plate'),
+            ('Aloo Paratha', 0.9, '2 pieces'),
+            ('Upma with Vegetables', 0.8, '1 bowl'),
+            ('Besan Chilla', 0.75, '3 pieces'),
+        ),
+        'lunch': (
+            ('Rajma Chawal', 0.9, '1 plate'),
+            ('Kadhi Pakora', 0.85, '1 bowl'),
+            ('Chole Bhature', 0.95, '2 pieces'),
+            ('Dal Makhani', 0.8, '1 bowl'),
+        ),
+        'dinner': (
+            ('Roti Sabzi', 0.9, '2 rotis'),
+            ('Paneer Curry', 0.85, '1 bowl'),
+            ('Mixed Vegetable', 0.8, '1 plate'),
+            ('Dal Tadka', 0.75, '1 bowl'),
+        ),
+        'snacks': (
+            ('Samosa', 0.8, '1 piece'),
+            ('Pakora', 0.7, '4 pieces'),
+            ('Jalebi', 0.6, '2 pieces'),
+            ('Kachori', 0.75, '1 piece'),
+        ),
+    },
+    'South India': {
+        'breakfast': (
+            ('Idli Sambar', 0.8, '3 idlis'),
+            ('Dosa with Chutney', 0.85, '2 dosas'),
+            ('Upma', 0.75, '1 bowl'),
+            ('Pongal', 0.9, '1 bowl'),
+        ),
+        'lunch': (
+            ('Rice with Sambar', 0.9, '1 plate'),
+            ('Rasam Rice', 0.85, '1 bowl'),
+            ('Curd Rice', 0.8, '1 bowl'),
+            ('Bisi Bele Bath', 0.95, '1 plate'),
+        ),
+        'dinner': (
+            ('Chapati with Curry', 0.9, '2 chapatis'),
+            ('Poriyal with Rice', 0.85, '1 plate'),
+            ('Kootu', 0.8, '1 bowl'),
+            ('Thayir Sadam', 0.75, '1 bowl'),
+        ),
+        'snacks': (
+            ('Vada', 0.8, '2 pieces'),
+            ('Bonda', 0.7, '3 pieces'),
+            ('Murukku', 0.6, '1 serving'),
+            ('Pori Urundai', 0.75, '2 pieces'),
+        ),
+    },
+    'East India': {
+        'breakfast': (
+            ('Luchi Aloor Dom', 0.85, '3 luchis'),
+            ('Puri Sabzi', 0.9, '2 puris'),
+            ('Chira Doi', 0.8, '1 bowl'),
+            ('Pitha', 0.75, '2 pieces'),
+        ),
+        'lunch': (
+            ('Rice with Fish Curry', 0.9, '1 plate'),
+            ('Dal Bhaat', 0.85, '1 bowl'),
+            ('Macher Jhol', 0.95, '1 plate'),
+            ('Aloo Posto', 0.8, '1 bowl'),
+        ),
+        'dinner': (
+            ('Roti with Sabzi', 0.9, '2 rotis'),
+            ('Chicken Curry', 0.85, '1 bowl'),
+            ('Mixed Vegetable', 0.8, '1 plate'),
+            ('Dal with Rice', 0.75, '1 bowl'),
+        ),
+        'snacks': (
+            ('Jhal Muri', 0.8, '1 cup'),
+            ('Tele Bhaja', 0.7, '4 pieces'),
+            ('Chop', 0.6, '2 pieces'),
+            ('Singara', 0.75, '1 piece'),
+        ),
+    },
+    'West India': {
+        'breakfast': (
+            ('Poha with Peanuts', 0.8, '1 plate'),
+            ('Thepla', 0.85, '2 pieces'),
+            ('Dhokla', 0.75, '4 pieces'),
+            ('Khandvi', 0.7, '6 pieces'),
+        ),
+        'lunch': (
+            ('Gujarati Thali', 0.9, '1 plate'),
+            ('Dal Bhaat', 0.85, '1 bowl'),
+            ('Kadhi Khichdi', 0.95, '1 plate'),
+            ('Undhiyu', 0.8, '1 bowl'),
+        ),
+        'dinner': (
+            ('Roti with Sabzi', 0.9, '2 rotis'),
+            ('Paneer Curry', 0.85, '1 bowl'),
+            ('Mixed Vegetable', 0.8, '1 plate'),
+            ('Dal with Rice', 0.75, '1 bowl'),
+        ),
+        'snacks': (
+            ('Fafda', 0.8, '4 pieces'),
+            ('Gathiya', 0.7, '1 serving'),
+            ('Khaman', 0.6, '3 pieces'),
+            ('Sev Khamani', 0.75, '1 bowl'),
+        ),
+    },
+}
+
+MealTable = namedtuple('MealTable', ['names', 'ratios', 'portions'])
+
+def _freeze_table(entries):
+    names, ratios, portions = zip(*entries)
+    ratios = np.array(ratios, dtype=np.float64)
+    ratios.flags.writeable = False
+    return MealTable(names, ratios, portions)
+
+MEAL_TABLES = MappingProxyType({
+    region: MappingProxyType({meal_time: _freeze_table(entries) for meal_time, entries in meal_times.items()})
+    for region, meal_times in _STATIC_MEALS.items()
+})
+
+def meal_table(region, meal_time):
+    """Table for a region / meal time, falling back to North India and breakfast"""
+    region_tables = MEAL_TABLES.get(region, MEAL_TABLES['North India'])
+    return region_tables.get(meal_time, region_tables['breakfast'])
 
 # Create blueprint
 from flask import Blueprint
@@ -74,7 +226,7 @@ def get_meals():
         timestamp = data.get('timestamp', 0)
         random_val = data.get('random', 0.5)
         
-        print(f"🔍 API Request: mealTime={meal_time}, region={region}, calories={calories}, timestamp={timestamp}")
+        log.debug("🔍 API Request: mealTime=%s, region=%s, calories=%s, timestamp=%s", meal_time, region, calories, timestamp)
         
         # ✅ FIXED: Calculate target calories per meal time
         meal_time_targets = {
@@ -85,52 +237,28 @@ def get_meals():
         }
         
         target_calories = meal_time_targets.get(meal_time, int(calories * 0.25))
-        print(f"🎯 Target calories for {meal_time}: {target_calories} (from daily goal: {calories})")
+        log.debug("🎯 Target calories for %s: %s (from daily goal: %s)", meal_time, target_calories, calories)
         
         # ✅ FIXED: Use ML model to generate meal recommendations
+        meal_model = get_meal_model()
         if meal_model is not None:
-            print(f"🤖 Using ML model to generate meals for {meal_time} in {region}")
+            log.debug("🤖 Using ML model to generate meals for %s in %s", meal_time, region)
             
             # Prepare input features for the model
-            model_input = {
-                'meal_time': meal_time,
-                'region': region,
-                'target_calories': target_calories,
-                'daily_calories': calories,
-                'timestamp': timestamp,
-                'random_seed': random_val
-            }
+            model_input = encode_model_input(target_calories, region, meal_time, timestamp, random_val)
             
             # Generate meal recommendations using the model
             try:
                 # Check if model is a pipeline or has predict method
                 if hasattr(meal_model, 'predict'):
                     # Standard scikit-learn model
-                    meals = meal_model.predict([[
-                        target_calories,
-                        hash(region) % 1000,  # Region encoding
-                        hash(meal_time) % 100,  # Meal time encoding
-                        timestamp % 10000,     # Time encoding
-                        random_val * 100       # Random factor
-                    ]])
+                    meals = meal_model.predict(model_input)
                 elif hasattr(meal_model, 'transform'):
                     # Pipeline or transformer
-                    meals = meal_model.transform([[
-                        target_calories,
-                        hash(region) % 1000,
-                        hash(meal_time) % 100,
-                        timestamp % 10000,
-                        random_val * 100
-                    ]])
+                    meals = meal_model.transform(model_input)
                 else:
                     # Custom model - try to call it directly
-                    meals = meal_model([[
-                        target_calories,
-                        hash(region) % 1000,
-                        hash(meal_time) % 100,
-                        timestamp % 10000,
-                        random_val * 100
-                    ]])
+                    meals = meal_model(model_input)
                 
                 # Convert model output to meal format
                 recommended_meals = []
@@ -143,6 +271,9 @@ def get_meals():
                 else:
                     meal_list = [meals]
                 
+                # Region-specific meal names (shared, precomputed table)
+                meal_time_names = meal_table(region, meal_time).names
+                
                 # Generate meal names based on model output
                 for i, meal_output in enumerate(meal_list[:8]):  # Get up to 8 meals
                     # Use model output to determine meal characteristics
@@ -159,36 +290,6 @@ def get_meals():
                     meal_calories = max(100, min(meal_calories, int(target_calories * 1.2)))
                     
                     # Generate meal name based on region and meal time
-                    meal_names = {
-                        'North India': {
-                            'breakfast': ['Poha with Nuts', 'Aloo Paratha', 'Upma with Vegetables', 'Besan Chilla'],
-                            'lunch': ['Rajma Chawal', 'Kadhi Pakora', 'Chole Bhature', 'Dal Makhani'],
-                            'dinner': ['Roti Sabzi', 'Paneer Curry', 'Mixed Vegetable', 'Dal Tadka'],
-                            'snacks': ['Samosa', 'Pakora', 'Jalebi', 'Kachori']
-                        },
-                        'South India': {
-                            'breakfast': ['Idli Sambar', 'Dosa with Chutney', 'Upma', 'Pongal'],
-                            'lunch': ['Rice with Sambar', 'Rasam Rice', 'Curd Rice', 'Bisi Bele Bath'],
-                            'dinner': ['Chapati with Curry', 'Poriyal with Rice', 'Kootu', 'Thayir Sadam'],
-                            'snacks': ['Vada', 'Bonda', 'Murukku', 'Pori Urundai']
-                        },
-                        'East India': {
-                            'breakfast': ['Luchi Aloor Dom', 'Puri Sabzi', 'Chira Doi', 'Pitha'],
-                            'lunch': ['Rice with Fish Curry', 'Dal Bhaat', 'Macher Jhol', 'Aloo Posto'],
-                            'dinner': ['Roti with Sabzi', 'Chicken Curry', 'Mixed Vegetable', 'Dal with Rice'],
-                            'snacks': ['Jhal Muri', 'Tele Bhaja', 'Chop', 'Singara']
-                        },
-                        'West India': {
-                            'breakfast': ['Poha with Peanuts', 'Thepla', 'Dhokla', 'Khandvi'],
-                            'lunch': ['Gujarati Thali', 'Dal Bhaat', 'Kadhi Khichdi', 'Undhiyu'],
-                            'dinner': ['Roti with Sabzi', 'Paneer Curry', 'Mixed Vegetable', 'Dal with Rice'],
-                            'snacks': ['Fafda', 'Gathiya', 'Khaman', 'Sev Khamani']
-                        }
-                    }
-                    
-                    # Get region-specific meal names
-                    region_names = meal_names.get(region, meal_names['North India'])
-                    meal_time_names = region_names.get(meal_time, region_names['breakfast'])
                     meal_name = meal_time_names[meal_name_index % len(meal_time_names)]
                     
                     # Generate portion based on calories
@@ -207,147 +308,44 @@ def get_meals():
                         'portion': portion
                     })
                 
-                print(f"🤖 ML Model generated {len(recommended_meals)} meals")
+                log.debug("🤖 ML Model generated %d meals", len(recommended_meals))
                 
             except Exception as model_error:
-                print(f"❌ ML model prediction failed: {model_error}")
+                log.warning("❌ ML model prediction failed: %s", model_error)
                 # Fallback to static data if model fails
                 recommended_meals = generate_static_meals(meal_time, region, target_calories)
         else:
-            print("⚠️ ML model not available, using static meal generation")
+            log.info("⚠️ ML model not available, using static meal generation")
             recommended_meals = generate_static_meals(meal_time, region, target_calories)
         
-        # Shuffle meals for variety
-        random.seed(timestamp + int(random_val * 1000))
-        random.shuffle(recommended_meals)
+        # Shuffle meals for variety (per-request RNG; an explicit seed wins over timestamp/random)
+        seed = data.get('seed', timestamp + int(random_val * 1000))
+        random.Random(seed if isinstance(seed, (int, float, str)) else str(seed)).shuffle(recommended_meals)
         
         # Return 2 meals for display
         shuffled_meals = recommended_meals[:2]
         
-        print(f"✅ Returning {len(shuffled_meals)} ML-generated meals for {meal_time} in {region}")
-        print(f"🎯 Target calories: {target_calories}, Meal calories: {[m['calories'] for m in shuffled_meals]}")
+        log.debug("✅ Returning %d meals for %s in %s (target %s cal, meal calories %s)",
+                  len(shuffled_meals), meal_time, region, target_calories, [m['calories'] for m in shuffled_meals])
         
         response_data = {'success': True, 'meals': {meal_time: shuffled_meals}}
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"❌ Error in get_meals: {e}")
+        log.exception("❌ Error in get_meals: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 def generate_static_meals(meal_time, region, target_calories):
     """Fallback function to generate static meals if ML model fails"""
     
-    # Region-specific meal names
-    region_meals = {
-        'North India': {
-            'breakfast': [
-                {'name': 'Poha with Nuts', 'calories': int(target_calories * 0.85), 'portion': '1 plate'},
-                {'name': 'Aloo Paratha', 'calories': int(target_calories * 0.9), 'portion': '2 pieces'},
-                {'name': 'Upma with Vegetables', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'},
-                {'name': 'Besan Chilla', 'calories': int(target_calories * 0.75), 'portion': '3 pieces'}
-            ],
-            'lunch': [
-                {'name': 'Rajma Chawal', 'calories': int(target_calories * 0.9), 'portion': '1 plate'},
-                {'name': 'Kadhi Pakora', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Chole Bhature', 'calories': int(target_calories * 0.95), 'portion': '2 pieces'},
-                {'name': 'Dal Makhani', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'}
-            ],
-            'dinner': [
-                {'name': 'Roti Sabzi', 'calories': int(target_calories * 0.9), 'portion': '2 rotis'},
-                {'name': 'Paneer Curry', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Mixed Vegetable', 'calories': int(target_calories * 0.8), 'portion': '1 plate'},
-                {'name': 'Dal Tadka', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'}
-            ],
-            'snacks': [
-                {'name': 'Samosa', 'calories': int(target_calories * 0.8), 'portion': '1 piece'},
-                {'name': 'Pakora', 'calories': int(target_calories * 0.7), 'portion': '4 pieces'},
-                {'name': 'Jalebi', 'calories': int(target_calories * 0.6), 'portion': '2 pieces'},
-                {'name': 'Kachori', 'calories': int(target_calories * 0.75), 'portion': '1 piece'}
-            ]
-        },
-        'South India': {
-            'breakfast': [
-                {'name': 'Idli Sambar', 'calories': int(target_calories * 0.8), 'portion': '3 idlis'},
-                {'name': 'Dosa with Chutney', 'calories': int(target_calories * 0.85), 'portion': '2 dosas'},
-                {'name': 'Upma', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'},
-                {'name': 'Pongal', 'calories': int(target_calories * 0.9), 'portion': '1 bowl'}
-            ],
-            'lunch': [
-                {'name': 'Rice with Sambar', 'calories': int(target_calories * 0.9), 'portion': '1 plate'},
-                {'name': 'Rasam Rice', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Curd Rice', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'},
-                {'name': 'Bisi Bele Bath', 'calories': int(target_calories * 0.95), 'portion': '1 plate'}
-            ],
-            'dinner': [
-                {'name': 'Chapati with Curry', 'calories': int(target_calories * 0.9), 'portion': '2 chapatis'},
-                {'name': 'Poriyal with Rice', 'calories': int(target_calories * 0.85), 'portion': '1 plate'},
-                {'name': 'Kootu', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'},
-                {'name': 'Thayir Sadam', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'}
-            ],
-            'snacks': [
-                {'name': 'Vada', 'calories': int(target_calories * 0.8), 'portion': '2 pieces'},
-                {'name': 'Bonda', 'calories': int(target_calories * 0.7), 'portion': '3 pieces'},
-                {'name': 'Murukku', 'calories': int(target_calories * 0.6), 'portion': '1 serving'},
-                {'name': 'Pori Urundai', 'calories': int(target_calories * 0.75), 'portion': '2 pieces'}
-            ]
-        },
-        'East India': {
-            'breakfast': [
-                {'name': 'Luchi Aloor Dom', 'calories': int(target_calories * 0.85), 'portion': '3 luchis'},
-                {'name': 'Puri Sabzi', 'calories': int(target_calories * 0.9), 'portion': '2 puris'},
-                {'name': 'Chira Doi', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'},
-                {'name': 'Pitha', 'calories': int(target_calories * 0.75), 'portion': '2 pieces'}
-            ],
-            'lunch': [
-                {'name': 'Rice with Fish Curry', 'calories': int(target_calories * 0.9), 'portion': '1 plate'},
-                {'name': 'Dal Bhaat', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Macher Jhol', 'calories': int(target_calories * 0.95), 'portion': '1 plate'},
-                {'name': 'Aloo Posto', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'}
-            ],
-            'dinner': [
-                {'name': 'Roti with Sabzi', 'calories': int(target_calories * 0.9), 'portion': '2 rotis'},
-                {'name': 'Chicken Curry', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Mixed Vegetable', 'calories': int(target_calories * 0.8), 'portion': '1 plate'},
-                {'name': 'Dal with Rice', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'}
-            ],
-            'snacks': [
-                {'name': 'Jhal Muri', 'calories': int(target_calories * 0.8), 'portion': '1 cup'},
-                {'name': 'Tele Bhaja', 'calories': int(target_calories * 0.7), 'portion': '4 pieces'},
-                {'name': 'Chop', 'calories': int(target_calories * 0.6), 'portion': '2 pieces'},
-                {'name': 'Singara', 'calories': int(target_calories * 0.75), 'portion': '1 piece'}
-            ]
-        },
-        'West India': {
-            'breakfast': [
-                {'name': 'Poha with Peanuts', 'calories': int(target_calories * 0.8), 'portion': '1 plate'},
-                {'name': 'Thepla', 'calories': int(target_calories * 0.85), 'portion': '2 pieces'},
-                {'name': 'Dhokla', 'calories': int(target_calories * 0.75), 'portion': '4 pieces'},
-                {'name': 'Khandvi', 'calories': int(target_calories * 0.7), 'portion': '6 pieces'}
-            ],
-            'lunch': [
-                {'name': 'Gujarati Thali', 'calories': int(target_calories * 0.9), 'portion': '1 plate'},
-                {'name': 'Dal Bhaat', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Kadhi Khichdi', 'calories': int(target_calories * 0.95), 'portion': '1 plate'},
-                {'name': 'Undhiyu', 'calories': int(target_calories * 0.8), 'portion': '1 bowl'}
-            ],
-            'dinner': [
-                {'name': 'Roti with Sabzi', 'calories': int(target_calories * 0.9), 'portion': '2 rotis'},
-                {'name': 'Paneer Curry', 'calories': int(target_calories * 0.85), 'portion': '1 bowl'},
-                {'name': 'Mixed Vegetable', 'calories': int(target_calories * 0.8), 'portion': '1 plate'},
-                {'name': 'Dal with Rice', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'}
-            ],
-            'snacks': [
-                {'name': 'Fafda', 'calories': int(target_calories * 0.8), 'portion': '4 pieces'},
-                {'name': 'Gathiya', 'calories': int(target_calories * 0.7), 'portion': '1 serving'},
-                {'name': 'Khaman', 'calories': int(target_calories * 0.6), 'portion': '3 pieces'},
-                {'name': 'Sev Khamani', 'calories': int(target_calories * 0.75), 'portion': '1 bowl'}
-            ]
-        }
-    }
-    
-    # Get region-specific meals or fallback to North India
-    region_data = region_meals.get(region, region_meals['North India'])
-    return region_data.get(meal_time, region_data['breakfast'])
+    # Region-specific meals (or North India / breakfast), scaled in one vectorised step;
+    # astype truncates like the old int(target_calories * k)
+    table = meal_table(region, meal_time)
+    calories = (target_calories * table.ratios).astype(np.int64).tolist()
+    return [
+        {'name': name, 'calories': meal_calories, 'portion': portion}
+        for name, meal_calories, portion in zip(table.names, calories, table.portions)
+    ]
 
 @main.route('/api/clear-shuffle-cache', methods=['POST'])
 def clear_shuffle_cache():
@@ -361,8 +359,9 @@ def test_variety():
 def debug_meals():
     return jsonify({
         'success': True,
-        'model_loaded': meal_model is not None,
-        'model_path': os.path.join('app', 'models', 'meal_recommender.pkl'),
+        'model_loaded': get_meal_model() is not None,
+        'model_path': registry.stats()['meal_recommender']['path'],
+        'models': registry.stats(),
         'available_regions': ['North India', 'South India', 'East India', 'West India'],
         'meal_times': ['breakfast', 'lunch', 'dinner', 'snacks']
     })
@@ -1,7 +1,10 @@
 import os
 from flask import Flask
 from flask_cors import CORS
-from app.firebase_config import db
+from app.logging_config import begin_request_logging, configure_logging
+from app.services.meal_catalog import MealCatalog
+from app.services.model_registry import registry
+
 
 def create_app():
     # Get the absolute path to the project root
@@ -15,13 +18,34 @@ def create_app():
     # ✅ Add secret key for session handling
     app.secret_key = os.environ.get("SECRET_KEY", "super-secret-key")
 
+    # ✅ Firestore is connected here, not on `import app`, so the services import without credentials
+    from app.firebase_config import db
     app.config['FIRESTORE_DB'] = db
 
-    from app.routes import main_bp, user_bp, weight_bp, meals_bp
+    # ✅ Leveled logging written by a background thread; a sampled share of requests logs at DEBUG
+    configure_logging()
+    app.before_request(begin_request_logging)
+
+    # ✅ Load the meal model once per process, before the catalog builds its suitability matrix
+    try:
+        registry.warm_up(["meal_recommender"])
+    except Exception:
+        pass  # Logged by the registry; predictions fall back until the model is reloaded
+
+    # ✅ Load meals.json once per process; the catalog hot-reloads itself when the file changes
+    catalog = MealCatalog(os.environ.get("MEAL_CATALOG_PATH", os.path.join(base_dir, 'app', 'meals.json')))
+    app.config['MEAL_CATALOG'] = catalog
+    app.config['MODEL_REGISTRY'] = registry
+
+    # ✅ A reloaded meal model invalidates the precomputed suitability matrix
+    registry.on_reload(lambda name: catalog.refresh_suitability() if name == "meal_recommender" else None)
+
+    from app.routes import main_bp, user_bp, weight_bp, meals_bp, metrics_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(user_bp, url_prefix='/api')
     app.register_blueprint(weight_bp, url_prefix='/api')
     app.register_blueprint(meals_bp)
+    app.register_blueprint(metrics_bp)
 
     return app
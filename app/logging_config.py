@@ -0,0 +1,91 @@
+# app/logging_config.py - LEVELED, SAMPLED LOGGING WITH I/O OFF THE REQUEST THREAD
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Parent of every application logger (calorie_mate.meals, calorie_mate.routes, ...)
+LOGGER_NAME = "calorie_mate"
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# True while the current request was picked for debug logging
+_sampled = contextvars.ContextVar("calorie_mate_log_sampled", default=False)
+
+_state = {"listener": None, "level": logging.INFO, "sample_rate": 0.0}
+
+
+def get_logger(name):
+    """Child of the application logger, e.g. get_logger("meals") -> calorie_mate.meals"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class _SampledDebugFilter(logging.Filter):
+    """Records below the configured level pass only for sampled requests"""
+
+    def filter(self, record):
+        return record.levelno >= _state["level"] or _sampled.get()
+
+
+def configure_logging(level=None, sample_rate=None, stream=None):
+    """
+    Route application logs through a QueueHandler; a QueueListener thread does the
+    actual writes, so request threads never block on stdout.
+
+    LOG_LEVEL (default INFO) applies to every request. LOG_DEBUG_SAMPLE_RATE
+    (default 0) is the fraction of requests that also log at DEBUG. Safe to call
+    again: the previous listener is stopped and replaced.
+    """
+    level = level or os.environ.get("LOG_LEVEL", "INFO")
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if not isinstance(level, int):
+        level = logging.INFO
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0") or 0)
+    _state["level"] = level
+    _state["sample_rate"] = max(0.0, min(1.0, sample_rate))
+
+    shutdown_logging()
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    _state["listener"] = listener
+
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(_SampledDebugFilter())
+    logger = logging.getLogger(LOGGER_NAME)
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.propagate = False
+    # DEBUG records are only created when someone may actually want them
+    logger.setLevel(logging.DEBUG if _state["sample_rate"] > 0 else level)
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    listener = _state["listener"]
+    if listener is not None:
+        _state["listener"] = None
+        listener.stop()
+
+
+def begin_request_logging():
+    """Decide (once per request) whether this request logs at DEBUG"""
+    rate = _state["sample_rate"]
+    _sampled.set(rate >= 1.0 or (rate > 0.0 and random.random() < rate))
+
+
+def debug_enabled(logger):
+    """Whether a DEBUG record from `logger` would be written for the current request"""
+    return logger.isEnabledFor(logging.DEBUG) and (_state["level"] <= logging.DEBUG or _sampled.get())
+
+
+atexit.register(shutdown_logging)
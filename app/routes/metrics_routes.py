@@ -0,0 +1,36 @@
+# app/routes/metrics_routes.py - REQUEST TIMING HOOKS, SERVER-TIMING HEADER AND /metrics
+import time
+
+from flask import Blueprint, Response, g, request
+
+from app.services.metrics import begin_timings, end_timings, metrics, server_timing
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    begin_timings()
+
+
+@metrics_bp.after_app_request
+def finish_request_timer(response):
+    started = g.pop("request_started", None)
+    timings = end_timings()
+    if started is None:
+        return response
+
+    total = time.perf_counter() - started
+    # Route pattern, not the raw path, so label cardinality stays bounded
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.inc("requests_total", endpoint=endpoint, status=response.status_code)
+    metrics.observe("request_seconds", total, endpoint=endpoint)
+    response.headers["Server-Timing"] = server_timing(timings, total)
+    return response
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition of request, stage, model-call and cache metrics"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
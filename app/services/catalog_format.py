@@ -0,0 +1,137 @@
+# app/services/catalog_format.py - COMPILED BINARY MEAL CATALOG (READ VIA MMAP)
+"""
+Layout of a compiled catalog file (little-endian):
+
+    magic      8 bytes   b"CMCAT001"
+    length     uint32    size of the JSON manifest in bytes
+    padding    4 bytes
+    manifest   JSON      row count, source hash, vocabularies, column table
+    columns    ...       fixed-width arrays, each starting on a 64-byte boundary
+
+The manifest maps every column name to {"dtype", "offset", "count"}. String
+columns are stored as a string table: a uint32 offsets column with rows + 1
+entries and a uint8 blob column holding the UTF-8 bytes back to back.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"CMCAT001"
+COMPILED_SUFFIX = ".bin"
+_HEADER = struct.Struct("<8sI4x")
+_ALIGN = 64
+
+
+class StringColumn:
+    """Read-only string column backed by an offsets array and a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def encode_strings(values):
+    """Build (offsets, blob) arrays for a string table"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+def write_compiled(path, rows, source_hash, vocab, columns):
+    """
+    Write a compiled catalog atomically.
+
+    `columns` maps names to NumPy arrays. The file is written to a temp file and
+    moved into place with os.replace, so workers that still have the previous
+    version mapped keep reading the old inode instead of crashing on truncation.
+    """
+    manifest = {"version": 1, "rows": rows, "source_hash": source_hash, "vocab": vocab, "columns": {}}
+
+    # Column offsets are relative to the aligned end of the manifest
+    layout = []
+    position = 0
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        dtype = array.dtype.newbyteorder('<') if array.dtype.byteorder == '>' else array.dtype
+        layout.append((name, array.astype(dtype, copy=False), position))
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    for name, array, offset in layout:
+        manifest["columns"][name] = {"dtype": array.dtype.str, "offset": offset, "count": int(array.size)}
+
+    manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode('utf-8')
+    data_start = _data_start(len(manifest_bytes))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".catalog-", suffix=COMPILED_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, len(manifest_bytes)))
+            f.write(manifest_bytes)
+            for name, array, offset in layout:
+                f.seek(data_start + offset)
+                f.write(array.tobytes())
+            f.truncate(data_start + position)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _data_start(manifest_length):
+    return -(-(_HEADER.size + manifest_length) // _ALIGN) * _ALIGN
+
+
+def _read_manifest(buffer):
+    magic, length = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a compiled meal catalog (bad magic)")
+    manifest = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + length]).decode('utf-8'))
+    return manifest, _data_start(length)
+
+
+def read_source_hash(path):
+    """Read only the manifest's source hash (cheap, used for hot-reload checks)"""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        magic, length = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled meal catalog")
+        return json.loads(f.read(length).decode('utf-8'))["source_hash"]
+
+
+def read_compiled(path):
+    """
+    Map a compiled catalog read-only.
+
+    Returns (manifest, columns) where every column is a NumPy view straight onto
+    the shared mapping, so the OS page cache holds one copy for all workers.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    manifest, data_start = _read_manifest(mapping)
+    columns = {}
+    for name, spec in manifest["columns"].items():
+        columns[name] = np.frombuffer(
+            mapping, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=data_start + spec["offset"]
+        )
+    return manifest, columns
@@ -0,0 +1,98 @@
+# app/services/feature_encoder.py - FIXED-COLUMN ONE-HOT ENCODER FOR THE MEAL MODEL
+import numbers
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+
+class FeatureEncoder:
+    """
+    Produces exactly what pd.get_dummies + back-fill + reindex(model_columns)
+    produced, written straight into a float32 matrix.
+
+    The column map is built once from model_columns: numeric features map to
+    their own column, categorical values map to their "<feature>_<value>" dummy
+    column. Meal features are encoded once into a static block; per-request user
+    features only overwrite their own columns on a copy of it.
+    """
+
+    def __init__(self, model_columns, user_features):
+        self.columns = list(model_columns)
+        self.column_index = {column: i for i, column in enumerate(self.columns)}
+        self.user_features = tuple(user_features)
+
+        # Columns owned by a user feature (numeric column or any of its dummies)
+        self.user_columns = np.array(sorted(
+            i for i, column in enumerate(self.columns)
+            if any(column == name or column.startswith(f"{name}_") for name in self.user_features)
+        ), dtype=np.intp)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def encode_static(self, meal_df):
+        """Encode every meal column (user feature columns are left at 0)"""
+        return self.encode_columns(len(meal_df), meal_df.items())
+
+    def encode_columns(self, n_meals, columns):
+        """
+        encode_static over (name, values) pairs instead of a DataFrame: values are
+        arrays / Series, or a pd.Categorical for columns that are already coded.
+        """
+        block = np.zeros((n_meals, len(self.columns)), dtype=np.float32)
+
+        for name, values in columns:
+            if name in self.user_features:
+                continue
+
+            if isinstance(values, pd.Categorical):
+                codes, uniques = values.codes, values.categories
+            elif is_numeric_dtype(values) or is_bool_dtype(values):
+                index = self.column_index.get(name)
+                if index is not None:
+                    if isinstance(values, pd.Series):
+                        values = values.to_numpy(dtype=np.float32, na_value=np.nan)
+                    block[:, index] = values
+                continue
+            else:
+                # One-hot: factorize once, then map each distinct value to its dummy column
+                codes, uniques = pd.factorize(values)
+
+            targets = np.array([self.column_index.get(f"{name}_{value}", -1) for value in uniques], dtype=np.intp)
+            if not len(targets) or (targets < 0).all():
+                continue
+            rows = np.flatnonzero(codes >= 0)
+            columns_hit = targets[codes[rows]]
+            hit = columns_hit >= 0
+            block[rows[hit], columns_hit[hit]] = 1.0
+
+        return block
+
+    def user_assignments(self, features):
+        """(column indices, values) to write for one user's features"""
+        indices, values = [], []
+        for name in self.user_features:
+            value = features.get(name)
+            if value is None:
+                continue
+            if isinstance(value, (numbers.Number, np.bool_)):
+                index = self.column_index.get(name)
+                column_value = float(value)
+            else:
+                index = self.column_index.get(f"{name}_{value}")
+                column_value = 1.0
+            if index is not None:
+                indices.append(index)
+                values.append(column_value)
+        return np.array(indices, dtype=np.intp), np.array(values, dtype=np.float32)
+
+    def encode(self, static_block, features, out=None):
+        """Static meal block + one user's features -> model input (written into `out` if given)"""
+        if out is None:
+            out = np.empty_like(static_block)
+        np.copyto(out, static_block)
+        out[:, self.user_columns] = 0.0
+        indices, values = self.user_assignments(features)
+        out[:, indices] = values
+        return out
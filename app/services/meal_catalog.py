@@ -0,0 +1,724 @@
+# app/services/meal_catalog.py - PROCESS-WIDE MEAL CATALOG WITH HOT RELOAD
+import argparse
+import bisect
+import copy
+import hashlib
+import json
+import numbers
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.logging_config import get_logger
+from app.services.catalog_format import (
+    COMPILED_SUFFIX, StringColumn, encode_strings, read_compiled, read_source_hash, write_compiled
+)
+
+log = get_logger("catalog")
+
+# Absolute path to app/meals.json (same file served by main_routes.serve_meals_json)
+DEFAULT_MEALS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'meals.json')
+
+# ✅ REGION MAPPING TO HANDLE DIFFERENT FORMATS
+REGION_MAPPING = {
+    'north': ['north', 'north_india', 'north india'],
+    'south': ['south', 'south_india', 'south india'],
+    'east': ['east', 'east_india', 'east india'],
+    'west': ['west', 'west_india', 'west india'],
+    'north_india': ['north', 'north_india', 'north india'],
+    'south_india': ['south', 'south_india', 'south india'],
+    'east_india': ['east', 'east_india', 'east india'],
+    'west_india': ['west', 'west_india', 'west india']
+}
+
+# Numeric nutrient columns kept as float32 arrays
+NUTRIENT_COLUMNS = ('calories', 'protein', 'carbs', 'fats')
+
+# Meal fields that may carry the veg / non-veg marker, in priority order
+DIET_FIELDS = ('diet', 'type')
+
+# String attributes stored as interned int16 codes
+CODED_COLUMNS = ('region', 'meal_time', 'original_region', 'diet')
+
+# Dish keywords used for variety (one pick per keyword before random fill), in priority order
+VARIETY_KEYWORDS = (
+    'rice', 'roti', 'dal', 'dosa', 'idli', 'parantha', 'curry', 'biryani',
+    'samosa', 'vada', 'upma', 'poha', 'dhokla', 'chicken', 'paneer', 'fish',
+    'thali', 'soup', 'salad', 'tea', 'chaat'
+)
+
+# Random probes before a pool sample falls back to filtering the candidates explicitly
+MAX_SAMPLE_PROBES = 16
+
+# Pool positions per running count in an AcceptedIndex
+RANK_BLOCK = 64
+
+# Fields rebuilt from columns; everything else in a meal is kept as "extras"
+CORE_FIELDS = ('name',) + NUTRIENT_COLUMNS + ('region', 'meal_time', 'original_region')
+
+
+def normalize_region(region: str) -> str:
+    """Normalize a region name the same way meals.json keys and user input are normalized"""
+    return (region or "").lower().replace(" ", "_").strip()
+
+
+def _intern(values):
+    """Map a list of strings to (int16 codes, vocabulary list)"""
+    index = {}
+    codes = np.empty(len(values), dtype=np.int16)
+    for i, value in enumerate(values):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        codes[i] = code
+    return codes, list(index)
+
+
+def _diet_value(meal):
+    return str(next((meal[field] for field in DIET_FIELDS if meal.get(field)), '')).lower().strip()
+
+
+def _py_number(value):
+    """float32 column value back to the int/float a JSON editor would have written"""
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 4)
+
+
+def _masks(codes, size):
+    """One boolean bitmap over the catalog per interned value"""
+    return [codes == code for code in range(size)]
+
+
+def _keyword_bits(names):
+    """Bit k set when VARIETY_KEYWORDS[k] occurs in the lowercased meal name"""
+    lowered = np.char.lower(np.array([str(name) for name in names], dtype=str))
+    bits = np.zeros(len(lowered), dtype=np.uint32)
+    for k, keyword in enumerate(VARIETY_KEYWORDS):
+        bits |= (np.char.find(lowered, keyword) >= 0).astype(np.uint32) << np.uint32(k)
+    return bits
+
+
+def flatten_meal_data(meal_data):
+    """Flatten {region: {meal_time: [meal, ...]}} into one record per meal"""
+    flat_meals = []
+    for region, meals_by_region in meal_data.items():
+        normalized_region = normalize_region(region)
+
+        for meal_time, meals in meals_by_region.items():
+            normalized_meal_time = meal_time.lower().strip()
+
+            for meal in meals:
+                meal_copy = meal.copy()
+                meal_copy['region'] = normalized_region
+                meal_copy['meal_time'] = normalized_meal_time
+                meal_copy['original_region'] = region
+                flat_meals.append(meal_copy)
+
+    return flat_meals
+
+
+def validate_meal_data(meal_data):
+    """Check the {region: {meal_time: [meal, ...]}} structure. Returns a list of error strings."""
+    errors = []
+    if not isinstance(meal_data, dict):
+        return ["top level must be an object of regions"]
+
+    for region, meals_by_region in meal_data.items():
+        if not isinstance(meals_by_region, dict):
+            errors.append(f"{region}: must be an object of meal times")
+            continue
+        if normalize_region(region) not in REGION_MAPPING:
+            log.warning("⚠️ Region '%s' is not in REGION_MAPPING; it only matches by partial name", region)
+
+        for meal_time, meals in meals_by_region.items():
+            if not isinstance(meals, list):
+                errors.append(f"{region}/{meal_time}: must be a list of meals")
+                continue
+
+            for i, meal in enumerate(meals):
+                where = f"{region}/{meal_time}[{i}]"
+                if not isinstance(meal, dict):
+                    errors.append(f"{where}: must be an object")
+                    continue
+                if not isinstance(meal.get('name'), str) or not meal['name'].strip():
+                    errors.append(f"{where}: missing name")
+                for column in NUTRIENT_COLUMNS:
+                    value = meal.get(column)
+                    if column == 'calories' and value is None:
+                        errors.append(f"{where}: missing calories")
+                    elif value is not None and (
+                        isinstance(value, bool) or not isinstance(value, numbers.Real) or value < 0
+                    ):
+                        errors.append(f"{where}: {column} must be a non-negative number, got {value!r}")
+
+    return errors
+
+
+class CatalogSnapshot:
+    """
+    One fully built version of the meal catalog. Treat everything here as read-only.
+
+    Besides the flat records, every meal gets a row id (its position in `records`)
+    and the catalog is stored column-wise: float32 nutrient arrays plus int16 codes
+    for region, meal_time and diet. For each code there is a precomputed boolean
+    bitmap, and for each (region, meal_time) pair a precomputed id list, so a
+    candidate pool is a lookup plus a bitwise AND instead of a DataFrame scan.
+    """
+
+    def __init__(self, names, nutrients, codes, vocab, content_hash, mtime, records=None, extras=None):
+        self.names = names
+        for column in NUTRIENT_COLUMNS:
+            setattr(self, column, nutrients[column])
+        self.vocab = vocab
+        for attr in CODED_COLUMNS:
+            setattr(self, f"{attr}_codes", codes[attr])
+            setattr(self, f"{attr}_vocab", vocab[attr])
+            setattr(self, f"{attr}_index", {value: code for code, value in enumerate(vocab[attr])})
+
+        self.content_hash = content_hash
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self._records = records
+        self._extras = extras
+        self._df = None
+        self.meal_features = None
+        self.suitability = None
+        self.portion_table = None
+        self._build_indexes()
+
+    @classmethod
+    def from_records(cls, records, content_hash, mtime):
+        """Build from flattened meals.json records"""
+        n = len(records)
+        names = np.array([meal.get('name', '') for meal in records], dtype=object)
+        nutrients = {
+            column: np.fromiter((meal.get(column) or 0 for meal in records), dtype=np.float32, count=n)
+            for column in NUTRIENT_COLUMNS
+        }
+        codes, vocab = {}, {}
+        codes['region'], vocab['region'] = _intern([meal['region'] for meal in records])
+        codes['meal_time'], vocab['meal_time'] = _intern([meal['meal_time'] for meal in records])
+        codes['original_region'], vocab['original_region'] = _intern([meal['original_region'] for meal in records])
+        codes['diet'], vocab['diet'] = _intern([_diet_value(meal) for meal in records])
+        return cls(names, nutrients, codes, vocab, content_hash, mtime, records=records)
+
+    @classmethod
+    def from_compiled(cls, path, mtime):
+        """Map a compiled catalog; columns stay views onto the shared read-only mapping"""
+        manifest, columns = read_compiled(path)
+        names = StringColumn(columns['name.offsets'], columns['name.blob'])
+        extras = StringColumn(columns['extras.offsets'], columns['extras.blob'])
+        nutrients = {column: columns[column] for column in NUTRIENT_COLUMNS}
+        codes = {attr: columns[f"{attr}.code"] for attr in CODED_COLUMNS}
+        return cls(names, nutrients, codes, manifest['vocab'], manifest['source_hash'], mtime, extras=extras)
+
+    def __len__(self):
+        return len(self.region_codes)
+
+    def _build_indexes(self):
+        self.region_masks = _masks(self.region_codes, len(self.region_vocab))
+        self.meal_time_masks = _masks(self.meal_time_codes, len(self.meal_time_vocab))
+        self.diet_masks = _masks(self.diet_codes, len(self.diet_vocab))
+
+        # Position lists: all ids per region, and per (region, meal_time)
+        self.region_ids = [np.flatnonzero(mask) for mask in self.region_masks]
+        self.pool_ids = {}
+        for region_code, meal_time_code in set(zip(self.region_codes.tolist(), self.meal_time_codes.tolist())):
+            self.pool_ids[(region_code, meal_time_code)] = np.flatnonzero(
+                self.region_masks[region_code] & self.meal_time_masks[meal_time_code]
+            )
+
+        # Variety keywords: a bitmask per meal, and per (region, meal_time) an inverted
+        # index keyword -> ids, so variety selection never rescans meal names
+        self.keyword_bits = _keyword_bits(self.names)
+        self.keyword_pool_ids = {}
+        for key, ids in self.pool_ids.items():
+            bits = self.keyword_bits[ids]
+            self.keyword_pool_ids[key] = tuple(
+                ids[(bits >> np.uint32(k)) & 1 == 1] for k in range(len(VARIETY_KEYWORDS))
+            )
+        self._name_ids = None
+
+    @property
+    def name_ids(self):
+        """Meal name -> ids with that name (built on first use)"""
+        if self._name_ids is None:
+            name_ids = {}
+            for i, name in enumerate(self.names):
+                name_ids.setdefault(name, []).append(i)
+            self._name_ids = name_ids
+        return self._name_ids
+
+    @property
+    def records(self):
+        """Flat meal dicts, one per row id (rebuilt from columns for compiled catalogs)"""
+        if self._records is None:
+            self._records = [self._build_record(i) for i in range(len(self))]
+        return self._records
+
+    @property
+    def df(self):
+        """The records as a DataFrame (built on first use; the model path encodes feature_columns())"""
+        if self._df is None:
+            self._df = pd.DataFrame(self.records)
+        return self._df
+
+    def feature_columns(self):
+        """
+        (name, values) for every column of `df`, built from the arrays: no record
+        dicts and no DataFrame, so a compiled catalog's mapping stays shared.
+        Coded columns come as pd.Categorical; extra meal fields are gathered per field.
+        """
+        yield 'name', np.asarray(list(self.names), dtype=object)
+        for column in NUTRIENT_COLUMNS:
+            yield column, getattr(self, column)
+        yield from self._extra_columns()
+        for attr in ('region', 'meal_time', 'original_region'):
+            yield attr, pd.Categorical.from_codes(getattr(self, f"{attr}_codes"), categories=getattr(self, f"{attr}_vocab"))
+
+    def _extra_columns(self):
+        """Meal fields outside CORE_FIELDS: numeric fields as float arrays (NaN if missing), others as objects"""
+        n = len(self)
+        if self._records is not None:
+            extras = ({k: v for k, v in meal.items() if k not in CORE_FIELDS} for meal in self._records)
+        elif self._extras is not None:
+            extras = (json.loads(value) if value else {} for value in self._extras)
+        else:
+            return
+        columns = {}
+        for i, fields in enumerate(extras):
+            for key, value in fields.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * n
+                column[i] = value
+
+        for key, values in columns.items():
+            present = [value for value in values if value is not None]
+            if present and all(isinstance(value, numbers.Number) for value in present):
+                yield key, np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            else:
+                yield key, np.array(values, dtype=object)
+
+    def _build_record(self, i):
+        meal = {'name': self.names[i]}
+        for column in NUTRIENT_COLUMNS:
+            meal[column] = _py_number(getattr(self, column)[i])
+        extras = self._extras[i] if self._extras is not None else ''
+        if extras:
+            meal.update(json.loads(extras))
+        meal['region'] = self.region_vocab[self.region_codes[i]]
+        meal['meal_time'] = self.meal_time_vocab[self.meal_time_codes[i]]
+        meal['original_region'] = self.original_region_vocab[self.original_region_codes[i]]
+        return meal
+
+    def compile(self, path):
+        """Write this catalog as a compiled artifact (see catalog_format)"""
+        records = self.records
+        name_offsets, name_blob = encode_strings([str(name) for name in self.names])
+        extras_offsets, extras_blob = encode_strings([
+            json.dumps({k: v for k, v in meal.items() if k not in CORE_FIELDS}, ensure_ascii=False)
+            if any(k not in CORE_FIELDS for k in meal) else ''
+            for meal in records
+        ])
+        columns = {
+            'name.offsets': name_offsets,
+            'name.blob': name_blob,
+            'extras.offsets': extras_offsets,
+            'extras.blob': extras_blob,
+        }
+        for column in NUTRIENT_COLUMNS:
+            columns[column] = getattr(self, column)
+        for attr in CODED_COLUMNS:
+            columns[f"{attr}.code"] = getattr(self, f"{attr}_codes")
+        write_compiled(path, len(self), self.content_hash, self.vocab, columns)
+
+    def mask(self, region_codes=None, meal_time=None, diet=None):
+        """Bitmap of meals matching every given attribute (None means any)"""
+        result = np.ones(len(self), dtype=bool)
+        if region_codes is not None:
+            region_mask = np.zeros(len(self), dtype=bool)
+            for code in region_codes:
+                region_mask |= self.region_masks[code]
+            result &= region_mask
+        if meal_time is not None:
+            code = self.meal_time_index.get(meal_time)
+            result &= self.meal_time_masks[code] if code is not None else False
+        if diet is not None:
+            code = self.diet_index.get(diet)
+            result &= self.diet_masks[code] if code is not None else False
+        return result
+
+    def candidate_ids(self, region_codes, meal_time):
+        """Ids of meals in the given regions (None = all regions) for one meal_time"""
+        meal_time_code = self.meal_time_index.get(meal_time)
+        if meal_time_code is None:
+            return np.empty(0, dtype=np.int64)
+        if region_codes is None:
+            region_codes = range(len(self.region_vocab))
+        parts = [self.pool_ids[key] for key in ((code, meal_time_code) for code in region_codes) if key in self.pool_ids]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def candidate_pool(self, region_codes, meal_time, suitable=None):
+        """CandidatePool over the given regions (None = all regions) for one meal_time"""
+        meal_time_code = self.meal_time_index.get(meal_time)
+        if region_codes is None:
+            region_codes = range(len(self.region_vocab))
+        keys = [] if meal_time_code is None else [
+            (code, meal_time_code) for code in region_codes if (code, meal_time_code) in self.pool_ids
+        ]
+        return CandidatePool(self, keys, suitable)
+
+    def match_region_codes(self, user_region: str):
+        """
+        Resolve a user region to catalog region codes.
+
+        Returns (exact_codes, partial_codes), or (None, None) for "all regions".
+        Exact codes follow REGION_MAPPING; partial codes are the substring fallback,
+        evaluated against the small region vocabulary rather than every meal.
+        """
+        user_region = normalize_region(user_region)
+        if not user_region or user_region in ["all", "all_regions"]:
+            return None, None
+
+        region_matches = REGION_MAPPING.get(user_region, [user_region])
+        exact = [self.region_index[r] for r in region_matches if r in self.region_index]
+
+        spaced = user_region.replace('_', ' ')
+        underscored = user_region.replace(' ', '_')
+        partial = [
+            code for code, region in enumerate(self.region_vocab)
+            if spaced in region.lower() or underscored in region.lower()
+        ]
+        return exact, partial
+
+    def derive(self, **derived):
+        """
+        A new snapshot sharing this one's columns and indexes, with derived data
+        (meal_features, suitability, portion_table) replaced; this one is left as is
+        """
+        snapshot = copy.copy(self)
+        for name, value in derived.items():
+            setattr(snapshot, name, value)
+        return snapshot
+
+    def get_records(self, ids):
+        """Materialize meal dicts for a list/array of ids"""
+        if self._records is None:
+            return [self._build_record(i) for i in ids]
+        records = self._records
+        return [records[i] for i in ids]
+
+    def meal_copies(self, ids):
+        """New meal dicts for ids, safe to modify (one dict per meal, never the shared records)"""
+        if self._records is None:
+            return [self._build_record(i) for i in ids]
+        records = self._records
+        return [dict(records[i]) for i in ids]
+
+
+class CandidatePool:
+    """
+    Meals one request may choose from: precomputed (region, meal_time) id segments,
+    restricted to a suitability bitmap and minus excluded ids.
+
+    Nothing is materialized up front. Membership is an O(1) check per id, so
+    sampling probes random positions in the segments (or in a keyword's inverted
+    index) instead of filtering and shuffling the whole pool.
+    """
+
+    def __init__(self, snapshot, keys, suitable=None, excluded=frozenset()):
+        self.snapshot = snapshot
+        self.keys = keys
+        self.suitable = suitable
+        self.excluded = excluded
+        self.segments = [snapshot.pool_ids[key] for key in keys]
+        self._size = None
+
+    def without_names(self, names):
+        """The same pool with every meal carrying one of `names` excluded"""
+        name_ids = self.snapshot.name_ids
+        excluded = set(self.excluded)
+        for name in names:
+            excluded.update(name_ids.get(name, ()))
+        return CandidatePool(self.snapshot, self.keys, self.suitable, frozenset(excluded))
+
+    def is_suitable(self, i):
+        return self.suitable is None or bool(self.suitable[i])
+
+    def accepts(self, i):
+        return self.is_suitable(i) and i not in self.excluded
+
+    def _in_segments(self, i):
+        for segment in self.segments:
+            position = np.searchsorted(segment, i)
+            if position < len(segment) and segment[position] == i:
+                return True
+        return False
+
+    def _filter(self, segments):
+        ids = np.concatenate(segments) if segments else np.empty(0, dtype=np.int64)
+        if self.suitable is not None:
+            ids = ids[self.suitable[ids]]
+        if self.excluded:
+            ids = ids[~np.isin(ids, list(self.excluded))]
+        return ids
+
+    def ids(self):
+        """All accepted ids, sorted within each segment"""
+        return self._filter(self.segments)
+
+    def excluded_ids(self):
+        """Suitable pool ids that are excluded (e.g. the previous selection)"""
+        return [i for i in sorted(self.excluded) if self._in_segments(i) and self.is_suitable(i)]
+
+    def __len__(self):
+        if self._size is None:
+            if self.suitable is None:
+                size = sum(len(segment) for segment in self.segments)
+            else:
+                size = sum(int(np.count_nonzero(self.suitable[segment])) for segment in self.segments)
+            self._size = size - len(self.excluded_ids())
+        return self._size
+
+    def accepted_index(self):
+        """Rank/select view of ids(): indexable like the id list, without concatenating it"""
+        return AcceptedIndex(self)
+
+    def keyword_segments(self, k):
+        """Inverted-index segments for VARIETY_KEYWORDS[k] within this pool"""
+        return [self.snapshot.keyword_pool_ids[key][k] for key in self.keys]
+
+    def sample(self, rng, segments=None, taken=(), weight=None):
+        """
+        One random accepted id from `segments` (default: the whole pool) that is
+        not in `taken`, or None if there is none. Uniform, or proportional to
+        weight(id) when a weight function with values in (0, 1] is given.
+        """
+        if segments is None:
+            segments = self.segments
+        sizes = [len(segment) for segment in segments]
+        total = sum(sizes)
+        if total == 0:
+            return None
+
+        # Rejection sampling: uniform over the accepted subset, O(1) per probe
+        ends = list(np.cumsum(sizes))
+        for _ in range(MAX_SAMPLE_PROBES):
+            position = rng.randrange(total)
+            s = bisect.bisect_right(ends, position)
+            i = int(segments[s][position - (ends[s] - sizes[s])])
+            if self.accepts(i) and i not in taken and (weight is None or rng.random() < weight(i)):
+                return i
+
+        # Mostly unsuitable / excluded: filter this candidate set once
+        candidates = [int(i) for i in self._filter(segments) if i not in taken]
+        if not candidates:
+            return None
+        if weight is not None:
+            return rng.choices(candidates, weights=[weight(i) for i in candidates])[0]
+        return candidates[rng.randrange(len(candidates))]
+
+    def records(self, ids):
+        return self.snapshot.get_records(ids)
+
+
+class AcceptedIndex:
+    """
+    The accepted ids of a CandidatePool as a read-only sequence: index[k] is
+    pool.ids()[k], without concatenating or filtering the segments.
+
+    Keeps the per-segment acceptance masks and a running count of accepted ids
+    per block of RANK_BLOCK positions; index[k] finds its block by binary search
+    and scans at most RANK_BLOCK mask entries.
+    """
+
+    def __init__(self, pool):
+        self.segments = pool.segments
+        self.masks = []
+        block_segment, block_start, block_counts = [], [], []
+        excluded = list(pool.excluded)
+        for s, segment in enumerate(pool.segments):
+            if pool.suitable is not None:
+                mask = pool.suitable[segment]
+            else:
+                mask = np.ones(len(segment), dtype=bool)
+            if excluded:
+                mask = mask & ~np.isin(segment, excluded)
+            starts = np.arange(0, len(segment), RANK_BLOCK)
+            self.masks.append(mask)
+            block_segment.append(np.full(len(starts), s))
+            block_start.append(starts)
+            block_counts.append(np.add.reduceat(mask, starts, dtype=np.int64) if len(starts) else starts)
+        empty = np.empty(0, dtype=np.int64)
+        self.block_segment = np.concatenate(block_segment) if block_segment else empty
+        self.block_start = np.concatenate(block_start) if block_start else empty
+        self.cumulative = np.cumsum(np.concatenate(block_counts)) if block_counts else empty
+
+    def __len__(self):
+        return int(self.cumulative[-1]) if len(self.cumulative) else 0
+
+    def __getitem__(self, k):
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        block = int(np.searchsorted(self.cumulative, k, side='right'))
+        rank = k - (int(self.cumulative[block - 1]) if block else 0)
+        s, start = self.block_segment[block], self.block_start[block]
+        offset = np.flatnonzero(self.masks[s][start:start + RANK_BLOCK])[rank]
+        return int(self.segments[s][start + offset])
+
+
+def build_portion_table(snapshot):
+    """Portion / explanation lookups for a snapshot (None if they cannot be built)"""
+    try:
+        from app.services.portion_table import PortionTable
+        started = time.time()
+        table = PortionTable(snapshot.names)
+        log.info("📐 Portion table: %d labels for %d meals in %.2fs", len(table.labels), len(table), time.time() - started)
+        return table
+    except Exception as e:
+        log.warning("⚠️ Portion table not built, sizing portions per request: %s", e)
+        return None
+
+
+class MealCatalog:
+    """
+    Loads meals.json (or a compiled .bin artifact) once and keeps the flattened
+    catalog resident in memory.
+
+    The file is re-checked at most every `check_interval` seconds. A changed mtime
+    triggers a content hash, and only a changed hash rebuilds the catalog. The new
+    snapshot is built off to the side and swapped in with a single assignment, so
+    readers always see either the old or the new catalog, never a partial one.
+    """
+
+    def __init__(self, path: str = DEFAULT_MEALS_PATH, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._last_check = 0.0
+        self._mtime = None
+        self._reload_lock = threading.Lock()
+
+        try:
+            self.reload(force=True)
+        except Exception as e:
+            log.error("❌ Could not load meal catalog from %s: %s", self.path, e)
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Return the current catalog, reloading first if the file changed"""
+        if self._snapshot is None:
+            self.reload(force=True)
+        elif time.time() - self._last_check >= self.check_interval:
+            try:
+                self.reload()
+            except Exception as e:
+                # Keep serving the last good catalog if the edited file is broken
+                log.warning("⚠️ Meal catalog reload failed, keeping previous version: %s", e)
+        return self._snapshot
+
+    def refresh_suitability(self):
+        """
+        Recompute the suitability matrix for the current catalog (call after the
+        model changes). Requests may be reading the current snapshot, so the new
+        matrix goes into a derived snapshot that is swapped in like a reload.
+        """
+        with self._reload_lock:
+            current = self._snapshot
+            if current is not None:
+                meal_features, suitability = self._build_suitability(current)
+                self._snapshot = current.derive(meal_features=meal_features, suitability=suitability)
+
+    def _prepare(self, snapshot):
+        """Build everything derived from a snapshot before it is swapped in"""
+        snapshot.meal_features, snapshot.suitability = self._build_suitability(snapshot)
+        snapshot.portion_table = build_portion_table(snapshot)
+
+    def _build_suitability(self, snapshot):
+        """(encoded meal features, suitability matrix) for the current model; None where unavailable"""
+        try:
+            from app.services.meal_model import build_suitability_matrix, encode_meal_features
+            started = time.time()
+            meal_features = encode_meal_features(snapshot)
+        except Exception as e:
+            log.warning("⚠️ Meal features not encoded, using live model predictions: %s", e)
+            return None, None
+        try:
+            matrix = build_suitability_matrix(meal_features)
+            if matrix is not None:
+                log.info("📚 Suitability matrix: %s combos in %.2fs", matrix.bits.shape[:3], time.time() - started)
+            return meal_features, matrix
+        except Exception as e:
+            log.warning("⚠️ Suitability matrix not built, using live model predictions: %s", e)
+            return meal_features, None
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the catalog if the file changed (or always, with force). Returns True if swapped."""
+        if not self._reload_lock.acquire(blocking=force or self._snapshot is None):
+            # Another thread is already reloading; keep serving the current snapshot
+            return False
+
+        try:
+            self._last_check = time.time()
+            mtime = os.path.getmtime(self.path)
+            current = self._snapshot
+
+            if not force and current is not None and mtime == self._mtime:
+                return False
+
+            compiled = self.path.endswith(COMPILED_SUFFIX)
+            if compiled:
+                content_hash = read_source_hash(self.path)
+            else:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                content_hash = hashlib.sha1(raw).hexdigest()
+
+            self._mtime = mtime
+            if not force and current is not None and content_hash == current.content_hash:
+                return False
+
+            if compiled:
+                snapshot = CatalogSnapshot.from_compiled(self.path, mtime)
+            else:
+                snapshot = CatalogSnapshot.from_records(
+                    flatten_meal_data(json.loads(raw.decode('utf-8'))), content_hash, mtime
+                )
+            self._prepare(snapshot)
+            self._snapshot = snapshot
+            log.info("📚 Meal catalog loaded: %d meals from %s (%s)", len(snapshot), self.path, content_hash[:8])
+            return True
+        finally:
+            self._reload_lock.release()
+
+
+def compile_catalog(json_path: str, out_path: str) -> CatalogSnapshot:
+    """Validate meals.json once and write the compiled, mmap-able catalog"""
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    meal_data = json.loads(raw.decode('utf-8'))
+
+    errors = validate_meal_data(meal_data)
+    if errors:
+        raise ValueError(f"{json_path} has {len(errors)} problem(s):\n  " + "\n  ".join(errors[:50]))
+
+    snapshot = CatalogSnapshot.from_records(
+        flatten_meal_data(meal_data), hashlib.sha1(raw).hexdigest(), os.path.getmtime(json_path)
+    )
+    snapshot.compile(out_path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile meals.json into a memory-mappable catalog")
+    parser.add_argument("source", nargs="?", default=DEFAULT_MEALS_PATH)
+    parser.add_argument("output", nargs="?", default=os.path.splitext(DEFAULT_MEALS_PATH)[0] + COMPILED_SUFFIX)
+    args = parser.parse_args()
+
+    built = compile_catalog(args.source, args.output)
+    print(f"✅ Compiled {len(built)} meals -> {args.output} ({os.path.getsize(args.output)} bytes)")
@@ -1,41 +1,114 @@
 import pandas as pd
-import joblib
 import numpy as np
-import os
+from app.services.feature_encoder import FeatureEncoder
+from app.services.model_registry import registry
+from app.services.suitability import SuitabilityMatrix
+from app.services.tree_kernel import FlatTree
 
-# Load model + feature names
-MODEL_PATH = os.path.join("app", "models", "meal_recommender.pkl")
-model, model_columns = joblib.load(MODEL_PATH)  # 👈 unpack properly
+MODEL_NAME = "meal_recommender"
 
-def predict_suitable_meals(user_data, meal_df):
-    age = 50
-    height_cm = 50
-    weight_kg = 50
-    bmi = user_data.get("bmi", 22.5)
-    goal = user_data.get("goal", "maintain")
+# Per-user model inputs; only bmi, goal and diet_preference come from the request
+USER_FEATURES = ("age", "height_cm", "weight_kg", "bmi", "goal", "gender", "activity_level", "diet_preference")
 
-    meal_df = meal_df.copy()
-    meal_df["age"] = age
-    meal_df["height_cm"] = height_cm
-    meal_df["weight_kg"] = weight_kg
-    meal_df["bmi"] = bmi
-    meal_df["goal"] = goal
-    meal_df["gender"] = "male"
-    meal_df["activity_level"] = "moderate"
-    meal_df["diet_preference"] = user_data.get("diet_preference", "vegetarian").lower()
+# (registry version, model, model_columns, encoder); rebuilt when the registry reloads the model
+_loaded = None
+
+# Rows per model.predict call in batch mode (users x meals)
+MAX_ROWS_PER_CALL = 2_000_000
+
+
+def loaded_model():
+    """(model, model_columns, encoder) for the current model, loaded through the shared registry"""
+    global _loaded
+    version = registry.version(MODEL_NAME)
+    if _loaded is None or _loaded[0] != version:
+        artifact = registry.get(MODEL_NAME)
+        if isinstance(artifact, FlatTree):
+            # Exported flat kernel (python -m app.services.tree_kernel): no scikit-learn needed to serve
+            model, model_columns = artifact, artifact.columns
+        else:
+            model, model_columns = artifact  # 👈 unpack properly
+        _loaded = (version, model, model_columns, FeatureEncoder(model_columns, USER_FEATURES))
+    return _loaded[1:]
+
+
+def user_features(user_data):
+    return {
+        "age": 50,
+        "height_cm": 50,
+        "weight_kg": 50,
+        "bmi": user_data.get("bmi", 22.5),
+        "goal": user_data.get("goal", "maintain"),
+        "gender": "male",
+        "activity_level": "moderate",
+        "diet_preference": user_data.get("diet_preference", "vegetarian").lower(),
+    }
+
+
+def encode_meal_features(meals):
+    """
+    Static float32 block of meal features, reusable across requests for the same
+    catalog. `meals` is a CatalogSnapshot (encoded straight from its columns) or
+    a DataFrame of meal records.
+    """
+    encoder = loaded_model()[2]
+    if isinstance(meals, pd.DataFrame):
+        return encoder.encode_static(meals)
+    return encoder.encode_columns(len(meals), meals.feature_columns())
 
-    input_df = pd.get_dummies(meal_df)
 
-    # Ensure all model columns exist
-    for col in model_columns:
-        if col not in input_df.columns:
-            input_df[col] = 0
+def _predict(X):
+    model, model_columns, _ = loaded_model()
+    if isinstance(model, FlatTree):
+        return model.predict(X)
+    # sklearn was fitted on a DataFrame; keep the feature names to avoid its warning
+    return model.predict(pd.DataFrame(X, columns=model_columns, copy=False))
 
-    # Reorder columns
-    input_df = input_df[model_columns]
 
-    # Predict
-    predictions = model.predict(input_df)
-    meal_df["suitable"] = predictions
+def predict_suitability(user_data, meal_features, out=None):
+    """Model predictions for one user over a pre-encoded meal block"""
+    encoder = loaded_model()[2]
+    X = encoder.encode(meal_features, user_features(user_data), out=out)
+    return _predict(X)
+
+
+def predict_suitability_batch(user_datas, meal_features, max_rows=MAX_ROWS_PER_CALL):
+    """
+    Predictions for many users in one model call: one stacked (users x meals) matrix.
+    Returns an array of shape (len(user_datas), n_meals). Batches larger than
+    max_rows rows are split so the matrix stays bounded in memory.
+    """
+    encoder = loaded_model()[2]
+    n_meals = len(meal_features)
+    per_call = max(1, max_rows // max(1, n_meals))
+    results = []
+    for start in range(0, len(user_datas), per_call):
+        chunk = user_datas[start:start + per_call]
+        X = np.empty((len(chunk) * n_meals, len(encoder)), dtype=np.float32)
+        for i, user_data in enumerate(chunk):
+            encoder.encode(meal_features, user_features(user_data), out=X[i * n_meals:(i + 1) * n_meals])
+        predictions = _predict(X)
+        results.append(np.asarray(predictions).reshape(len(chunk), n_meals))
+    if not results:
+        return np.empty((0, n_meals))
+    return np.concatenate(results)
+
+
+def predict_suitable_meals(user_data, meal_df, meal_features=None):
+    if meal_features is None:
+        meal_features = encode_meal_features(meal_df)
+
+    meal_df = meal_df.copy()
+    meal_df["suitable"] = predict_suitability(user_data, meal_features)
 
     return meal_df
+
+
+def build_suitability_matrix(meal_features):
+    """Precompute predictions for every (goal, diet, BMI band) over one encoded catalog"""
+    model, model_columns, _ = loaded_model()
+    out = np.empty_like(meal_features)
+    return SuitabilityMatrix.build(
+        model, model_columns, len(meal_features),
+        lambda user_data: predict_suitability(user_data, meal_features, out=out)
+    )
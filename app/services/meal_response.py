@@ -0,0 +1,129 @@
+# app/services/meal_response.py - SLIM AND COMPACT MEAL RESPONSES BUILT FROM CATALOG COLUMNS
+import json
+
+import numpy as np
+
+from app.services.meal_catalog import _py_number
+
+try:
+    import orjson
+except ImportError:  # optional: plain json is used without it
+    orjson = None
+
+# Every field a slim meal row may carry, in their default order
+SLIM_FIELDS = (
+    "name", "calories", "portion", "protein", "carbs", "fats", "explanation",
+    "original_calories", "portion_multiplier", "region_source", "meal_time",
+)
+
+# Fields sent for compact=1 without an explicit fields= list
+DEFAULT_COMPACT_FIELDS = ("name", "calories", "portion", "protein", "carbs", "fats")
+
+
+def response_format(options):
+    """
+    (fields, compact) requested through `fields=` (list or comma separated) and
+    `compact=1`. fields is None for the full legacy response.
+    """
+    compact = str(options.get("compact", "")).lower() in ("1", "true", "yes")
+    fields = options.get("fields")
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    if fields:
+        unknown = [field for field in fields if field not in SLIM_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(SLIM_FIELDS)})")
+        return tuple(dict.fromkeys(fields)), compact
+    if compact:
+        return DEFAULT_COMPACT_FIELDS, True
+    return None, False
+
+
+def slim_meals(catalog, ids, target_cals, goal, fields, compact=False):
+    """
+    Rows for the selected catalog ids carrying only `fields`: dicts, or positional
+    lists when compact. Values match process_selected_meals (same targets, portion
+    multiplier and scaled macros) but come straight from the catalog columns, with
+    no record copies. Returns (rows, calories of the first row).
+    """
+    if len(ids) == 0:
+        return [], 0
+    ids = np.asarray(ids, dtype=np.intp)
+    original = [_py_number(value) for value in catalog.calories[ids]]
+
+    # Smart portion target, as in process_selected_meals
+    adjusted = []
+    for calories in original:
+        if target_cals <= 200:
+            adjusted.append(min(target_cals, calories * 1.2))
+        elif target_cals >= 400:
+            adjusted.append(min(target_cals, calories * 1.5))
+        else:
+            adjusted.append(target_cals)
+    multipliers = [max(0.3, min(3.0, a / c if c > 0 else 1)) for a, c in zip(adjusted, original)]
+
+    columns = {}
+    for field in fields:
+        if field == "name":
+            columns[field] = [str(catalog.names[i]) for i in ids]
+        elif field == "calories":
+            columns[field] = [int(a) for a in adjusted]
+        elif field == "original_calories":
+            columns[field] = original
+        elif field == "portion_multiplier":
+            columns[field] = multipliers
+        elif field in ("protein", "carbs", "fats"):
+            values = getattr(catalog, field)[ids]
+            columns[field] = [round(_py_number(v) * m, 1) for v, m in zip(values, multipliers)]
+        elif field == "portion":
+            columns[field] = _portions(catalog, ids, adjusted)
+        elif field == "explanation":
+            columns[field] = _explanations(catalog, ids, goal)
+        elif field == "region_source":
+            columns[field] = [catalog.original_region_vocab[code] for code in catalog.original_region_codes[ids]]
+        elif field == "meal_time":
+            columns[field] = [catalog.meal_time_vocab[code] for code in catalog.meal_time_codes[ids]]
+
+    rows = zip(*(columns[field] for field in fields))
+    rows = [list(row) for row in rows] if compact else [dict(zip(fields, row)) for row in rows]
+    return rows, int(adjusted[0])
+
+
+def _portions(catalog, ids, adjusted):
+    table = catalog.portion_table
+    if table is not None:
+        return [table.portion(i, str(catalog.names[i]), a) for i, a in zip(ids, adjusted)]
+    from app.services.meal_service import portion_calculator
+    quantities, units = portion_calculator.calculate_portions(ids, adjusted, names=catalog.names)
+    return [portion_calculator.format_portion(q, u) for q, u in zip(quantities, units)]
+
+
+def _explanations(catalog, ids, goal):
+    table = catalog.portion_table
+    if table is not None:
+        return [table.explanation(i, goal) for i in ids]
+    from app.services.portion_table import EXPLANATION_TEMPLATES, explanation_code
+    return [EXPLANATION_TEMPLATES[explanation_code(str(catalog.names[i]))].format(goal=goal) for i in ids]
+
+
+def slim_body(meals_by_time, fields, compact, summary):
+    """The slim envelope: meals plus a few summary numbers (and the field order when compact)"""
+    body = {"meals": meals_by_time, **summary}
+    if compact:
+        body["fields"] = list(fields)
+    return body
+
+
+def dumps(body):
+    """JSON bytes for a response body; orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
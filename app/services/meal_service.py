@@ -0,0 +1,811 @@
+# app/services/meal_service.py - MEAL RECOMMENDATION PIPELINE (shared by single and batch endpoints)
+import math
+import random
+import time
+import numpy as np
+from app.logging_config import debug_enabled, get_logger
+from app.services.meal_catalog import NUTRIENT_COLUMNS, VARIETY_KEYWORDS, normalize_region
+from app.services.meal_usage import MealUsageTracker
+from app.services.plan_optimizer import DEFAULT_TOLERANCE, day_targets, deviation, nutrient_matrix, optimize_plans
+from app.services.metrics import metrics, record_cache, stage
+from app.services.meal_response import response_format, slim_body, slim_meals
+from app.services.meal_model import encode_meal_features, predict_suitability, predict_suitability_batch
+from app.services.portion_calculator import PortionCalculator
+from app.services.portion_table import EXPLANATION_TEMPLATES, explanation_code
+from app.services.model_registry import registry
+from app.services.response_cache import MODEL_NAME as RESPONSE_CACHE_MODEL, canonical_request, create_response_cache
+from app.services.selection_history import create_history_store, history_user_id
+from app.services.single_flight import create_single_flight
+from app.services.shuffle_paging import shuffle_key, shuffle_page
+
+log = get_logger("meals")
+
+# Initialize the portion calculator
+portion_calculator = PortionCalculator()
+
+# Fixed calorie splits
+CALORIE_SPLITS = {
+    "breakfast": 0.30,
+    "lunch": 0.30,
+    "dinner": 0.30,
+    "snacks": 0.10
+}
+
+# Meals shown per meal time (selection draws extra candidates, the first ones are displayed)
+DISPLAY_COUNT = 4
+
+# Upper bound on plans returned by /api/meal-plan
+MAX_PLANS = 20
+
+# Days planned by /api/meal-plan/week (and the most a request may ask for)
+WEEK_DAYS = 7
+MAX_PLAN_DAYS = 28
+
+# Upper bound on profiles accepted by one batch call
+MAX_BATCH_PROFILES = 5000
+
+# ✅ PER-USER HISTORY OF PREVIOUS SELECTIONS FOR PROPER SHUFFLING (TTL + LRU bounded;
+# SELECTION_HISTORY_BACKEND=sqlite shares it across worker processes)
+selection_history = create_history_store()
+meal_usage_history = MealUsageTracker()  # Decayed count of how often each meal was shown
+
+# ✅ FIRST-LOAD RESPONSES BY NORMALIZED PROFILE (RESPONSE_CACHE_TTL / RESPONSE_CACHE_MAX_ENTRIES)
+response_cache = create_response_cache()
+
+# ✅ IDENTICAL CONCURRENT FIRST LOADS SHARE ONE COMPUTATION (SINGLE_FLIGHT_TIMEOUT)
+inflight = create_single_flight()
+
+
+def find_suitable_meals(catalog, user_data):
+    """Suitability bitmap over catalog row ids: precomputed lookup, live model only as a fallback"""
+    suitable = catalog.suitability.lookup(user_data) if catalog.suitability is not None else None
+    record_cache("suitability_matrix", suitable is not None)
+    if suitable is None:
+        metrics.inc("model_calls_total", kind="single")
+        meal_features = catalog.meal_features
+        if meal_features is None:
+            meal_features = encode_meal_features(catalog)
+
+        # Suitability as a bitmap over catalog row ids
+        suitable = np.asarray(predict_suitability(user_data, meal_features)) == 1
+    return suitable
+
+
+def recommend_meals(user_data, catalog, suitable=None, shown=None):
+    """
+    Build the /api/get-meals response for one user. Returns (body, status).
+
+    If a `shown` dict is passed it receives {meal_time: displayed meal names}.
+    """
+    goal = user_data.get("goal", "maintain")
+    user_calories = int(user_data.get("calories", 1800))
+    is_shuffle = user_data.get("shuffle", False)
+    shuffle_count = user_data.get("shuffle_count", 0)
+    random_seed = user_data.get("random_seed", str(time.time()))
+    meal_time_filter = user_data.get("meal_time", None)
+    shuffle_seed = user_data.get("shuffle_seed")
+    fields, compact = response_format(user_data)
+
+    debug = debug_enabled(log)
+    if debug:
+        log.debug("🎯 User daily calorie target: %s", user_calories)
+        log.debug("🔀 Is shuffle request: %s, Count: %s, Seed: %s", is_shuffle, shuffle_count, random_seed)
+        log.debug("🍽️ Meal time filter: %s", meal_time_filter)
+
+    # ✅ PER-REQUEST RNG: concurrent requests never touch the global random state,
+    # and an explicit "seed" makes the whole response reproducible: the selection
+    # then ignores shuffle history and usage weights, which other traffic changes
+    seed = user_data.get("seed")
+    rng = random.Random(str(seed)) if seed is not None else random.Random()
+    usage = meal_usage_history if seed is None else None
+    if seed is not None:
+        log.debug("🎲 Reproducible request, seed: %s", seed)
+
+    # ML prediction (batch callers pass the bitmap in)
+    if suitable is None:
+        with stage("suitability"):
+            suitable = find_suitable_meals(catalog, user_data)
+    if debug:
+        log.debug("📊 After ML filtering: %d of %d meals suitable", int(suitable.sum()), len(catalog))
+
+    # ✅ APPLY ONLY REGION FILTER - REMOVE VEG/NON-VEG FILTERING
+    with stage("region_filter"):
+        region_codes, filtered_count = apply_region_filter_only(catalog, suitable, user_data)
+
+    if filtered_count == 0:
+        return {
+            "meals": {meal_time: [] for meal_time in CALORIE_SPLITS.keys()},
+            "total_calories": 0,
+            "target_calories": user_calories,
+            "error": "No meals found matching your preferences",
+            "debug_info": {
+                "total_meals_loaded": len(catalog),
+                "after_ml_filter": int(suitable.sum()),
+                "user_region": user_data.get("region", ""),
+                "available_regions": catalog.region_vocab,
+                "diet_preference": "FILTER REMOVED FOR BETTER VARIETY"
+            }
+        }, 200
+
+    # ✅ BUILD RESPONSE BY MEAL TIME WITH ENHANCED SHUFFLING
+    meals_by_time = {}
+    total_actual_calories = 0
+
+    # Usage weights are tracked against the catalog version being served
+    meal_usage_history.bind(catalog)
+
+    # Shuffle history is kept per user (requests without a user_id share one history)
+    history_user = history_user_id(user_data)
+
+    # Generate unique request ID for this request
+    request_id = f"{random_seed}_{shuffle_count}_{time.time()}"
+
+    # Determine which meal times to process
+    meal_times_to_process = [meal_time_filter] if meal_time_filter else CALORIE_SPLITS.keys()
+
+    for meal_time in meal_times_to_process:
+        split = CALORIE_SPLITS[meal_time]
+        target_cals = int(user_calories * split)
+        with stage("selection"):
+            # Precomputed (region, meal_time) id segments AND suitability bitmap
+            pool = catalog.candidate_pool(region_codes, meal_time, suitable)
+            if debug:
+                log.debug("🎯 %s: target %d calories (%s%%), pool size %d", meal_time, target_cals, split * 100, len(pool))
+
+            if len(pool) == 0:
+                log.info("⚠️ No meals found for %s, skipping", meal_time)
+                meals_by_time[meal_time] = []
+                continue
+
+            # ✅ ENHANCED SELECTION LOGIC WITH VARIETY GUARANTEE
+            cache_key = f"{meal_time}_{user_data.get('region', 'all')}"
+
+            if shuffle_seed is not None:
+                # ✅ STATELESS SHUFFLE: page `shuffle_count` of a keyed permutation of the pool.
+                # No server-side history; any worker returns the same page for the same key.
+                page = int(shuffle_count or 0)
+                key = shuffle_key(shuffle_seed, user_data.get('region', 'all'), meal_time)
+                selected = shuffle_page(pool.accepted_index(), key, page, DISPLAY_COUNT)
+                if debug:
+                    log.debug("📄 Stateless shuffle page %d for %s: %s", page, meal_time, [str(catalog.names[i]) for i in selected])
+            else:
+                previous_names = selection_history.get(history_user, cache_key) if is_shuffle and seed is None else None
+
+                if previous_names is not None:
+                    log.debug("🔄 SHUFFLE MODE: Selecting different meals for %s (previous: %s)", meal_time, previous_names)
+                    selected = guaranteed_different_selection_v2(
+                        pool, target_cals, previous_names, 
+                        count=8, shuffle_count=shuffle_count, meal_time=meal_time, rng=rng, usage=usage,
+                        return_ids=True
+                    )
+                else:
+                    log.debug("🆕 INITIAL LOAD: Smart selection for %s", meal_time)
+                    selected = enhanced_smart_meal_selection(
+                        pool, target_cals, count=8, meal_time=meal_time, rng=rng, usage=usage,
+                        return_ids=True
+                    )
+
+                # ✅ STORE CURRENT SELECTION FOR FUTURE SHUFFLES
+                if len(selected) > 0:
+                    selected_names = [str(catalog.names[i]) for i in selected[:DISPLAY_COUNT]]
+                    selection_history.set(history_user, cache_key, selected_names)
+                    log.debug("📝 Stored selection for %s: %s", meal_time, selected_names)
+
+            # ✅ COUNT WHAT IS SHOWN: recently shown meals become less likely next time
+            shown_names = [str(catalog.names[i]) for i in selected[:DISPLAY_COUNT]]
+            meal_usage_history.record_names(shown_names)
+            if shown is not None:
+                shown[meal_time] = shown_names
+
+        # Process selected meals (slim rows straight from the catalog columns when asked for)
+        if fields is not None:
+            with stage("portioning"):
+                rows, first_calories = slim_meals(catalog, selected[:DISPLAY_COUNT], target_cals, goal, fields, compact)
+            meals_by_time[meal_time] = rows
+            total_actual_calories += first_calories
+            continue
+
+        with stage("portioning"):
+            scaled_meals = process_selected_meals(selected[:DISPLAY_COUNT], target_cals, goal, catalog)
+        meals_by_time[meal_time] = scaled_meals
+
+        if scaled_meals:
+            total_actual_calories += scaled_meals[0].get("calories", 0)
+
+    # ✅ FILL REMAINING MEAL TIMES IF ONLY ONE WAS PROCESSED
+    if meal_time_filter:
+        for meal_time in CALORIE_SPLITS.keys():
+            if meal_time not in meals_by_time:
+                meals_by_time[meal_time] = []
+
+    log.debug("🎯 Final total calories: %d (target: %d)", total_actual_calories, user_calories)
+
+    if fields is not None:
+        return slim_body(meals_by_time, fields, compact, {
+            "total_calories": total_actual_calories,
+            "target_calories": user_calories,
+            "shuffle_count": shuffle_count,
+            "shuffle_mode": "stateless" if shuffle_seed is not None else "history",
+            "seed": seed,
+        }), 200
+
+    return {
+        "meals": meals_by_time,
+        "total_calories": total_actual_calories,
+        "target_calories": user_calories,
+        "goal_calories": user_calories,
+        "shuffle_applied": is_shuffle,
+        "shuffle_count": shuffle_count,
+        "shuffle_mode": "stateless" if shuffle_seed is not None else "history",
+        "seed": seed,
+        "request_id": request_id,
+        "filtering_applied": "Region only - Diet preference filter removed for variety",
+        "calorie_breakdown": {
+            meal_time: int(user_calories * split) 
+            for meal_time, split in CALORIE_SPLITS.items()
+        },
+        "message": f"Meals {'shuffled' if is_shuffle else 'loaded'} successfully"
+    }, 200
+
+
+def recommend_meals_cached(user_data, catalog):
+    """
+    recommend_meals behind the response cache and single flight: first loads with
+    the same normalized profile share one computed response, whether it is cached
+    or still being computed for a concurrent request. A shared response still
+    records what this user was shown (shuffle history and usage), exactly as
+    computing it would have.
+    """
+    if not (response_cache.enabled or inflight.enabled):
+        return recommend_meals(user_data, catalog)
+    key, canonical = canonical_request(user_data, catalog, registry.version(RESPONSE_CACHE_MODEL))
+    if key is None:
+        return recommend_meals(user_data, catalog)
+
+    if response_cache.enabled:
+        cached = response_cache.get(key)
+        if cached is not None:
+            body, shown = cached
+            return _shared_response(user_data, body, shown), 200
+
+    (body, status, shown), shared = inflight.do(key, lambda: _compute_first_load(key, canonical, catalog))
+    if shared:
+        return _shared_response(user_data, body, shown), status
+    return _own_targets(user_data, body), status
+
+
+def _compute_first_load(key, canonical, catalog):
+    """(body, status, shown) for a canonical first load; successful ones are cached"""
+    shown = {}
+    body, status = recommend_meals(canonical, catalog, shown=shown)
+    if status == 200 and "error" not in body and response_cache.enabled:
+        response_cache.set(key, (body, shown))
+    return body, status, shown
+
+
+def _shared_response(user_data, body, shown):
+    """A response computed for someone else, replayed into this user's history"""
+    history_user = history_user_id(user_data)
+    for meal_time, names in shown.items():
+        if names:
+            selection_history.set(history_user, f"{meal_time}_{user_data.get('region', 'all')}", names)
+        meal_usage_history.record_names(names)
+    if "request_id" in body:
+        body = {**body, "request_id": f"{user_data.get('random_seed', time.time())}_0_{time.time()}"}
+    return _own_targets(user_data, body)
+
+
+def _own_targets(user_data, body):
+    """A body computed at the bucketed calories, reporting the caller's own calorie targets"""
+    if "target_calories" not in body:
+        return body
+    calories = int(user_data.get("calories", 1800))
+    if body["target_calories"] == calories:
+        return body
+    body = {**body, "target_calories": calories}
+    if "goal_calories" in body:
+        body["goal_calories"] = calories
+    if "calorie_breakdown" in body:
+        body["calorie_breakdown"] = {
+            meal_time: int(calories * split)
+            for meal_time, split in CALORIE_SPLITS.items()
+        }
+    return body
+
+
+def recommend_meals_batch(profiles, catalog):
+    """
+    Recommendations for many profiles in one pass, each shaped like recommend_meals.
+
+    First loads with the same normalized profile are computed once, and take part
+    in the single flight: a profile a concurrent request is already computing
+    waits for that result, and profiles this batch computes are shared with
+    concurrent single requests.
+    """
+    version = registry.version(RESPONSE_CACHE_MODEL)
+    groups = {}  # key -> (canonical profile, indices of the profiles sharing it)
+    solo = []    # indices of profiles that are not first loads
+    for i, profile in enumerate(profiles):
+        key, canonical = canonical_request(profile, catalog, version)
+        if key is None:
+            solo.append(i)
+        elif key in groups:
+            groups[key][1].append(i)
+        else:
+            groups[key] = (canonical, [i])
+    inflight.count_coalesced(sum(len(indices) - 1 for _, indices in groups.values()), "batch")
+
+    leading, following = {}, {}
+    for key in groups:
+        flight, leader = inflight.begin(key) if inflight.enabled else (None, True)
+        (leading if leader else following)[key] = flight
+
+    work = [profiles[i] for i in solo] + [groups[key][0] for key in leading]
+    try:
+        outputs = _compute_batch(work, catalog)
+    except BaseException:
+        # Never leave followers waiting out their timeout on a failed batch
+        for key, flight in leading.items():
+            if flight is not None:
+                inflight.finish(key, flight, failed=True)
+        raise
+
+    results = [None] * len(profiles)
+    for i, (body, _, _) in zip(solo, outputs):
+        results[i] = body
+    for (key, flight), output in zip(leading.items(), outputs[len(solo):]):
+        if flight is not None:
+            inflight.finish(key, flight, output)
+        _assign_shared(results, profiles, groups[key][1], output, own=True)
+
+    waited = {key: inflight.wait(flight, source="batch") for key, flight in following.items()}
+    fallback = [key for key, output in waited.items() if output is None]
+    if fallback:
+        waited.update(zip(fallback, _compute_batch([groups[key][0] for key in fallback], catalog)))
+        for key in fallback:
+            _assign_shared(results, profiles, groups[key][1], waited[key], own=True)
+    for key, output in waited.items():
+        if key not in fallback:
+            _assign_shared(results, profiles, groups[key][1], output, own=False)
+    return results
+
+
+def _compute_batch(profiles, catalog):
+    """
+    (body, status, shown) per profile. Profiles the suitability matrix covers are
+    a lookup; all remaining ones are stacked into one feature matrix so the model
+    runs once for the whole batch, then selection and portioning run per profile.
+    """
+    if not profiles:
+        return []
+    with stage("suitability"):
+        suitable = [
+            catalog.suitability.lookup(profile) if catalog.suitability is not None else None
+            for profile in profiles
+        ]
+        uncovered = [i for i, mask in enumerate(suitable) if mask is None]
+        metrics.inc("cache_requests_total", len(profiles) - len(uncovered), cache="suitability_matrix", result="hit")
+        metrics.inc("cache_requests_total", len(uncovered), cache="suitability_matrix", result="miss")
+        if uncovered:
+            meal_features = catalog.meal_features
+            if meal_features is None:
+                meal_features = encode_meal_features(catalog)
+            predictions = predict_suitability_batch([profiles[i] for i in uncovered], meal_features)
+            for i, row in zip(uncovered, predictions):
+                suitable[i] = row == 1
+            metrics.inc("model_calls_total", kind="batch")
+            log.info("🤖 Batch model call: %d profiles x %d meals", len(uncovered), len(catalog))
+
+    outputs = []
+    for profile, mask in zip(profiles, suitable):
+        shown = {}
+        try:
+            body, status = recommend_meals(profile, catalog, suitable=mask, shown=shown)
+        except Exception as e:
+            body, status = {"error": str(e)}, 500
+        outputs.append((body, status, shown))
+    return outputs
+
+
+def _assign_shared(results, profiles, indices, output, own):
+    """Hand one computed output to every profile sharing its key (own: computed for indices[0])"""
+    body, _, shown = output
+    for n, i in enumerate(indices):
+        results[i] = _own_targets(profiles[i], body) if own and n == 0 else _shared_response(profiles[i], body, shown)
+
+
+def plan_options(user_data):
+    """
+    Validated /api/meal-plan inputs: calories, goal, top_k, tolerance, days,
+    no_repeat_days and macro_targets. Raises ValueError with a message for the
+    client when one of them is malformed.
+    """
+    options = {
+        "goal": user_data.get("goal", "maintain"),
+        "calories": _plan_number(user_data, "calories", 1800, int),
+        "top_k": max(1, min(_plan_number(user_data, "top_k", 3, int), MAX_PLANS)),
+        "days": max(1, min(_plan_number(user_data, "days", WEEK_DAYS, int), MAX_PLAN_DAYS)),
+        "no_repeat_days": max(1, _plan_number(user_data, "no_repeat_days", WEEK_DAYS, int)),
+        "tolerance": _plan_number(user_data, "tolerance", DEFAULT_TOLERANCE, float),
+    }
+    if options["tolerance"] < 0:
+        raise ValueError("'tolerance' must not be negative")
+
+    macro_targets = user_data.get("macro_targets")
+    if macro_targets is not None:
+        if not isinstance(macro_targets, dict):
+            raise ValueError("'macro_targets' must be an object of daily gram targets, e.g. {\"protein\": 120}")
+        for column in NUTRIENT_COLUMNS:
+            if macro_targets.get(column) is not None and _plan_number(macro_targets, column, None, float, "macro_targets.") < 0:
+                raise ValueError(f"'macro_targets.{column}' must not be negative")
+    options["macro_targets"] = macro_targets
+    return options
+
+
+def _plan_number(values, name, default, cast, prefix=""):
+    """values[name] (or default) as an int / finite float, else ValueError"""
+    value = values.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{prefix}{name}' must be a number, got {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"'{prefix}{name}' must be a finite number")
+    return number
+
+
+def _plan_inputs(user_data, catalog, options):
+    """
+    Everything a plan search needs, computed once per request: day targets and,
+    per slot, candidate ids, their nutrients and the slot's share of the targets.
+    Returns (slots, slot_ids, slot_nutrients, slot_targets, targets, missing_slots).
+    """
+    targets = day_targets(options["calories"], options["goal"], options["macro_targets"])
+
+    suitable = find_suitable_meals(catalog, user_data)
+    region_codes, _ = apply_region_filter_only(catalog, suitable, user_data)
+
+    slots = list(CALORIE_SPLITS.keys())
+    slot_ids = [np.sort(catalog.candidate_pool(region_codes, slot, suitable).ids()) for slot in slots]
+    missing = [slot for slot, ids in zip(slots, slot_ids) if len(ids) == 0]
+    slot_nutrients = [nutrient_matrix(catalog, ids) for ids in slot_ids]
+    slot_targets = np.array([CALORIE_SPLITS[slot] for slot in slots])[:, None] * targets
+    return slots, slot_ids, slot_nutrients, slot_targets, targets, missing
+
+
+def _plan_body(catalog, slots, ids, totals, score, targets, tolerance, goal):
+    """One plan as JSON: meals per slot plus totals and deviation from the targets"""
+    errors = deviation(totals, targets)
+    meals = {}
+    table = catalog.portion_table
+    for slot, meal_id, meal in zip(slots, ids, catalog.get_records(ids)):
+        meal_copy = meal.copy()
+        if table is not None:
+            meal_copy["portion"] = table.portion(meal_id, meal_copy.get("name", ""), int(meal_copy.get("calories", 0)))
+            meal_copy["explanation"] = table.explanation(meal_id, goal)
+        else:
+            meal_copy["portion"] = portion_calculator.calculate_portion(meal_copy.get("name", ""), int(meal_copy.get("calories", 0)))
+            meal_copy["explanation"] = generate_explanation(meal_copy, goal)
+        meals[slot] = meal_copy
+    return {
+        "meals": meals,
+        "totals": {column: round(float(value), 1) for column, value in zip(NUTRIENT_COLUMNS, totals)},
+        "deviation": {column: round(float(value), 4) for column, value in zip(NUTRIENT_COLUMNS, errors)},
+        "within_tolerance": bool(np.all(np.abs(errors) <= tolerance)),
+        "score": round(score, 6),
+    }
+
+
+def recommend_day_plans(user_data, catalog, options=None):
+    """
+    Build the /api/meal-plan response: the top-K plans with one meal per slot whose
+    total calories, protein, carbs and fats land closest to the day's targets.
+    `options` come from plan_options (parsed here if not given). Returns (body, status).
+    """
+    options = options or plan_options(user_data)
+    goal, top_k, tolerance = options["goal"], options["top_k"], options["tolerance"]
+
+    slots, slot_ids, slot_nutrients, slot_targets, targets, missing = _plan_inputs(user_data, catalog, options)
+    if missing:
+        return {"success": False, "plans": [], "error": f"No meals found for {', '.join(missing)}"}, 200
+
+    started = time.perf_counter()
+    plans = optimize_plans(slot_ids, slot_nutrients, slot_targets, top_k=top_k)
+    log.debug("🧮 Plan search over %s candidates: %.1f ms", [len(ids) for ids in slot_ids], (time.perf_counter() - started) * 1000)
+
+    user_calories = options["calories"]
+    return {
+        "success": True,
+        "targets": {column: round(float(value), 1) for column, value in zip(NUTRIENT_COLUMNS, targets)},
+        "calorie_breakdown": {slot: int(user_calories * split) for slot, split in CALORIE_SPLITS.items()},
+        "tolerance": tolerance,
+        "plans": [_plan_body(catalog, slots, ids, totals, score, targets, tolerance, goal) for ids, totals, score in plans],
+    }, 200
+
+
+def recommend_week_plan(user_data, catalog, options=None):
+    """
+    Build the /api/meal-plan/week response: one plan per day for `days` days (default 7).
+
+    Suitability, region filtering, candidate pools and nutrient matrices are computed
+    once and shared by every day. A meal is not repeated within `no_repeat_days`
+    days; when a slot runs out of fresh meals, the least recently used ones are
+    allowed again. `options` come from plan_options. Returns (body, status).
+    """
+    options = options or plan_options(user_data)
+    goal, days, tolerance = options["goal"], options["days"], options["tolerance"]
+    no_repeat_days = options["no_repeat_days"]
+
+    slots, slot_ids, slot_nutrients, slot_targets, targets, missing = _plan_inputs(user_data, catalog, options)
+    if missing:
+        return {"success": False, "days": [], "error": f"No meals found for {', '.join(missing)}"}, 200
+
+    started = time.perf_counter()
+    # Day each candidate was last planned on, aligned with (sorted) slot_ids
+    last_used = [np.full(len(ids), -no_repeat_days, dtype=np.int64) for ids in slot_ids]
+    week = []
+    week_totals = np.zeros(len(NUTRIENT_COLUMNS))
+    for day in range(days):
+        allowed = []
+        for used in last_used:
+            fresh = day - used >= no_repeat_days
+            allowed.append(fresh if fresh.any() else used == used.min())
+
+        plans = optimize_plans(
+            [ids[mask] for ids, mask in zip(slot_ids, allowed)],
+            [nutrients[mask] for nutrients, mask in zip(slot_nutrients, allowed)],
+            slot_targets, top_k=1
+        )
+        ids, totals, score = plans[0]
+        for s, meal_id in enumerate(ids):
+            last_used[s][np.searchsorted(slot_ids[s], meal_id)] = day
+
+        body = _plan_body(catalog, slots, ids, totals, score, targets, tolerance, goal)
+        body["day"] = day + 1
+        week.append(body)
+        week_totals += totals
+    log.debug("🧮 Week plan (%d days x %d slots): %.1f ms", days, len(slots), (time.perf_counter() - started) * 1000)
+
+    user_calories = options["calories"]
+    return {
+        "success": True,
+        "targets": {column: round(float(value), 1) for column, value in zip(NUTRIENT_COLUMNS, targets)},
+        "calorie_breakdown": {slot: int(user_calories * split) for slot, split in CALORIE_SPLITS.items()},
+        "tolerance": tolerance,
+        "no_repeat_days": no_repeat_days,
+        "days": week,
+        "week_totals": {column: round(float(value), 1) for column, value in zip(NUTRIENT_COLUMNS, week_totals)},
+    }, 200
+
+
+def apply_region_filter_only(catalog, suitable, user_data):
+    """
+    ✅ APPLY ONLY REGION FILTER - REMOVE VEG/NON-VEG FILTERING FOR BETTER VARIETY
+
+    Works on catalog region codes instead of the meal frame. Returns the region
+    codes to draw from (None = all regions) and how many suitable meals they hold.
+    """
+    user_region = normalize_region(user_data.get("region", ""))
+    
+    log.debug("🎯 User region filter: '%s' (diet preference filter removed for better meal variety)", user_region)
+
+    def suitable_count(region_codes):
+        if region_codes is None:
+            return int(suitable.sum())
+        return sum(int(suitable[catalog.region_ids[code]].sum()) for code in region_codes)
+
+    # Apply region filter only
+    region_codes, partial_codes = catalog.match_region_codes(user_region)
+
+    if region_codes is not None and suitable_count(region_codes) == 0:
+        # Try partial matching as fallback
+        partial_count = suitable_count(partial_codes)
+        if partial_count > 0:
+            region_codes = partial_codes
+            log.debug("✅ Used partial matching for region: %d meals found", partial_count)
+        else:
+            log.info("⚠️ No meals found for region '%s', using all regions", user_region)
+            region_codes = None
+
+    filtered_count = suitable_count(region_codes)
+    log.debug("📊 Final filtered meals count: %d (NO DIET RESTRICTIONS)", filtered_count)
+    return region_codes, filtered_count
+
+
+def guaranteed_different_selection_v2(pool, target_calories, previous_names, count=4, shuffle_count=0, meal_time="",
+                                      rng=None, usage=None, return_ids=False):
+    """
+    ✅ ENHANCED VERSION - GUARANTEED to return different meals with better variety
+
+    `pool` is a CandidatePool; returns meal dicts (catalog ids with return_ids).
+    Previous picks are an exclusion set and all randomness comes from `rng` (a
+    fresh random.Random if not given). With a MealUsageTracker, recently shown
+    meals are drawn less often.
+    """
+    rng = rng or random.Random()
+    debug = debug_enabled(log)
+    if debug:
+        log.debug("🔄 GUARANTEED DIFFERENT SELECTION V2 for %s: pool %d meals, previous %s, shuffle count %s",
+                  meal_time, len(pool), previous_names, shuffle_count)
+    
+    if len(pool) == 0:
+        return []
+    
+    # ✅ STRATEGY 1: GET COMPLETELY DIFFERENT MEALS
+    different_meals = pool.without_names(previous_names)
+    
+    if debug:
+        log.debug("🎯 Found %d meals different from previous selection", len(different_meals))
+    
+    # ✅ STRATEGY 2: IF WE HAVE ENOUGH DIFFERENT MEALS, USE ADVANCED SELECTION
+    if len(different_meals) >= count:
+        # Select with variety algorithm: k picks without replacement in one pass
+        selected = select_with_variety(different_meals, count, rng, usage)
+        if debug:
+            log.debug("✅ Selected completely different meals: %s", [str(pool.snapshot.names[i]) for i in selected])
+        return selected if return_ids else pool.records(selected)
+    
+    # ✅ STRATEGY 3: MIX DIFFERENT + LESS RECENT MEALS
+    selected = [int(i) for i in different_meals.ids()]  # Start with all different meals
+    
+    # Fill remaining slots from the previous selection, in random order
+    remaining_count = count - len(selected)
+    
+    if remaining_count > 0:
+        available_for_repeat = different_meals.excluded_ids()
+        rng.shuffle(available_for_repeat)
+        selected.extend(available_for_repeat[:remaining_count])
+    
+    # ✅ FINAL SHUFFLE (as select_with_variety would): no fixed id order on small pools
+    selected = selected[:count]
+    rng.shuffle(selected)
+    
+    if debug:
+        final_names = [str(pool.snapshot.names[i]) for i in selected]
+        overlap = set(final_names) & set(previous_names)
+        log.debug("✅ Final V2 selection: %s, overlap with previous: %s (%d/%d)",
+                  final_names, list(overlap), len(overlap), len(previous_names))
+    
+    return selected if return_ids else pool.records(selected)
+
+
+def enhanced_smart_meal_selection(pool, target_calories, count=4, meal_time="", rng=None, usage=None, return_ids=False):
+    """
+    ✅ ENHANCED SMART SELECTION WITH IMPROVED VARIETY AND RANDOMIZATION
+
+    `pool` is a CandidatePool; returns meal dicts (catalog ids with return_ids)
+    drawn with `rng` (weighted by `usage` if given).
+    """
+    rng = rng or random.Random()
+    if len(pool) == 0:
+        return []
+    
+    debug = debug_enabled(log)
+    if debug:
+        log.debug("🎲 Enhanced smart selection for %s: pool %d meals, target %s cal", meal_time, len(pool), target_calories)
+    
+    # Use variety selection algorithm
+    selected = select_with_variety(pool, count, rng, usage)
+    
+    if debug:
+        log.debug("✅ Enhanced smart selected meals for %s: %s", meal_time, [str(pool.snapshot.names[i]) for i in selected])
+    
+    return selected if return_ids else pool.records(selected)
+
+
+def select_with_variety(pool, count, rng, usage=None):
+    """
+    ✅ SELECT MEALS WITH MAXIMUM VARIETY - AVOID SIMILAR DISHES
+
+    Returns up to `count` ids from a CandidatePool. Each variety keyword picks one
+    random meal through the catalog's inverted keyword index, then the remaining
+    slots are filled from the rest of the pool. Draws are uniform, or inversely
+    weighted to recent usage when a MealUsageTracker is given.
+    """
+    if len(pool) <= count:
+        selected = [int(i) for i in pool.ids()]
+        rng.shuffle(selected)
+        return selected
+    
+    weight = usage.weights_for(pool.snapshot) if usage is not None else None
+    selected = []
+    taken = set()
+    
+    # ✅ PHASE 1: SELECT MEALS WITH DIFFERENT KEYWORDS
+    for k in range(len(VARIETY_KEYWORDS)):
+        if len(selected) >= count:
+            break
+        meal_id = pool.sample(rng, pool.keyword_segments(k), taken, weight)
+        if meal_id is not None:
+            selected.append(meal_id)
+            taken.add(meal_id)
+    
+    # ✅ PHASE 2: FILL REMAINING SLOTS WITH RANDOM SELECTION
+    while len(selected) < count:
+        meal_id = usage.sample(pool, rng, taken) if usage is not None else pool.sample(rng, taken=taken)
+        if meal_id is None:
+            break
+        selected.append(meal_id)
+        taken.add(meal_id)
+    
+    # ✅ FINAL SHUFFLE
+    rng.shuffle(selected)
+    
+    return selected[:count]
+
+
+def process_selected_meals(selected, target_cals, goal, catalog=None):
+    """
+    Process selected meals with proper portion calculation
+
+    `selected` holds meal records, or catalog row ids when a catalog snapshot is
+    given. Ids are then looked up in its precomputed PortionTable (targets
+    quantized to PORTION_BUCKET_KCAL), and each meal is built once by id.
+    """
+    scaled_meals = []
+    if catalog is not None:
+        meal_ids = [int(i) for i in selected]
+        selected = catalog.meal_copies(meal_ids)
+        table = catalog.portion_table
+    else:
+        meal_ids = [None] * len(selected)
+        table = None
+    
+    for i, (meal, meal_id) in enumerate(zip(selected, meal_ids)):
+        try:
+            original_calories = meal.get("calories", 100)
+            meal_name = meal.get("name", "Unknown meal")
+            
+            # Smart portion calculation
+            if target_cals <= 200:
+                adjusted_target = min(target_cals, original_calories * 1.2)
+            elif target_cals >= 400:
+                adjusted_target = min(target_cals, original_calories * 1.5)
+            else:
+                adjusted_target = target_cals
+            
+            if table is not None:
+                smart_portion = table.portion(meal_id, meal_name, adjusted_target)
+            else:
+                smart_portion = portion_calculator.calculate_portion(meal_name, adjusted_target)
+            
+            portion_multiplier = adjusted_target / original_calories if original_calories > 0 else 1
+            portion_multiplier = max(0.3, min(3.0, portion_multiplier))
+            
+            scaled_calories = int(adjusted_target)
+            
+            meal_copy = meal if meal_id is not None else meal.copy()
+            meal_copy["portion"] = smart_portion
+            meal_copy["calories"] = scaled_calories
+            meal_copy["original_calories"] = original_calories
+            meal_copy["portion_multiplier"] = portion_multiplier
+            if table is not None:
+                meal_copy["explanation"] = table.explanation(meal_id, goal)
+            else:
+                meal_copy["explanation"] = generate_explanation(meal_copy, goal)
+            meal_copy["meal_index"] = i
+            meal_copy["region_source"] = meal.get("original_region", meal.get("region", "Unknown"))
+            meal_copy["timestamp"] = time.time()
+            meal_copy["variety_optimized"] = True  # Mark as variety optimized
+            
+            # Scale nutrients
+            meal_copy["protein"] = round(meal.get("protein", 0) * portion_multiplier, 1)
+            meal_copy["carbs"] = round(meal.get("carbs", 0) * portion_multiplier, 1)
+            meal_copy["fats"] = round(meal.get("fats", 0) * portion_multiplier, 1)
+            
+            scaled_meals.append(meal_copy)
+            
+            log.debug("  📋 %d. %s: %s → %d cal (%s)", i + 1, meal_name, original_calories, scaled_calories, smart_portion)
+            
+        except Exception as e:
+            log.exception("❌ Error processing meal %d: %s", i, e)
+            continue
+
+    return scaled_meals
+
+
+def generate_explanation(meal, goal):
+    """Generate explanation for meal selection"""
+    return EXPLANATION_TEMPLATES[explanation_code(meal.get("name", ""))].format(goal=goal)
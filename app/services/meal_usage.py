@@ -0,0 +1,230 @@
+# app/services/meal_usage.py - DECAYED MEAL USAGE AND USAGE-WEIGHTED SAMPLING
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Usage halves every hour; a meal shown now is ~1/(1 + 1) as likely to come up again
+DEFAULT_HALF_LIFE = 60 * 60
+
+# Decayed weights are brought up to date at most this often per meal
+DEFAULT_REFRESH_INTERVAL = 60
+
+# Usage below this is treated as "never shown" (weight back to exactly 1)
+_USAGE_FLOOR = 0.01
+
+# Weighted probes before a pool sample falls back to filtering the candidates explicitly
+MAX_WEIGHTED_PROBES = 16
+
+
+class FenwickTree:
+    """Prefix sums over float weights: O(log n) point update and O(log n) weighted search"""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        self.n = len(weights)
+        # Vectorised O(n) build: node i covers (i - lowbit(i), i]
+        cumulative = np.concatenate(([0.0], np.cumsum(weights)))
+        index = np.arange(1, self.n + 1)
+        tree = np.zeros(self.n + 1)
+        tree[1:] = cumulative[index] - cumulative[index - (index & -index)]
+        self._tree = tree.tolist()  # plain floats: cheaper to index from Python
+        self._step = 1 << max(0, self.n.bit_length() - 1) if self.n else 0
+
+    def add(self, i, delta):
+        i += 1
+        tree = self._tree
+        while i <= self.n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of weights [0, i)"""
+        total = 0.0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    @property
+    def total(self):
+        return self.prefix(self.n)
+
+    def find(self, u):
+        """Index i with prefix(i) <= u < prefix(i + 1)"""
+        position, step, tree = 0, self._step, self._tree
+        while step:
+            nxt = position + step
+            if nxt <= self.n and tree[nxt] <= u:
+                position = nxt
+                u -= tree[nxt]
+            step >>= 1
+        return min(position, self.n - 1)
+
+
+class MealUsageTracker:
+    """
+    How often each meal was shown recently, with exponential time decay, and
+    sampling inversely to it: weight = 1 / (1 + decayed usage).
+
+    There is one Fenwick tree per (region, meal_time) pool of the bound catalog,
+    so a weighted draw is O(log n). Only meals that were actually shown have a
+    weight other than 1; they sit in a refresh queue and have their decayed
+    weight rewritten lazily (O(log n) each), so nothing ever rescans the catalog.
+    """
+
+    def __init__(self, half_life=DEFAULT_HALF_LIFE, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.half_life = half_life
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._usage = {}          # id -> (usage, as of time)
+        self._queue = deque()     # (time, id) in time order; stale entries are skipped
+        self._trees = {}
+        self._weights = None
+        self._positions = None
+
+    def bind(self, snapshot):
+        """Track usage against this catalog snapshot (usage carries over by meal name)"""
+        if snapshot is self._snapshot:
+            return
+        with self._lock:
+            if snapshot is self._snapshot:
+                return
+            previous = self._snapshot
+            carried = {}
+            if previous is not None:
+                for i, (usage, stamp) in self._usage.items():
+                    carried[previous.names[i]] = max(carried.get(previous.names[i], 0.0), self._decay(usage, stamp))
+
+            self._snapshot = snapshot
+            self._weights = np.ones(len(snapshot), dtype=np.float64)
+            self._positions = np.zeros(len(snapshot), dtype=np.int64)
+            for ids in snapshot.pool_ids.values():
+                self._positions[ids] = np.arange(len(ids))
+            self._trees = {key: FenwickTree(np.ones(len(ids))) for key, ids in snapshot.pool_ids.items()}
+            self._usage = {}
+            self._queue = deque()
+
+            now = time.monotonic()
+            name_ids = snapshot.name_ids if carried else {}
+            for name, usage in carried.items():
+                for i in name_ids.get(name, ()):
+                    self._set_usage(i, usage, now)
+
+    def _decay(self, usage, stamp, now=None):
+        now = time.monotonic() if now is None else now
+        return usage * 0.5 ** ((now - stamp) / self.half_life)
+
+    def _pool_key(self, i):
+        snapshot = self._snapshot
+        return int(snapshot.region_codes[i]), int(snapshot.meal_time_codes[i])
+
+    def _set_weight(self, i, weight):
+        delta = weight - self._weights[i]
+        if delta:
+            self._weights[i] = weight
+            self._trees[self._pool_key(i)].add(int(self._positions[i]), delta)
+
+    def _set_usage(self, i, usage, now):
+        if usage < _USAGE_FLOOR:
+            self._usage.pop(i, None)
+            self._set_weight(i, 1.0)
+            return
+        self._usage[i] = (usage, now)
+        self._set_weight(i, 1.0 / (1.0 + usage))
+        self._queue.append((now, i))
+
+    def _refresh(self, now):
+        """Re-decay meals whose weight is older than refresh_interval"""
+        queue = self._queue
+        while queue and queue[0][0] <= now - self.refresh_interval:
+            stamp, i = queue.popleft()
+            entry = self._usage.get(i)
+            if entry is None or entry[1] != stamp:
+                continue  # superseded by a newer record()
+            self._set_usage(i, self._decay(entry[0], stamp, now), now)
+
+    def record(self, ids):
+        """Count one showing of each meal id"""
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            for i in ids:
+                usage, stamp = self._usage.get(i, (0.0, now))
+                self._set_usage(i, self._decay(usage, stamp, now) + 1.0, now)
+
+    def record_names(self, names):
+        if self._snapshot is None:
+            return
+        name_ids = self._snapshot.name_ids
+        self.record([i for name in names for i in name_ids.get(name, ())])
+
+    def weight(self, i):
+        return float(self._weights[i])
+
+    def weights_for(self, snapshot):
+        """weight(id) for ids of `snapshot`, or None when usage is tracked against another snapshot"""
+        with self._lock:
+            if snapshot is not self._snapshot:
+                return None
+            weights = self._weights
+        return lambda i: float(weights[i])
+
+    def sample(self, pool, rng, taken=()):
+        """
+        One id from a CandidatePool with probability proportional to its weight,
+        or None. Draws walk the pool's Fenwick trees; ids the pool rejects
+        (unsuitable, excluded, already taken) are re-drawn, then filtered explicitly.
+
+        A pool from another snapshot (a request still serving the catalog that a
+        hot reload replaced) is sampled uniformly: the trees index the bound one.
+        """
+        with self._lock:
+            if pool.snapshot is self._snapshot:
+                return self._sample_bound(pool, rng, taken)
+        return pool.sample(rng, taken=taken)
+
+    def _sample_bound(self, pool, rng, taken):
+        """sample() for a pool of the bound snapshot; caller holds the lock"""
+        self._refresh(time.monotonic())
+        trees = [self._trees[key] for key in pool.keys]
+        totals = [tree.total for tree in trees]
+        grand_total = sum(totals)
+        if grand_total <= 0:
+            return None
+
+        for _ in range(MAX_WEIGHTED_PROBES):
+            u = rng.random() * grand_total
+            s = 0
+            while s < len(totals) - 1 and u >= totals[s]:
+                u -= totals[s]
+                s += 1
+            i = int(pool.segments[s][trees[s].find(u)])
+            if pool.accepts(i) and i not in taken:
+                return i
+
+        candidates = [int(i) for i in pool.ids() if i not in taken]
+        if not candidates:
+            return None
+        return rng.choices(candidates, weights=self._weights[candidates].tolist())[0]
+
+    def top(self, limit=20):
+        """Most used meals right now: [(name, decayed usage)]"""
+        with self._lock:
+            now = time.monotonic()
+            usage = sorted(((self._decay(u, stamp, now), i) for i, (u, stamp) in self._usage.items()), reverse=True)
+            return [(str(self._snapshot.names[i]), round(u, 3)) for u, i in usage[:limit]]
+
+    def clear(self):
+        with self._lock:
+            for i in list(self._usage):
+                self._set_weight(i, 1.0)
+            self._usage.clear()
+            self._queue.clear()
+
+    def __len__(self):
+        return len(self._usage)
+
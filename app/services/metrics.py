@@ -0,0 +1,242 @@
+# app/services/metrics.py - STAGE TIMERS, HDR-STYLE LATENCY HISTOGRAMS AND PROMETHEUS TEXT
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram resolution: 2**SUB_BUCKET_BITS sub-buckets per power of two (~3% relative error)
+SUB_BUCKET_BITS = 6
+
+# Quantiles reported for every histogram
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Stage durations of the request being served (None outside a timed request)
+_current = contextvars.ContextVar("calorie_mate_timings", default=None)
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram over integer microseconds.
+
+    Values below 2**SUB_BUCKET_BITS get a bucket each; above that every power
+    of two is split into 2**(SUB_BUCKET_BITS - 1) equal sub-buckets, so any
+    recorded value is known to within ~3% whatever its magnitude, in a few
+    hundred counters and with O(1) recording.
+    """
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < (1 << SUB_BUCKET_BITS):
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        half = 1 << (SUB_BUCKET_BITS - 1)
+        return half * (shift + 1) + (value >> shift) - half
+
+    @staticmethod
+    def _upper(index):
+        """Largest value that falls in bucket `index`"""
+        if index < (1 << SUB_BUCKET_BITS):
+            return index
+        half = 1 << (SUB_BUCKET_BITS - 1)
+        shift = index // half - 1
+        return (((index % half) + half + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the q-quantile"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._upper(index), self.max) / 1e6
+        return self.max / 1e6
+
+
+class Metrics:
+    """Counters, latency histograms and gauges, rendered in Prometheus text format"""
+
+    def __init__(self, prefix="calorie_mate"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}     # name -> {labels: value}
+        self._histograms = {}   # name -> {labels: LatencyHistogram}
+        self._gauges = {}       # name -> fn() -> {labels: value}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def gauge(self, name, fn, help_text=None):
+        """Register fn() -> {labels dict as tuple of pairs: value}, evaluated at scrape time"""
+        self._gauges[name] = fn
+        if help_text:
+            self.describe(name, help_text)
+
+    def counter_series(self, name):
+        """Copy of one counter: {labels tuple: value}"""
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def counter_value(self, name, **labels):
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def histogram(self, name, **labels):
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(key, extra=()):
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self):
+        """Everything in Prometheus text exposition format (0.0.4)"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (h.count, h.total, [h.quantile(q) for q in QUANTILES]) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        for name, series in sorted(counters.items()):
+            full = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{full}{self._labels(key)} {value}")
+
+        for name, series in sorted(histograms.items()):
+            full = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} summary")
+            for key, (count, total, quantiles) in sorted(series.items()):
+                for q, value in zip(QUANTILES, quantiles):
+                    lines.append(f"{full}{self._labels(key, [('quantile', q)])} {value:.6f}")
+                lines.append(f"{full}_sum{self._labels(key)} {total:.6f}")
+                lines.append(f"{full}_count{self._labels(key)} {count}")
+
+        for name, fn in sorted(self._gauges.items()):
+            full = f"{self.prefix}_{name}"
+            try:
+                series = fn()
+            except Exception:
+                continue
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} gauge")
+            for key, value in sorted(series.items()):
+                lines.append(f"{full}{self._labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+metrics.describe("requests_total", "HTTP requests by endpoint and status")
+metrics.describe("request_seconds", "Request latency by endpoint")
+metrics.describe("stage_seconds", "Time per request spent in each pipeline stage")
+metrics.describe("model_calls_total", "Live model predictions (suitability matrix misses and batch calls)")
+metrics.describe("cache_requests_total", "Cache lookups by cache and result")
+
+
+def begin_timings():
+    """Start collecting stage durations for the current request"""
+    timings = {}
+    _current.set(timings)
+    return timings
+
+
+def end_timings():
+    """Stop collecting; every stage total goes into its histogram. Returns {stage: seconds}."""
+    timings = _current.get()
+    _current.set(None)
+    if not timings:
+        return {}
+    for name, seconds in timings.items():
+        metrics.observe("stage_seconds", seconds, stage=name)
+    return timings
+
+
+@contextmanager
+def stage(name):
+    """Time a block as pipeline stage `name` (repeated stages add up within a request)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def server_timing(timings, total=None):
+    """Server-Timing header value, durations in milliseconds"""
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def record_cache(cache, hit):
+    metrics.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratios():
+    """hits / lookups for every cache counted through record_cache"""
+    series = metrics.counter_series("cache_requests_total")
+    totals = {}
+    for key, value in series.items():
+        labels = dict(key)
+        hits, lookups = totals.get(labels["cache"], (0, 0))
+        totals[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), lookups + value)
+    return {(("cache", cache),): round(hits / lookups, 6) for cache, (hits, lookups) in totals.items() if lookups}
+
+
+metrics.gauge("cache_hit_ratio", cache_hit_ratios, "Share of cache lookups that hit")
@@ -0,0 +1,151 @@
+# app/services/model_registry.py - ONE LAZY, SHARED LOADER FOR ALL MODEL ARTIFACTS
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from app.logging_config import get_logger
+from app.services.tree_kernel import FlatTree, kernel_path_for
+
+log = get_logger("models")
+
+# Absolute path to app/models (independent of the working directory), overridable with MODELS_DIR
+MODELS_DIR = os.environ.get(
+    "MODELS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+)
+
+
+def _estimate_nbytes(obj, seen=None, depth=0):
+    """Rough resident size of a model: NumPy buffers reachable from it (sklearn trees included)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or depth > 6:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_estimate_nbytes(v, seen, depth + 1) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_estimate_nbytes(v, seen, depth + 1) for v in obj)
+    if hasattr(obj, '__getstate__') and type(obj).__name__ == 'Tree':
+        # sklearn's Cython Tree only exposes its arrays through pickling state
+        return _estimate_nbytes(obj.__getstate__(), seen, depth + 1)
+    if hasattr(obj, '__dict__'):
+        return sum(_estimate_nbytes(v, seen, depth + 1) for v in vars(obj).values())
+    return 0
+
+
+class ModelArtifact:
+    def __init__(self, name, path, mmap_mode=None):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.kernel_path = kernel_path_for(self.path)
+        self.mmap_mode = mmap_mode
+        self.value = None
+        self.loaded = False
+        self.source = None
+        self.load_seconds = None
+        self.memory_bytes = None
+        self.loaded_at = None
+        self.version = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        started = time.perf_counter()
+        try:
+            if os.path.exists(self.kernel_path):
+                value, source = FlatTree.load(self.kernel_path), self.kernel_path
+            else:
+                value, source = joblib.load(self.path, mmap_mode=self.mmap_mode), self.path
+        except Exception as e:
+            # Remembered, so a missing file is not re-read (and re-logged) on every request
+            self.error = e
+            log.error("❌ Could not load model '%s' from %s: %s", self.name, self.path, e)
+            raise
+
+        self.error = None
+        self.value = value
+        self.source = source
+        self.load_seconds = time.perf_counter() - started
+        self.memory_bytes = _estimate_nbytes(value)
+        self.loaded_at = time.time()
+        self.loaded = True
+        log.info("✅ Loaded model '%s' from %s in %.1f ms (~%.0f KiB)",
+                 self.name, source, self.load_seconds * 1000, self.memory_bytes / 1024)
+
+
+class ModelRegistry:
+    """
+    Loads each model artifact at most once per process.
+
+    Artifacts are registered by name with absolute paths and loaded on first
+    get() (or up front with warm_up()). An exported flat kernel next to the
+    pickle is preferred. A failed load is cached too: get() re-raises it until
+    reload(). reload() drops the cached object, bumps its version and notifies
+    listeners so derived data (e.g. the suitability matrix) is rebuilt.
+    """
+
+    def __init__(self):
+        self._artifacts = {}
+        self._listeners = []
+
+    def register(self, name, path, mmap_mode=None):
+        self._artifacts[name] = ModelArtifact(name, path, mmap_mode)
+
+    def get(self, name):
+        artifact = self._artifacts[name]
+        if not artifact.loaded:
+            with artifact.lock:
+                if artifact.error is not None:
+                    raise artifact.error.with_traceback(None)
+                if not artifact.loaded:
+                    artifact.load()
+        return artifact.value
+
+    def version(self, name):
+        return self._artifacts[name].version
+
+    def warm_up(self, names=None):
+        """Load artifacts now so the first request doesn't pay for it"""
+        for name in names or list(self._artifacts):
+            self.get(name)
+
+    def reload(self, name):
+        artifact = self._artifacts[name]
+        with artifact.lock:
+            artifact.load()
+            artifact.version += 1
+        for listener in self._listeners:
+            listener(name)
+
+    def on_reload(self, listener):
+        self._listeners.append(listener)
+
+    def stats(self):
+        return {
+            name: {
+                "path": artifact.path,
+                "source": artifact.source,
+                "loaded": artifact.loaded,
+                "error": str(artifact.error) if artifact.error is not None else None,
+                "version": artifact.version,
+                "mmap_mode": artifact.mmap_mode,
+                "load_seconds": artifact.load_seconds,
+                "memory_bytes": artifact.memory_bytes,
+                "loaded_at": artifact.loaded_at,
+            }
+            for name, artifact in self._artifacts.items()
+        }
+
+
+registry = ModelRegistry()
+
+# e.g. MODEL_MMAP_MODE=r to memory-map large arrays in uncompressed joblib dumps
+_mmap_mode = os.environ.get("MODEL_MMAP_MODE") or None
+registry.register("meal_recommender", os.path.join(MODELS_DIR, "meal_recommender.pkl"), mmap_mode=_mmap_mode)
+registry.register("decision_tree_meal_model", os.path.join(MODELS_DIR, "decision_tree_meal_model.pkl"), mmap_mode=_mmap_mode)
@@ -1,7 +1,7 @@
-import joblib
-import os
+from app.services.model_registry import registry
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'decision_tree_meal_model.pkl')
+MODEL_NAME = "decision_tree_meal_model"
 
 def load_model():
-    return joblib.load(MODEL_PATH)
+    # Loaded once per process by the shared registry (flat kernel preferred when exported)
+    return registry.get(MODEL_NAME)
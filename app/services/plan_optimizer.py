@@ -0,0 +1,91 @@
+# app/services/plan_optimizer.py - CALORIE / MACRO TARGETED DAILY PLAN SEARCH
+import numpy as np
+
+from app.services.meal_catalog import NUTRIENT_COLUMNS
+
+# Share of daily calories from each macro, by goal
+MACRO_SPLITS = {
+    "lose": {"protein": 0.30, "carbs": 0.40, "fats": 0.30},
+    "maintain": {"protein": 0.20, "carbs": 0.50, "fats": 0.30},
+    "gain": {"protein": 0.25, "carbs": 0.50, "fats": 0.25},
+}
+KCAL_PER_GRAM = {"protein": 4.0, "carbs": 4.0, "fats": 9.0}
+
+# Relative importance of each nutrient's error (order of NUTRIENT_COLUMNS)
+SCORE_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_BEAM_WIDTH = 64
+DEFAULT_PER_SLOT = 256
+
+
+def day_targets(calories, goal="maintain", overrides=None):
+    """Daily [calories, protein g, carbs g, fats g]; explicit gram targets in `overrides` win"""
+    split = MACRO_SPLITS.get(goal, MACRO_SPLITS["maintain"])
+    targets = {"calories": float(calories)}
+    for macro, share in split.items():
+        targets[macro] = calories * share / KCAL_PER_GRAM[macro]
+    for column, value in (overrides or {}).items():
+        if column in targets and value is not None:
+            targets[column] = float(value)
+    return np.array([targets[column] for column in NUTRIENT_COLUMNS])
+
+
+def nutrient_matrix(snapshot, ids):
+    """(len(ids), 4) float64 nutrients straight from the catalog columns"""
+    return np.stack([getattr(snapshot, column)[ids] for column in NUTRIENT_COLUMNS], axis=1).astype(np.float64)
+
+
+def _score(totals, target, scale):
+    return (((totals - target) / scale) ** 2 * SCORE_WEIGHTS).sum(axis=-1)
+
+
+def optimize_plans(slot_ids, slot_nutrients, slot_targets, top_k=3,
+                   beam_width=DEFAULT_BEAM_WIDTH, per_slot=DEFAULT_PER_SLOT):
+    """
+    Pick one meal per slot so the day's nutrient totals land close to the target.
+
+    slot_ids / slot_nutrients hold each slot's candidate ids and their (n, 4)
+    nutrients, slot_targets is (slots, 4). Each slot is first pruned to the
+    `per_slot` meals closest to its own share, then a beam search keeps the
+    `beam_width` best partial plans, scored against the cumulative target so far.
+    Returns up to top_k (ids, totals, score) tuples, best first.
+    """
+    slot_targets = np.asarray(slot_targets, dtype=np.float64)
+    scale = np.maximum(slot_targets.sum(axis=0), 1.0)
+
+    beam_ids = np.empty((1, 0), dtype=np.int64)
+    beam_totals = np.zeros((1, len(NUTRIENT_COLUMNS)))
+    beam_scores = np.zeros(1)
+    cumulative = np.zeros(len(NUTRIENT_COLUMNS))
+
+    for s, (ids, nutrients) in enumerate(zip(slot_ids, slot_nutrients)):
+        if len(ids) == 0:
+            return []
+        ids = np.asarray(ids, dtype=np.int64)
+
+        # Prune: the meals closest to this slot's share of the day
+        if len(ids) > per_slot:
+            closest = np.argpartition(_score(nutrients, slot_targets[s], scale), per_slot)[:per_slot]
+            ids, nutrients = ids[closest], nutrients[closest]
+
+        cumulative = cumulative + slot_targets[s]
+        totals = beam_totals[:, None, :] + nutrients[None, :, :]
+        scores = _score(totals, cumulative, scale).ravel()
+
+        keep = min(top_k if s == len(slot_ids) - 1 else beam_width, len(scores))
+        best = np.argpartition(scores, keep - 1)[:keep] if keep < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(scores[best], kind='stable')]
+
+        parent, choice = np.divmod(best, len(ids))
+        beam_ids = np.concatenate([beam_ids[parent], ids[choice][:, None]], axis=1)
+        beam_totals = totals.reshape(-1, len(NUTRIENT_COLUMNS))[best]
+        beam_scores = scores[best]
+
+    return [(beam_ids[i].tolist(), beam_totals[i], float(beam_scores[i])) for i in range(len(beam_ids))]
+
+
+def deviation(totals, target):
+    """Relative error per nutrient"""
+    return (np.asarray(totals) - target) / np.maximum(target, 1.0)
+
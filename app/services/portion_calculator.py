@@ -1,5 +1,53 @@
 # app/services/portion_calculator.py - FIXED VERSION
 import re
+from functools import lru_cache
+
+import numpy as np
+
+# Meal names whose (category, piece word) stay memoized per calculator
+CLASSIFY_CACHE_SIZE = 8192
+
+# Unit codes for the vectorized path; FALLBACK is any unit the branches don't know
+GRAMS, PIECES, SERVINGS, CUPS, FALLBACK = range(5)
+UNIT_CODES = {'grams': GRAMS, 'pieces': PIECES, 'servings': SERVINGS, 'cups': CUPS}
+
+# Piece words by keyword, in priority order ('tandoori roti' must win over 'roti')
+PIECE_WORDS = (
+    ('tandoori roti', 'tandoori roti'),
+    ('roti', 'roti'),
+    ('parantha', 'parantha'),
+    ('paratha', 'parantha'),
+    ('kulcha', 'kulcha'),
+    ('naan', 'naan'),
+    ('luchi', 'luchi'),
+    ('dosa', 'dosa'),
+    ('uttapam', 'uttapam'),
+    ('idli', 'idli'),
+    ('vada', 'vada'),
+    ('samosa', 'samosa'),
+    ('dhokla', 'piece'),
+    ('pakora', 'piece'),
+    ('bhature', 'bhature'),
+)
+
+
+def _priority_matcher(keywords):
+    """
+    One regex for a priority-ordered keyword list: a lookahead alternation that
+    reports, at every position, the highest-priority keyword starting there.
+    match(text) returns the best (lowest) priority found anywhere, or None.
+    """
+    priority = {}
+    for i, keyword in enumerate(keywords):
+        priority.setdefault(keyword, i)
+    ordered = sorted(priority, key=priority.get)
+    pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in ordered) + "))")
+
+    def match(text):
+        found = [priority[m.group(1)] for m in pattern.finditer(text)]
+        return min(found) if found else None
+
+    return match
 
 class PortionCalculator:
     def __init__(self):
@@ -76,125 +124,115 @@ class PortionCalculator:
                 'unit': 'servings'
             }
         }
+
+        # ✅ Keyword tables compiled once; first-match priority = category order, then keyword order
+        self._category_keywords = [
+            (category, keyword) for category, info in self.food_categories.items() for keyword in info['keywords']
+        ]
+        self._match_category = _priority_matcher([keyword for _, keyword in self._category_keywords])
+        self._match_piece_word = _priority_matcher([keyword for keyword, _ in PIECE_WORDS])
+        self._classify = lru_cache(maxsize=CLASSIFY_CACHE_SIZE)(self._classify_uncached)
+
+        # ✅ Per-category unit code and calorie density, indexed by category position
+        self._category_index = {category: c for c, category in enumerate(self.food_categories)}
+        self._unit_codes = np.array([UNIT_CODES.get(info['unit'], FALLBACK) for info in self.food_categories.values()])
+        self._densities = np.array([self._density(info) for info in self.food_categories.values()], dtype=np.float64)
+
+    @staticmethod
+    def _density(info):
+        """Calories per 100 g / piece / serving / cup, with the scalar path's defaults"""
+        unit = info['unit']
+        if unit == 'grams':
+            return info['calories_per_100g']
+        if unit == 'pieces':
+            return info.get('calories_per_piece', 100)
+        if unit == 'servings':
+            return info.get('calories_per_serving', 200)
+        if unit == 'cups':
+            return info.get('calories_per_serving', 100)
+        return 1.0
+
+    def _classify_uncached(self, meal_name_lower: str):
+        """(category, piece word) for a lowercased meal name"""
+        best = self._match_category(meal_name_lower)
+        # Default fallback
+        category = self._category_keywords[best][0] if best is not None else 'rice_dishes'
+
+        best = self._match_piece_word(meal_name_lower)
+        if best is not None:
+            piece_word = PIECE_WORDS[best][1]
+        else:
+            piece_word = self.food_categories[category].get('piece_name', 'piece')
+        return category, piece_word
     
     def identify_food_category(self, meal_name: str) -> str:
         """Identify the food category based on meal name"""
-        meal_name_lower = meal_name.lower()
-        
-        for category, info in self.food_categories.items():
-            for keyword in info['keywords']:
-                if keyword in meal_name_lower:
-                    return category
-        
-        # Default fallback
-        return 'rice_dishes'
+        return self._classify(meal_name.lower())[0]
     
     def calculate_portion(self, meal_name: str, target_calories: int) -> str:
         """Calculate appropriate portion size based on meal type and target calories"""
-        category = self.identify_food_category(meal_name)
-        category_info = self.food_categories[category]
-        meal_name_lower = meal_name.lower()
-        
-        if category_info['unit'] == 'grams':
-            # Calculate grams needed
-            calories_per_100g = category_info['calories_per_100g']
-            grams_needed = (target_calories / calories_per_100g) * 100
-            
-            # Round to practical portions
-            if grams_needed < 50:
-                portion = 50
-            elif grams_needed < 100:
-                portion = round(grams_needed / 25) * 25
-            else:
-                portion = round(grams_needed / 50) * 50
-            
-            return f"{portion}g"
-            
-        elif category_info['unit'] == 'pieces':
-            # Calculate number of pieces needed
-            calories_per_piece = category_info.get('calories_per_piece', 100)
-            pieces_needed = target_calories / calories_per_piece
-            
-            # Round to practical whole numbers
-            if pieces_needed < 0.5:
-                pieces = 1
-            elif pieces_needed < 1.5:
-                pieces = 1
-            elif pieces_needed < 2.5:
-                pieces = 2
-            elif pieces_needed < 3.5:
-                pieces = 3
-            else:
-                pieces = max(1, round(pieces_needed))
-            
-            # Get appropriate piece name - FIXED BUG HERE
-            piece_word = self._get_piece_word(category, meal_name_lower, category_info)
-            return f"{pieces} {piece_word}" if pieces > 1 else f"1 {piece_word}"
-            
-        elif category_info['unit'] == 'servings':
-            # Calculate servings
-            calories_per_serving = category_info.get('calories_per_serving', 200)
-            servings_needed = target_calories / calories_per_serving
-            
-            if servings_needed < 0.75:
-                return "1 small serving"
-            elif servings_needed < 1.25:
-                return "1 serving"
-            elif servings_needed < 1.75:
-                return "1.5 servings"
-            else:
-                servings = max(1, round(servings_needed))
-                return f"{servings} servings"
-                
-        elif category_info['unit'] == 'cups':
-            # Calculate cups
-            calories_per_serving = category_info.get('calories_per_serving', 100)
-            cups_needed = target_calories / calories_per_serving
-            
-            if cups_needed < 0.75:
-                return "1 small cup"
-            elif cups_needed < 1.25:
-                return "1 cup"
-            else:
-                cups = max(1, round(cups_needed))
-                return f"{cups} cups"
-        
-        return f"{target_calories} cal serving"  # Fallback
-    
-    def _get_piece_word(self, category: str, meal_name: str, category_info: dict) -> str:
-        """Get appropriate word for pieces based on food type - FIXED VERSION"""
-        
-        if 'roti' in meal_name and 'tandoori roti' not in meal_name:
-            return 'roti'
-        elif 'tandoori roti' in meal_name:
-            return 'tandoori roti'
-        elif 'parantha' in meal_name or 'paratha' in meal_name:
-            return 'parantha'
-        elif 'kulcha' in meal_name:
-            return 'kulcha'  
-        elif 'naan' in meal_name:
-            return 'naan'
-        elif 'luchi' in meal_name:
-            return 'luchi'
-        elif 'dosa' in meal_name:
-            return 'dosa'
-        elif 'uttapam' in meal_name:
-            return 'uttapam'
-        elif 'idli' in meal_name:
-            return 'idli'
-        elif 'vada' in meal_name:
-            return 'vada'
-        elif 'samosa' in meal_name:
-            return 'samosa'
-        elif 'dhokla' in meal_name:
-            return 'piece'
-        elif 'pakora' in meal_name:
-            return 'piece'
-        elif 'bhature' in meal_name:
-            return 'bhature'
-        else:
-            # Use the category_info that was passed as parameter
-            return category_info.get('piece_name', 'piece')
+        quantities, units = self.calculate_portions([meal_name], [target_calories])
+        return self.format_portion(quantities[0], units[0])
+
+    def calculate_portions(self, meals, targets, names=None):
+        """
+        Portions for many meals at once: meal names, or catalog ids together with
+        the catalog's `names` column, and one calorie target each.
+
+        Returns (quantities, units): a float array of grams / pieces / servings /
+        cups and an object array of unit labels ('g', 'roti', 'small serving', ...).
+        format_portion(quantity, unit) gives the same text as calculate_portion.
+        """
+        if names is not None:
+            meals = [names[i] for i in meals]
+        classified = [self._classify(str(meal).lower()) for meal in meals]
+        categories = np.array([self._category_index[category] for category, _ in classified], dtype=np.intp)
+        targets = np.asarray(targets, dtype=np.float64)
+
+        unit = self._unit_codes[categories]
+        needed = targets / self._densities[categories]
+        quantities = np.empty(len(categories), dtype=np.float64)
+        units = np.empty(len(categories), dtype=object)
+
+        # Grams: at least 50, then rounded to 25 g below 100 g and to 50 g above
+        mask = unit == GRAMS
+        grams = needed[mask] * 100
+        quantities[mask] = np.where(grams < 50, 50,
+                                    np.where(grams < 100, np.round(grams / 25) * 25, np.round(grams / 50) * 50))
+        units[mask] = 'g'
+
+        # Pieces: practical whole numbers, named after the dish
+        mask = unit == PIECES
+        pieces = needed[mask]
+        quantities[mask] = np.where(pieces < 1.5, 1,
+                                    np.where(pieces < 2.5, 2,
+                                             np.where(pieces < 3.5, 3, np.maximum(1, np.round(pieces)))))
+        units[mask] = [piece_word for (_, piece_word), is_piece in zip(classified, mask) if is_piece]
+
+        # Servings: small / one / one and a half, then whole servings
+        mask = unit == SERVINGS
+        servings = needed[mask]
+        quantities[mask] = np.where(servings < 1.25, 1,
+                                    np.where(servings < 1.75, 1.5, np.maximum(1, np.round(servings))))
+        units[mask] = np.where(servings < 0.75, 'small serving', np.where(servings < 1.25, 'serving', 'servings'))
+
+        # Cups: small / one, then whole cups
+        mask = unit == CUPS
+        cups = needed[mask]
+        quantities[mask] = np.where(cups < 1.25, 1, np.maximum(1, np.round(cups)))
+        units[mask] = np.where(cups < 0.75, 'small cup', np.where(cups < 1.25, 'cup', 'cups'))
+
+        mask = unit == FALLBACK
+        quantities[mask] = targets[mask]
+        units[mask] = 'cal serving'
+
+        return quantities, units
+
+    @staticmethod
+    def format_portion(quantity, unit) -> str:
+        """Text for one (quantity, unit) pair, e.g. '150g', '2 roti', '1 small cup'"""
+        quantity = int(quantity) if float(quantity).is_integer() else float(quantity)
+        return f"{quantity}g" if unit == 'g' else f"{quantity} {unit}"
 
 # Test function
 if __name__ == "__main__":
@@ -218,4 +256,5 @@ if __name__ == "__main__":
     for meal_name, calories in test_meals:
         portion = calculator.calculate_portion(meal_name, calories)
         category = calculator.identify_food_category(meal_name)
-        print(f"{meal_name:<25} ({calories} cal): {portion:<15} [{category}]")
\ No newline at end of file
+        print(f"{meal_name:<25} ({calories} cal): {portion:<15} [{category}]")
+
@@ -0,0 +1,107 @@
+# app/services/portion_table.py - PRECOMPUTED PORTION AND EXPLANATION LOOKUPS PER CATALOG
+import numpy as np
+
+from app.services.portion_calculator import PortionCalculator
+
+# Portion labels are tabulated every PORTION_BUCKET_KCAL up to MAX_TABLE_KCAL;
+# targets above that are sized by the calculator directly
+PORTION_BUCKET_KCAL = 25
+MAX_TABLE_KCAL = 3000
+
+# Explanation chosen by the first keyword group found in the meal name
+EXPLANATION_RULES = (
+    (("chicken", "egg", "paneer", "dal", "rajma"), "Rich in protein to support your {goal} goal."),
+    (("roti", "rice", "pulao", "poha", "idli"), "Provides energy-rich carbs to fuel your {goal} goal."),
+    (("raita", "salad", "chutney", "sambar", "soup"), "A light side to improve digestion and balance your meal."),
+)
+DEFAULT_EXPLANATION = "Selected for variety and balanced nutrition."
+EXPLANATION_TEMPLATES = tuple(template for _, template in EXPLANATION_RULES) + (DEFAULT_EXPLANATION,)
+
+# Goals whose explanation strings are formatted up front
+GOALS = ("lose", "maintain", "gain")
+
+
+def explanation_code(name):
+    """Index into EXPLANATION_TEMPLATES for a meal name"""
+    name = name.lower()
+    for code, (keywords, _) in enumerate(EXPLANATION_RULES):
+        if any(x in name for x in keywords):
+            return code
+    return len(EXPLANATION_RULES)
+
+
+def portion_bucket(target_calories):
+    """Nearest PORTION_BUCKET_KCAL bucket of a calorie target"""
+    return int(target_calories / PORTION_BUCKET_KCAL + 0.5)
+
+
+class PortionTable:
+    """
+    Portion labels and explanations for every meal of one catalog snapshot.
+
+    A portion depends on the meal name only through its (food category, piece
+    word), so meals share a handful of portion classes: `meal_class` maps meal
+    id -> class, and `label_codes[class, bucket]` indexes `labels`. Explanations
+    depend on the name's keyword group and the goal: `explanation_codes` per meal
+    id, formatted once per goal.
+    """
+
+    def __init__(self, names, calculator=None):
+        calculator = calculator or PortionCalculator()
+        self.calculator = calculator
+        self.buckets = MAX_TABLE_KCAL // PORTION_BUCKET_KCAL + 1
+
+        classes, representatives, explanations = {}, [], {}
+        meal_class = np.empty(len(names), dtype=np.int16)
+        explanation_codes = np.empty(len(names), dtype=np.int8)
+        for i, name in enumerate(names):
+            name = str(name)
+            key = calculator._classify(name.lower())
+            if key not in classes:
+                classes[key] = len(classes)
+                representatives.append(name)
+            meal_class[i] = classes[key]
+            if name not in explanations:
+                explanations[name] = explanation_code(name)
+            explanation_codes[i] = explanations[name]
+        self.meal_class = meal_class
+        self.explanation_codes = explanation_codes
+
+        # Every (class, bucket) sized in one vectorized call
+        targets = np.arange(self.buckets) * PORTION_BUCKET_KCAL
+        quantities, units = calculator.calculate_portions(
+            np.repeat(np.array(representatives, dtype=object), self.buckets), np.tile(targets, len(representatives))
+        )
+        labels, label_index = [], {}
+        codes = []
+        for quantity, unit in zip(quantities.tolist(), units):
+            label = calculator.format_portion(quantity, unit)
+            if label not in label_index:
+                label_index[label] = len(labels)
+                labels.append(label)
+            codes.append(label_index[label])
+        self.labels = labels
+        self.label_codes = np.array(codes, dtype=np.int16).reshape(len(representatives), self.buckets)
+
+        self._explanations = {goal: self._format(goal) for goal in GOALS}
+
+    def __len__(self):
+        return len(self.meal_class)
+
+    @staticmethod
+    def _format(goal):
+        return tuple(template.format(goal=goal) for template in EXPLANATION_TEMPLATES)
+
+    def portion(self, meal_id, meal_name, target_calories):
+        """Portion label for a meal id at (about) target_calories"""
+        bucket = portion_bucket(target_calories)
+        if bucket >= self.buckets:
+            return self.calculator.calculate_portion(meal_name, target_calories)
+        return self.labels[self.label_codes[self.meal_class[meal_id], bucket]]
+
+    def explanation(self, meal_id, goal):
+        explanations = self._explanations.get(goal)
+        if explanations is None:
+            explanations = self._format(goal)
+        return explanations[self.explanation_codes[meal_id]]
+
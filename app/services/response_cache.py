@@ -0,0 +1,150 @@
+# app/services/response_cache.py - NORMALIZED-KEY LRU / TTL CACHE FOR FIRST-LOAD MEAL RESPONSES
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.services.metrics import record_cache
+
+DEFAULT_TTL_SECONDS = 5 * 60
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Requests within one bucket share a response (and are computed at the bucket value)
+CALORIE_BUCKET = 25
+BMI_BUCKET = 0.5
+
+# Model whose version is part of every key
+MODEL_NAME = "meal_recommender"
+
+
+def canonical_request(user_data, catalog, model_version):
+    """
+    (key, canonical user_data) for a cacheable get-meals request, or (None, None).
+
+    Only first loads are cacheable: no shuffle, no stateless shuffle_seed. The
+    key holds everything the response depends on, normalized: calories rounded
+    to CALORIE_BUCKET, the region as the catalog region codes it resolves to
+    through REGION_MAPPING, the diet lowercased, and BMI as its suitability-matrix
+    band (exact) or else rounded to BMI_BUCKET. The canonical request carries the
+    bucketed values, so a shared response is always computed for the key's inputs.
+    """
+    if user_data.get("shuffle") or user_data.get("shuffle_seed") is not None:
+        return None, None
+    try:
+        calories = int(round(int(user_data.get("calories", 1800)) / CALORIE_BUCKET)) * CALORIE_BUCKET
+    except (TypeError, ValueError):
+        return None, None
+
+    canonical = dict(user_data)
+    canonical["calories"] = calories
+
+    band = catalog.suitability.key(user_data) if catalog.suitability is not None else None
+    if band is not None:
+        bmi_key = ("band", band)
+    else:
+        bmi = user_data.get("bmi", 22.5)
+        if isinstance(bmi, bool) or not isinstance(bmi, (int, float)):
+            return None, None
+        canonical["bmi"] = round(bmi / BMI_BUCKET) * BMI_BUCKET
+        bmi_key = ("bmi", canonical["bmi"])
+
+    diet = user_data.get("diet_preference", "vegetarian")
+    fields = user_data.get("fields")
+    key = (
+        catalog.content_hash,
+        model_version,
+        calories,
+        bmi_key,
+        str(user_data.get("goal", "maintain")),
+        _region_key(catalog, user_data.get("region", "")),
+        diet.lower() if isinstance(diet, str) else repr(diet),
+        user_data.get("meal_time"),
+        repr(user_data.get("seed")),
+        ",".join(fields) if isinstance(fields, (list, tuple)) else repr(fields),
+        str(user_data.get("compact", "")).lower(),
+    )
+    return key, canonical
+
+
+def _region_key(catalog, region):
+    """Spellings that resolve to the same region codes ('North India', 'north') share a key"""
+    exact, partial = catalog.match_region_codes(str(region or ""))
+    if exact is None:
+        return None
+    return tuple(exact), tuple(partial)
+
+
+class ResponseCache:
+    """
+    Bounded LRU of response bodies with a TTL. A lookup whose catalog / model
+    generation differs from the cached one drops every entry first, so a reload
+    never serves stale meals.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _check_generation(self, generation):
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key):
+        with self._lock:
+            self._check_generation(key[:2])
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        record_cache("response", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._check_generation(key[:2])
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def create_response_cache():
+    """Cache configured from RESPONSE_CACHE_TTL / RESPONSE_CACHE_MAX_ENTRIES (0 disables it)"""
+    return ResponseCache(
+        ttl=float(os.environ.get("RESPONSE_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+        max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
@@ -0,0 +1,222 @@
+# app/services/selection_history.py - PER-USER SHUFFLE HISTORY WITH TTL AND LRU CAP
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from app.logging_config import get_logger
+
+log = get_logger("history")
+
+# Shared history for requests that don't identify a user (previous behaviour)
+ANONYMOUS_USER = "anonymous"
+
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def history_user_id(user_data):
+    """User key for a request: user_id / uid if the client sent one"""
+    user_id = user_data.get("user_id") or user_data.get("uid")
+    return str(user_id) if user_id else ANONYMOUS_USER
+
+
+class SelectionHistoryStore(ABC):
+    """
+    Remembers the last meals shown to a user for one slot (e.g. "lunch_north")
+    so a shuffle can avoid repeating them.
+
+    Entries expire after `ttl` seconds and the least recently used entries are
+    dropped once there are more than `max_entries`.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @abstractmethod
+    def get(self, user_id, slot):
+        """Previous meal names, or None if there are none (or they expired)"""
+
+    @abstractmethod
+    def set(self, user_id, slot, names):
+        """Remember the meal names just shown for one slot"""
+
+    @abstractmethod
+    def clear(self, user_id=None):
+        """Forget one user's history, or everything"""
+
+    @abstractmethod
+    def entries(self, user_id=None):
+        """{user_id: {slot: names}} of live entries, for debugging"""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of stored entries"""
+
+
+class MemorySelectionHistory(SelectionHistoryStore):
+    """In-process backend: an OrderedDict in LRU order behind a lock"""
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()  # (user_id, slot) -> (expires_at, names)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, slot):
+        key = (user_id, slot)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(entry[1])
+
+    def set(self, user_id, slot, names):
+        key = (user_id, slot)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, tuple(names))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == user_id]:
+                    del self._entries[key]
+
+    def entries(self, user_id=None):
+        now = time.time()
+        result = {}
+        with self._lock:
+            for (entry_user, slot), (expires_at, names) in self._entries.items():
+                if expires_at > now and (user_id is None or entry_user == user_id):
+                    result.setdefault(entry_user, {})[slot] = list(names)
+        return result
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteSelectionHistory(SelectionHistoryStore):
+    """
+    SQLite backend in WAL mode, shared by every worker process on the host.
+
+    Each thread gets its own connection. Expired rows are ignored on read and
+    purged, together with the LRU overflow, every `prune_every` writes.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES, prune_every=256):
+        super().__init__(ttl, max_entries)
+        self.path = os.path.abspath(path)
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = itertools.count(1)  # next() is atomic, so request threads never race on it
+
+        with self._connection() as conn:
+            # WAL is a property of the database file: set once here, not per connection
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS selection_history ("
+                " user_id TEXT NOT NULL, slot TEXT NOT NULL, names TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (user_id, slot))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS selection_history_accessed ON selection_history (accessed_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id, slot):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT names FROM selection_history WHERE user_id = ? AND slot = ? AND expires_at > ?",
+            (user_id, slot, now)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE selection_history SET accessed_at = ? WHERE user_id = ? AND slot = ?",
+                (now, user_id, slot)
+            )
+        return json.loads(row[0])
+
+    def set(self, user_id, slot, names):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO selection_history (user_id, slot, names, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (user_id, slot, json.dumps(list(names)), now + self.ttl, now)
+            )
+        if next(self._writes) % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows and the least recently used rows above max_entries"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM selection_history WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM selection_history WHERE rowid IN ("
+                " SELECT rowid FROM selection_history ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self, user_id=None):
+        conn = self._connection()
+        with conn:
+            if user_id is None:
+                conn.execute("DELETE FROM selection_history")
+            else:
+                conn.execute("DELETE FROM selection_history WHERE user_id = ?", (user_id,))
+
+    def entries(self, user_id=None):
+        query = "SELECT user_id, slot, names FROM selection_history WHERE expires_at > ?"
+        params = [time.time()]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        result = {}
+        for entry_user, slot, names in self._connection().execute(query, params):
+            result.setdefault(entry_user, {})[slot] = json.loads(names)
+        return result
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM selection_history").fetchone()[0]
+
+
+def create_history_store():
+    """
+    Backend from the environment:
+    SELECTION_HISTORY_BACKEND=memory (default) | sqlite, SELECTION_HISTORY_PATH,
+    SELECTION_HISTORY_TTL (seconds), SELECTION_HISTORY_MAX_ENTRIES.
+    """
+    ttl = float(os.environ.get("SELECTION_HISTORY_TTL", DEFAULT_TTL_SECONDS))
+    max_entries = int(os.environ.get("SELECTION_HISTORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    backend = os.environ.get("SELECTION_HISTORY_BACKEND", "memory").lower()
+
+    if backend == "sqlite":
+        path = os.environ.get("SELECTION_HISTORY_PATH", "selection_history.sqlite3")
+        return SqliteSelectionHistory(path, ttl=ttl, max_entries=max_entries)
+    if backend != "memory":
+        log.warning("⚠️ Unknown SELECTION_HISTORY_BACKEND '%s', using in-memory history", backend)
+    return MemorySelectionHistory(ttl=ttl, max_entries=max_entries)
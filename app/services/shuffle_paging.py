@@ -0,0 +1,77 @@
+# app/services/shuffle_paging.py - STATELESS SHUFFLE PAGES FROM A KEYED PERMUTATION
+import hashlib
+
+
+class KeyedPermutation:
+    """
+    A pseudo-random bijection on [0, size) chosen by `key`.
+
+    Format-preserving: a balanced Feistel network over the smallest even-bit
+    domain that holds `size`, with cycle walking to stay inside [0, size). Any
+    single position is mapped in O(rounds) without building the permutation.
+    """
+
+    def __init__(self, key: bytes, size: int, rounds: int = 4):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self.half_bits = (bits + 1) // 2
+        self.mask = (1 << self.half_bits) - 1
+        self.round_keys = [
+            hashlib.blake2b(key + bytes([r]), digest_size=32, person=b"cm-feistel").digest()
+            for r in range(rounds)
+        ]
+
+    def _round(self, round_key, value):
+        digest = hashlib.blake2b(value.to_bytes(8, 'little'), key=round_key, digest_size=8).digest()
+        return int.from_bytes(digest, 'little') & self.mask
+
+    def _encrypt(self, x):
+        left, right = x >> self.half_bits, x & self.mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(round_key, right)
+        return (left << self.half_bits) | right
+
+    def __call__(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        # Cycle walking: the domain is < 4 * size, so this takes < 4 steps on average
+        value = self._encrypt(position)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def shuffle_key(seed, region, meal_time):
+    """Permutation key for one user seed and pool"""
+    return f"{seed}|{region}|{meal_time}".encode('utf-8')
+
+
+def shuffle_page(ids, key, page, page_size):
+    """
+    Page `page` of a keyed shuffle of `ids`, in O(page_size).
+
+    Page N holds positions [N * page_size, (N + 1) * page_size) of the shuffled
+    order, so successive pages never overlap until the pool is exhausted; after
+    that the next pass uses a fresh permutation (the key plus a pass number).
+    The same (ids, key, page) always gives the same page, on any worker.
+    `ids` is any indexable sequence, e.g. a CandidatePool's accepted_index().
+    """
+    n = len(ids)
+    if n == 0 or page_size <= 0:
+        return []
+
+    page_size = min(page_size, n)
+    permutations = {}
+    selected, seen = [], set()
+    position = page * page_size
+    while len(selected) < page_size:
+        shuffle_pass, offset = divmod(position, n)
+        if shuffle_pass not in permutations:
+            permutations[shuffle_pass] = KeyedPermutation(key + b"#%d" % shuffle_pass, n)
+        item = ids[permutations[shuffle_pass](offset)]
+        # A page straddling two passes could meet the same meal twice
+        if item not in seen:
+            seen.add(item)
+            selected.append(item)
+        position += 1
+    return selected
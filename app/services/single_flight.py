@@ -0,0 +1,114 @@
+# app/services/single_flight.py - COALESCE IDENTICAL CONCURRENT COMPUTATIONS INTO ONE
+import os
+import threading
+
+from app.services.metrics import metrics
+
+# Longest a follower waits on an in-flight computation before doing it itself
+DEFAULT_TIMEOUT_SECONDS = 5.0
+
+metrics.describe("coalesced_total", "Computations saved by sharing an identical in-flight or in-batch one")
+metrics.describe("coalesce_fallbacks_total", "Followers that computed themselves (leader timed out or failed)")
+
+
+class Flight:
+    """One in-flight computation: the leader fills in the result, followers wait on it"""
+
+    __slots__ = ("done", "result", "failed")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """
+    Per-key single flight. The first caller for a key becomes its leader and
+    computes; callers arriving while it runs wait on the leader's Flight and share
+    its result. The key is dropped as soon as the leader finishes, so only
+    computations actually running are tracked. A follower whose leader fails or
+    takes longer than `timeout` computes independently.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._flights = {}  # key -> Flight
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self):
+        return self.timeout > 0
+
+    def begin(self, key):
+        """(flight, leader): a leader must call finish(key, flight, ...) whatever happens"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, failed=False):
+        """Publish the leader's result and release the key"""
+        flight.result = result
+        flight.failed = failed
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+    def wait(self, flight, source="single"):
+        """The leader's result, or None when the follower has to compute itself"""
+        if flight.done.wait(self.timeout) and not flight.failed:
+            self.count_coalesced(1, source)
+            return flight.result
+        with self._lock:
+            self.fallbacks += 1
+        metrics.inc("coalesce_fallbacks_total", source=source)
+        return None
+
+    def count_coalesced(self, saved, source):
+        """Record `saved` computations served from another one"""
+        if saved:
+            with self._lock:
+                self.coalesced += saved
+            metrics.inc("coalesced_total", saved, source=source)
+
+    def do(self, key, fn):
+        """(fn() or an identical in-flight call's result, shared)"""
+        if not self.enabled:
+            return fn(), False
+        flight, leader = self.begin(key)
+        if not leader:
+            result = self.wait(flight)
+            if result is not None:
+                return result, True
+            return fn(), False
+
+        try:
+            result = fn()
+        except BaseException:
+            self.finish(key, flight, failed=True)
+            raise
+        self.finish(key, flight, result)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "timeout_seconds": self.timeout,
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "fallbacks": self.fallbacks,
+            }
+
+
+def create_single_flight():
+    """Single flight configured from SINGLE_FLIGHT_TIMEOUT (seconds; 0 disables coalescing)"""
+    return SingleFlight(timeout=float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", DEFAULT_TIMEOUT_SECONDS)))
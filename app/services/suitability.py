@@ -0,0 +1,152 @@
+# app/services/suitability.py - PRECOMPUTED MEAL SUITABILITY BITSETS
+import numbers
+
+import numpy as np
+
+# Stand-in for goal / diet values the model was never trained on (all dummies 0)
+OTHER = "__other__"
+
+
+def _tree_estimators(model):
+    """All fitted trees inside the model, or None if it is not tree based"""
+    if hasattr(model, 'tree_') or hasattr(model, 'split_thresholds'):
+        return [model]
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return None
+    trees = list(np.ravel(estimators))
+    return trees if all(hasattr(tree, 'tree_') for tree in trees) else None
+
+
+def _bmi_thresholds(model, model_columns):
+    """Sorted split thresholds the model uses on the bmi column"""
+    if 'bmi' not in model_columns:
+        return np.empty(0)
+    trees = _tree_estimators(model)
+    if trees is None:
+        return None
+    bmi_index = list(model_columns).index('bmi')
+    thresholds = [
+        tree.split_thresholds(bmi_index) if hasattr(tree, 'split_thresholds')
+        else tree.tree_.threshold[tree.tree_.feature == bmi_index]
+        for tree in trees
+    ]
+    return np.unique(np.concatenate(thresholds)) if thresholds else np.empty(0)
+
+
+def _band_representatives(thresholds):
+    """
+    One float32 BMI value inside every band.
+
+    sklearn casts inputs to float32 and sends x left when x <= threshold, so
+    band j is (t[j-1], t[j]]. The representative is the largest float32 not above
+    t[j]; the last band uses the smallest float32 above the last threshold.
+    """
+    representatives = []
+    for t in thresholds:
+        value = np.float32(t)
+        if value > t:
+            value = np.nextafter(value, np.float32(-np.inf))
+        representatives.append(float(value))
+    if len(thresholds):
+        value = np.float32(thresholds[-1])
+        if value <= thresholds[-1]:
+            value = np.nextafter(value, np.float32(np.inf))
+        representatives.append(float(value))
+    else:
+        representatives.append(22.5)
+    return representatives
+
+
+class SuitabilityMatrix:
+    """
+    Suitability of every catalog meal for each (goal, diet_preference, BMI band).
+
+    predict_suitable_meals hard-codes every user feature except bmi, goal and
+    diet_preference, so for a given catalog the model output depends only on those
+    three. Goals and diets come from the model's dummy columns (plus OTHER for
+    unseen values) and BMI bands from the trees' own bmi split points, so a lookup
+    returns exactly what the live model would predict. Rows are stored as packed
+    bitsets: matrix[goal, diet, band] -> ceil(n_meals / 8) bytes.
+    """
+
+    def __init__(self, goals, diets, thresholds, bits, size):
+        self.goals = goals
+        self.diets = diets
+        self.thresholds = thresholds
+        self.bits = bits
+        self.size = size
+        self._goal_index = {goal: i for i, goal in enumerate(goals)}
+        self._diet_index = {diet: i for i, diet in enumerate(diets)}
+
+    @classmethod
+    def build(cls, model, model_columns, size, predict_fn):
+        """
+        Evaluate predict_fn(user_data) -> predictions over all `size` meals once per combination.
+        Returns None when the model's BMI split points cannot be read (non-tree model).
+        """
+        thresholds = _bmi_thresholds(model, model_columns)
+        if thresholds is None:
+            return None
+
+        goals = [c[len('goal_'):] for c in model_columns if c.startswith('goal_')] + [OTHER]
+        diets = [c[len('diet_preference_'):] for c in model_columns if c.startswith('diet_preference_')] + [OTHER]
+        representatives = _band_representatives(thresholds)
+
+        bits = np.zeros((len(goals), len(diets), len(representatives), (size + 7) // 8), dtype=np.uint8)
+        for g, goal in enumerate(goals):
+            for d, diet in enumerate(diets):
+                for b, bmi in enumerate(representatives):
+                    user_data = {"goal": goal, "diet_preference": diet, "bmi": bmi}
+                    suitable = np.asarray(predict_fn(user_data)) == 1
+                    bits[g, d, b] = np.packbits(suitable)
+
+        return cls(goals, diets, thresholds, bits, size)
+
+    def key(self, user_data):
+        """(goal, diet, band) indices for a request, or None if it can't be answered exactly"""
+        bmi = user_data.get("bmi", 22.5)
+        diet = user_data.get("diet_preference", "vegetarian")
+        goal = user_data.get("goal", "maintain")
+        # Anything the live path would one-hot encode differently (string bmi, etc.) is not covered
+        if isinstance(bmi, bool) or not isinstance(bmi, numbers.Real) or np.isnan(bmi):
+            return None
+        if not isinstance(diet, str) or not isinstance(goal, str):
+            return None
+
+        bmi = float(np.float32(bmi))
+        diet = diet.lower()
+
+        g = self._goal_index.get(goal, len(self.goals) - 1)
+        d = self._diet_index.get(diet, len(self.diets) - 1)
+        b = int(np.searchsorted(self.thresholds, bmi, side='left'))
+        return g, d, b
+
+    def lookup(self, user_data):
+        """Boolean suitability over catalog row ids, or None to fall back to live prediction"""
+        key = self.key(user_data)
+        if key is None:
+            return None
+        return np.unpackbits(self.bits[key], count=self.size).astype(bool)
+
+    def verify(self, predict_fn, profiles):
+        """Compare lookups with live predict_fn(user_data). Returns the profiles that disagree."""
+        mismatches = []
+        for user_data in profiles:
+            expected = np.asarray(predict_fn(user_data)) == 1
+            actual = self.lookup(user_data)
+            if actual is None or not np.array_equal(expected, actual):
+                mismatches.append(user_data)
+        return mismatches
+
+    def parity_profiles(self, extra_bmis=(15.0, 18.5, 22.5, 25.0, 30.0, 40.0)):
+        """Profiles covering every goal/diet plus each BMI band edge"""
+        bmis = list(extra_bmis)
+        for t in self.thresholds:
+            below = np.float32(t)
+            if below > t:
+                below = np.nextafter(below, np.float32(-np.inf))
+            bmis += [float(below), float(np.nextafter(below, np.float32(np.inf)))]
+        goals = [g for g in self.goals if g != OTHER] + ["something else"]
+        diets = [d for d in self.diets if d != OTHER] + ["something else"]
+        return [{"goal": g, "diet_preference": d, "bmi": bmi} for g in goals for d in diets for bmi in bmis]
@@ -0,0 +1,175 @@
+# app/services/tree_kernel.py - FLAT NUMPY INFERENCE FOR A FITTED DECISION TREE
+import argparse
+import os
+
+import numpy as np
+
+# sklearn marks leaves with feature == -2 and children == -1
+_LEAF = -2
+
+
+class FlatTree:
+    """
+    A fitted decision tree flattened into plain arrays.
+
+    Every node has a feature index, threshold, left/right child and the value a
+    leaf returns. predict() walks all rows down the tree together, one level per
+    step, with the same float32 cast and `x <= threshold` rule as scikit-learn,
+    so predictions are bit-identical without importing scikit-learn at serve time.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_value, max_depth, missing_left=None, columns=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.max_depth = int(max_depth)
+        self.missing_left = missing_left
+        self.columns = columns
+
+    @classmethod
+    def from_sklearn(cls, model, columns=None):
+        """Flatten a fitted DecisionTreeClassifier / DecisionTreeRegressor"""
+        tree = getattr(model, 'tree_', None)
+        if tree is None:
+            raise TypeError(f"{type(model).__name__} is not a single fitted decision tree")
+        if tree.n_outputs != 1:
+            raise TypeError("Multi-output trees are not supported")
+
+        values = tree.value[:, 0, :]
+        classes = getattr(model, 'classes_', None)
+        if classes is not None:
+            # Classifier: same argmax (first max wins) that predict() applies to leaf counts
+            leaf_value = np.asarray(classes).take(np.argmax(values, axis=1))
+            if leaf_value.dtype == object:
+                leaf_value = leaf_value.astype(str)
+        else:
+            leaf_value = values[:, 0].copy()
+
+        missing = getattr(tree, 'missing_go_to_left', None)
+        return cls(
+            feature=tree.feature.astype(np.int32),
+            threshold=tree.threshold.astype(np.float64),
+            left=tree.children_left.astype(np.int32),
+            right=tree.children_right.astype(np.int32),
+            leaf_value=leaf_value,
+            max_depth=tree.max_depth,
+            missing_left=None if missing is None else np.asarray(missing, dtype=bool),
+            columns=list(columns) if columns is not None else None,
+        )
+
+    def save(self, path):
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'leaf_value': self.leaf_value,
+            'max_depth': np.array(self.max_depth),
+        }
+        if self.missing_left is not None:
+            arrays['missing_left'] = self.missing_left
+        if self.columns is not None:
+            arrays['columns'] = np.array(self.columns, dtype=str)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                feature=data['feature'],
+                threshold=data['threshold'],
+                left=data['left'],
+                right=data['right'],
+                leaf_value=data['leaf_value'],
+                max_depth=data['max_depth'],
+                missing_left=data['missing_left'] if 'missing_left' in data.files else None,
+                columns=data['columns'].tolist() if 'columns' in data.files else None,
+            )
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def split_thresholds(self, feature_index):
+        """Thresholds of every split on one feature"""
+        return self.threshold[self.feature == feature_index]
+
+    def apply(self, X):
+        """Leaf node id reached by every row"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.int32)
+
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            active = feature != _LEAF
+            if not active.any():
+                break
+            rows_a, node_a = rows[active], node[active]
+            x = X[rows_a, feature[active]]
+            go_left = x <= self.threshold[node_a]
+            if self.missing_left is not None:
+                go_left |= np.isnan(x) & self.missing_left[node_a]
+            node[active] = np.where(go_left, self.left[node_a], self.right[node_a])
+
+        return node
+
+    def predict(self, X):
+        return self.leaf_value[self.apply(X)]
+
+
+def kernel_path_for(model_path):
+    """app/models/foo.pkl -> app/models/foo.npz"""
+    return os.path.splitext(model_path)[0] + '.npz'
+
+
+def export_model(model_path, kernel_path=None):
+    """
+    Load a pickled model and write its flat kernel next to it.
+    Accepts a bare tree or the (model, model_columns) tuple meal_model.py uses.
+    Returns (sklearn_model, flat_tree).
+    """
+    import joblib
+
+    loaded = joblib.load(model_path)
+    model, columns = loaded if isinstance(loaded, tuple) else (loaded, getattr(loaded, 'feature_names_in_', None))
+    flat = FlatTree.from_sklearn(model, columns)
+    flat.save(kernel_path or kernel_path_for(model_path))
+    return model, flat
+
+
+def verify_kernel(model, flat, X):
+    """Number of rows where the flat kernel disagrees with model.predict (must be 0)"""
+    X = np.asarray(X, dtype=np.float32)
+    if flat.columns is not None:
+        import pandas as pd
+        X_model = pd.DataFrame(X, columns=flat.columns, copy=False)
+    else:
+        X_model = X
+    expected = model.predict(X_model)
+    actual = flat.predict(X)
+    return int(np.count_nonzero(expected != actual))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a pickled decision tree to a flat NumPy kernel")
+    parser.add_argument("model", help="path to the .pkl model")
+    parser.add_argument("--out", help="kernel path (default: next to the model, .npz)")
+    parser.add_argument("--training-data", help="CSV of training rows to verify bit-identical predictions on")
+    args = parser.parse_args()
+
+    sk_model, kernel = export_model(args.model, args.out)
+    print(f"✅ Exported {kernel.node_count} nodes (depth {kernel.max_depth}) -> {args.out or kernel_path_for(args.model)}")
+
+    if args.training_data:
+        import pandas as pd
+
+        frame = pd.read_csv(args.training_data)
+        if kernel.columns is not None:
+            frame = pd.get_dummies(frame).reindex(columns=kernel.columns, fill_value=0)
+        X_train = frame.to_numpy(dtype=np.float32)
+        mismatches = verify_kernel(sk_model, kernel, X_train)
+        print(f"{'✅' if mismatches == 0 else '❌'} {len(X_train) - mismatches}/{len(X_train)} training rows identical")
+        raise SystemExit(1 if mismatches else 0)
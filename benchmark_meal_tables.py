@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the precomputed meal tables in app.py.
+
+Compares the old per-call behaviour (rebuilding the nested region -> meal time
+dict for every meal / every fallback, from the tables app.py used to hard-code,
+frozen in tests/fixtures/legacy_meal_tables.json) with the shared immutable
+tables. tests/test_legacy_app.py checks that both give identical meals.
+
+Usage: python benchmark_meal_tables.py
+"""
+import importlib.util
+import json
+import os
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# app.py is shadowed by the app/ package, so load it by path
+_spec = importlib.util.spec_from_file_location("legacy_app", os.path.join(ROOT, "app.py"))
+legacy_app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(legacy_app)
+
+with open(os.path.join(ROOT, "tests", "fixtures", "legacy_meal_tables.json"), encoding="utf-8") as f:
+    LEGACY_TABLES = json.load(f)
+
+REQUESTS = [
+    (meal_time, region, target)
+    for region in legacy_app.KNOWN_REGIONS + ('Central India',)
+    for meal_time in legacy_app.KNOWN_MEAL_TIMES
+    for target in (180, 500, 701, 999)
+]
+
+
+def old_generate_static_meals(meal_time, region, target_calories):
+    """Previous behaviour: the full 64-entry nested dict is rebuilt on every call"""
+    region_meals = {
+        region_name: {
+            time_name: [
+                {'name': name, 'calories': int(target_calories * ratio), 'portion': portion}
+                for name, ratio, portion in entries
+            ]
+            for time_name, entries in meal_times.items()
+        }
+        for region_name, meal_times in LEGACY_TABLES["static_meals"].items()
+    }
+    region_data = region_meals.get(region, region_meals['North India'])
+    return region_data.get(meal_time, region_data['breakfast'])
+
+
+def old_meal_names(meal_time, region, count=8):
+    """Previous behaviour: the meal_names dict is rebuilt once per generated meal"""
+    names = []
+    for i in range(count):
+        meal_names = {
+            region_name: {time_name: list(names) for time_name, names in meal_times.items()}
+            for region_name, meal_times in LEGACY_TABLES["meal_names"].items()
+        }
+        region_names = meal_names.get(region, meal_names['North India'])
+        meal_time_names = region_names.get(meal_time, region_names['breakfast'])
+        names.append(meal_time_names[i % len(meal_time_names)])
+    return names
+
+
+def new_meal_names(meal_time, region, count=8):
+    meal_time_names = legacy_app.meal_table(region, meal_time).names
+    return [meal_time_names[i % len(meal_time_names)] for i in range(count)]
+
+
+def run_old():
+    for meal_time, region, target in REQUESTS:
+        old_generate_static_meals(meal_time, region, target)
+        old_meal_names(meal_time, region)
+
+
+def run_new():
+    for meal_time, region, target in REQUESTS:
+        legacy_app.generate_static_meals(meal_time, region, target)
+        new_meal_names(meal_time, region)
+
+
+def peak_allocation(fn):
+    """Peak bytes allocated while fn runs (tracemalloc)"""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    rounds = 200
+    old_time = min(timeit.repeat(run_old, number=rounds, repeat=3)) / (rounds * len(REQUESTS))
+    new_time = min(timeit.repeat(run_new, number=rounds, repeat=3)) / (rounds * len(REQUESTS))
+    old_peak = peak_allocation(lambda: (old_generate_static_meals('lunch', 'South India', 700), old_meal_names('lunch', 'South India')))
+    new_peak = peak_allocation(lambda: (legacy_app.generate_static_meals('lunch', 'South India', 700), new_meal_names('lunch', 'South India')))
+
+    print(f"⏱️ Per request  old: {old_time * 1e6:8.1f} µs   new: {new_time * 1e6:8.1f} µs   ({old_time / new_time:.0f}x)")
+    print(f"🧠 Peak alloc   old: {old_peak:8d} B    new: {new_peak:8d} B    ({old_peak / max(new_peak, 1):.0f}x)")
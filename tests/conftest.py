@@ -0,0 +1,71 @@
+# tests/conftest.py - SHARED FIXTURES: SMALL SYNTHETIC CATALOGS, NO FIRESTORE
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Unit tests never talk to Firestore: `import app` would otherwise need firebase_key.json
+if "app.firebase_config" not in sys.modules:
+    firebase_config = types.ModuleType("app.firebase_config")
+    firebase_config.db = None
+    sys.modules["app.firebase_config"] = firebase_config
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from app.services.meal_catalog import CatalogSnapshot  # noqa: E402
+
+REGIONS = ("north", "south")
+MEAL_TIMES = ("breakfast", "lunch", "dinner", "snacks")
+DISHES = ("Dal Tadka", "Jeera Rice", "Aloo Parantha", "Masala Dosa", "Paneer Curry", "Idli", "Veg Biryani", "Poha")
+
+
+def meal_records(count, salt=0):
+    """`count` flattened meal records spread over REGIONS x MEAL_TIMES"""
+    records = []
+    for i in range(count):
+        region = REGIONS[i % len(REGIONS)]
+        records.append({
+            "name": f"{DISHES[(i + salt) % len(DISHES)]} {i}",
+            "calories": 150 + (i * 37) % 450,
+            "protein": 4 + i % 20,
+            "carbs": 20 + i % 60,
+            "fats": 3 + i % 15,
+            "region": region,
+            "meal_time": MEAL_TIMES[(i // len(REGIONS)) % len(MEAL_TIMES)],
+            "original_region": region,
+            "diet": "veg",
+        })
+    return records
+
+
+@pytest.fixture
+def make_snapshot():
+    """make_snapshot(count, salt=0) -> CatalogSnapshot over synthetic meals"""
+    def make(count, salt=0):
+        return CatalogSnapshot.from_records(meal_records(count, salt), f"test-{count}-{salt}", 0.0)
+    return make
+
+
+@pytest.fixture
+def meal_service_state(monkeypatch):
+    """
+    meal_service with fresh shared state (history, usage, single flight), no
+    response cache, and every meal suitable without a model
+    """
+    from app.services import meal_service
+    from app.services.meal_usage import MealUsageTracker
+    from app.services.response_cache import ResponseCache
+    from app.services.selection_history import MemorySelectionHistory
+    from app.services.single_flight import SingleFlight
+
+    monkeypatch.setattr(meal_service, "response_cache", ResponseCache(max_entries=0))
+    monkeypatch.setattr(meal_service, "inflight", SingleFlight(timeout=2))
+    monkeypatch.setattr(meal_service, "selection_history", MemorySelectionHistory())
+    monkeypatch.setattr(meal_service, "meal_usage_history", MealUsageTracker())
+    monkeypatch.setattr(meal_service, "find_suitable_meals", lambda catalog, user_data: np.ones(len(catalog), dtype=bool))
+    monkeypatch.setattr(meal_service, "encode_meal_features", lambda catalog: np.zeros((len(catalog), 1), dtype=np.float32))
+    monkeypatch.setattr(meal_service, "predict_suitability_batch", lambda profiles, features: np.ones((len(profiles), len(features))))
+    return meal_service
@@ -0,0 +1,42 @@
+# tests/test_feature_encoder.py - MODEL FEATURES FROM CATALOG COLUMNS MATCH THE DATAFRAME PATH
+import numpy as np
+
+from app.services.catalog_format import COMPILED_SUFFIX
+from app.services.feature_encoder import FeatureEncoder
+from app.services.meal_catalog import CatalogSnapshot
+from app.services.meal_model import USER_FEATURES
+
+from conftest import meal_records
+
+MODEL_COLUMNS = [
+    "calories", "protein", "carbs", "fats", "fiber", "bmi",
+    "type_veg", "type_non-veg", "region_north", "region_south",
+    "meal_time_breakfast", "meal_time_lunch", "meal_time_dinner", "meal_time_snacks",
+    "original_region_north", "original_region_south", "goal_gain", "goal_maintain",
+]
+
+
+def _records():
+    records = meal_records(90)
+    for i, meal in enumerate(records):
+        del meal["diet"]
+        meal["type"] = "veg" if i % 3 else "non-veg"
+        if i % 4:
+            meal["fiber"] = i % 7
+    return records
+
+
+def test_feature_columns_match_dataframe_encoding(tmp_path):
+    encoder = FeatureEncoder(MODEL_COLUMNS, USER_FEATURES)
+    snapshot = CatalogSnapshot.from_records(_records(), "features", 0.0)
+    expected = encoder.encode_static(snapshot.df)
+    assert expected[:, MODEL_COLUMNS.index("fiber")].any()
+
+    from_columns = encoder.encode_columns(len(snapshot), snapshot.feature_columns())
+    np.testing.assert_array_equal(from_columns, expected)
+
+    path = str(tmp_path / f"meals{COMPILED_SUFFIX}")
+    snapshot.compile(path)
+    compiled = CatalogSnapshot.from_compiled(path, 0.0)
+    np.testing.assert_array_equal(encoder.encode_columns(len(compiled), compiled.feature_columns()), expected)
+    assert compiled._records is None and compiled._df is None
@@ -0,0 +1,52 @@
+# tests/test_legacy_app.py - THE STANDALONE app.py SERVER
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.fixture(scope="module")
+def legacy_app():
+    """app.py is shadowed by the app/ package, so load it by path"""
+    spec = importlib.util.spec_from_file_location("legacy_app", os.path.join(ROOT, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_app_py_imports_without_firebase():
+    """app.py pulls shared services from the app package, which must not connect to Firestore on import"""
+    script = (
+        "import importlib.util, sys\n"
+        "spec = importlib.util.spec_from_file_location('legacy_app', 'app.py')\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        "assert 'app.firebase_config' not in sys.modules\n"
+    )
+    env = {**os.environ, "MODELS_DIR": os.path.join(ROOT, "no-models")}
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_meal_tables_match_the_hard_coded_originals(legacy_app):
+    """Precomputed tables against the dict literals app.py used to rebuild per call (frozen fixture)"""
+    with open(os.path.join(ROOT, "tests", "fixtures", "legacy_meal_tables.json"), encoding="utf-8") as f:
+        legacy = json.load(f)
+
+    def lookup(tables, region, meal_time):
+        region_tables = tables.get(region, tables["North India"])
+        return region_tables.get(meal_time, region_tables["breakfast"])
+
+    for region in list(legacy["static_meals"]) + ["Central India"]:
+        for meal_time in ("breakfast", "lunch", "dinner", "snacks", "brunch"):
+            assert list(legacy_app.meal_table(region, meal_time).names) == lookup(legacy["meal_names"], region, meal_time)
+            for target in (0, 180, 500, 701, 999, 1234):
+                expected = [
+                    {"name": name, "calories": int(target * ratio), "portion": portion}
+                    for name, ratio, portion in lookup(legacy["static_meals"], region, meal_time)
+                ]
+                assert legacy_app.generate_static_meals(meal_time, region, target) == expected, (region, meal_time, target)
@@ -0,0 +1,38 @@
+# tests/test_meal_catalog.py - CATALOG SNAPSHOTS ARE NEVER CHANGED ONCE SERVED
+import json
+
+import numpy as np
+
+from app.services.meal_catalog import MealCatalog
+
+from conftest import MEAL_TIMES, REGIONS, meal_records
+
+
+def test_refresh_suitability_swaps_in_a_new_snapshot(tmp_path, monkeypatch):
+    meal_data = {region: {meal_time: [] for meal_time in MEAL_TIMES} for region in REGIONS}
+    for meal in meal_records(40):
+        meal_data[meal.pop("region")][meal.pop("meal_time")].append(meal)
+    path = tmp_path / "meals.json"
+    path.write_text(json.dumps(meal_data))
+
+    built = []
+
+    def build_suitability(self, snapshot):
+        built.append(snapshot)
+        return np.full((len(snapshot), 1), len(built), dtype=np.float32), f"matrix-{len(built)}"
+
+    monkeypatch.setattr(MealCatalog, "_build_suitability", build_suitability)
+    catalog = MealCatalog(str(path), check_interval=3600)
+    served = catalog.snapshot()
+    assert served.suitability == "matrix-1"
+
+    catalog.refresh_suitability()
+    refreshed = catalog.snapshot()
+    assert refreshed is not served
+    # A request still holding the old snapshot sees it whole and unchanged
+    assert served.suitability == "matrix-1" and served.meal_features[0, 0] == 1
+    assert refreshed.suitability == "matrix-2" and refreshed.meal_features[0, 0] == 2
+    # Columns, indexes and the portion table are shared, not rebuilt
+    assert refreshed.calories is served.calories and refreshed.pool_ids is served.pool_ids
+    assert refreshed.portion_table is served.portion_table
+    assert refreshed.content_hash == served.content_hash and len(refreshed) == len(served)
@@ -0,0 +1,118 @@
+# tests/test_meal_routes.py - /api/get-meals, BATCH AND WEEK PLAN THROUGH THE FLASK TEST CLIENT
+import pytest
+from flask import Flask
+
+# The routes package also loads the Firestore-backed user and weight routes
+pytest.importorskip("firebase_admin")
+
+from app.routes import meals_bp  # noqa: E402
+from app.services.meal_response import DEFAULT_COMPACT_FIELDS  # noqa: E402
+
+PROFILE = {"goal": "maintain", "calories": 1800, "region": "north", "bmi": 22.0}
+SLIM_SUMMARY = {"meals", "total_calories", "target_calories", "shuffle_count", "shuffle_mode", "seed"}
+
+
+class StaticCatalog:
+    """Stands in for MealCatalog: always serves one snapshot"""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+
+@pytest.fixture
+def client(make_snapshot, meal_service_state):
+    app = Flask(__name__)
+    app.config["MEAL_CATALOG"] = StaticCatalog(make_snapshot(400))
+    app.register_blueprint(meals_bp)
+    return app.test_client()
+
+
+def meal_names(body):
+    return {meal_time: [meal["name"] for meal in meals] for meal_time, meals in body["meals"].items()}
+
+
+def test_slim_fields_match_the_full_response(client):
+    full = client.post("/api/get-meals", json={**PROFILE, "seed": 7}).get_json()
+    response = client.post("/api/get-meals", json={**PROFILE, "seed": 7, "fields": ["name", "calories", "portion"]})
+    slim = response.get_json()
+
+    assert response.status_code == 200
+    assert set(slim) == SLIM_SUMMARY
+    assert meal_names(slim) == meal_names(full)
+    for meal_time, meals in slim["meals"].items():
+        assert meals and all(list(meal) == ["name", "calories", "portion"] for meal in meals)
+        assert [(m["calories"], m["portion"]) for m in meals] == [(m["calories"], m["portion"]) for m in full["meals"][meal_time]]
+    assert slim["total_calories"] == full["total_calories"]
+
+
+def test_compact_rows_follow_the_fields_order(client):
+    body = client.post("/api/get-meals?fields=calories,name&compact=1", json={**PROFILE, "seed": 7}).get_json()
+    assert body["fields"] == ["calories", "name"]
+    full = client.post("/api/get-meals", json={**PROFILE, "seed": 7}).get_json()
+    assert body["meals"]["lunch"] == [[meal["calories"], meal["name"]] for meal in full["meals"]["lunch"]]
+
+    default = client.post("/api/get-meals", json={**PROFILE, "compact": True}).get_json()
+    assert default["fields"] == list(DEFAULT_COMPACT_FIELDS)
+    assert all(len(row) == len(DEFAULT_COMPACT_FIELDS) for row in default["meals"]["dinner"])
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.post("/api/get-meals", json={**PROFILE, "fields": "name,secret"})
+    assert response.status_code == 400 and "secret" in response.get_json()["error"]
+
+
+def test_batch_fields_are_inherited_by_each_profile(client):
+    response = client.post("/api/get-meals/batch?compact=1", json={
+        "fields": ["name", "calories"],
+        "profiles": [
+            {**PROFILE, "user_id": "a"},
+            {**PROFILE, "user_id": "b", "goal": "gain", "fields": ["name"]},
+            {**PROFILE, "user_id": "c", "calories": 2400, "compact": False},
+        ],
+    })
+    body = response.get_json()
+    assert response.status_code == 200 and body["count"] == 3
+    inherited, own_fields, not_compact = body["results"]
+
+    assert inherited["fields"] == ["name", "calories"]
+    assert all(len(row) == 2 and isinstance(row[0], str) for row in inherited["meals"]["lunch"])
+    assert own_fields["fields"] == ["name"] and all(len(row) == 1 for row in own_fields["meals"]["lunch"])
+    assert "fields" not in not_compact
+    assert all(list(meal) == ["name", "calories"] for meal in not_compact["meals"]["lunch"])
+    assert not_compact["target_calories"] == 2400
+
+
+def test_batch_rejects_bad_profiles(client):
+    assert client.post("/api/get-meals/batch", json={"profiles": [PROFILE, "nope"]}).status_code == 400
+    response = client.post("/api/get-meals/batch", json={"fields": ["bogus"], "profiles": [PROFILE]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("no_repeat_days", [1, 3, 7])
+def test_week_plan_respects_its_no_repeat_window(client, no_repeat_days):
+    response = client.post("/api/meal-plan/week", json={**PROFILE, "days": 7, "no_repeat_days": no_repeat_days})
+    body = response.get_json()
+    assert response.status_code == 200 and body["success"]
+    assert body["no_repeat_days"] == no_repeat_days and len(body["days"]) == 7
+    assert [day["day"] for day in body["days"]] == list(range(1, 8))
+
+    for slot in body["calorie_breakdown"]:
+        planned = [day["meals"][slot]["name"] for day in body["days"]]
+        for day in range(len(planned)):
+            window = planned[max(0, day - no_repeat_days + 1):day + 1]
+            assert len(window) == len(set(window)), (slot, planned)
+
+
+def test_week_plan_reuses_least_recent_meals_when_the_pool_runs_out(make_snapshot, meal_service_state):
+    app = Flask(__name__)
+    app.config["MEAL_CATALOG"] = StaticCatalog(make_snapshot(24))  # 3 north meals per meal time
+    app.register_blueprint(meals_bp)
+    body = app.test_client().post("/api/meal-plan/week", json={**PROFILE, "days": 7, "no_repeat_days": 7}).get_json()
+
+    for slot in body["calorie_breakdown"]:
+        planned = [day["meals"][slot]["name"] for day in body["days"]]
+        assert len(set(planned[:3])) == 3
+        assert planned[3:6] == planned[:3] and planned[6] == planned[0]
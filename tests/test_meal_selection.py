@@ -0,0 +1,41 @@
+# tests/test_meal_selection.py - SHUFFLE SELECTION ON SMALL POOLS
+import random
+
+import numpy as np
+
+from app.services import meal_service
+from app.services.meal_service import guaranteed_different_selection_v2
+from app.services.meal_usage import MealUsageTracker
+from app.services.selection_history import MemorySelectionHistory
+
+
+def test_small_pool_shuffle_is_not_in_id_order(make_snapshot):
+    snapshot = make_snapshot(56)
+    pool = snapshot.candidate_pool([snapshot.region_index["north"]], "lunch")
+    assert len(pool) == 7
+    ids = [int(i) for i in pool.ids()]
+    previous = [str(snapshot.names[i]) for i in ids[:4]]
+
+    orders = set()
+    for seed in range(20):
+        selected = guaranteed_different_selection_v2(pool, 500, previous, count=4, rng=random.Random(seed), return_ids=True)
+        assert len(selected) == 4 and set(ids[4:]) <= set(selected)
+        orders.add(tuple(selected))
+    assert len(orders) > 5
+
+
+def test_seeded_request_ignores_traffic_in_between(make_snapshot, monkeypatch):
+    """An explicit seed reproduces the response even after other users' requests moved the usage weights"""
+    snapshot = make_snapshot(400)
+    monkeypatch.setattr(meal_service, "find_suitable_meals", lambda catalog, user_data: np.ones(len(catalog), dtype=bool))
+    monkeypatch.setattr(meal_service, "meal_usage_history", MealUsageTracker())
+    monkeypatch.setattr(meal_service, "selection_history", MemorySelectionHistory())
+
+    seeded = {"goal": "maintain", "calories": 1800, "region": "north", "user_id": "a", "seed": 42}
+    first, _ = meal_service.recommend_meals(seeded, snapshot)
+    for n in range(5):
+        meal_service.recommend_meals({"goal": "maintain", "calories": 1800, "region": "north", "user_id": f"other-{n}"}, snapshot)
+    second, _ = meal_service.recommend_meals(seeded, snapshot)
+    shuffled, _ = meal_service.recommend_meals({**seeded, "shuffle": True, "shuffle_count": 1}, snapshot)
+    names = [{t: [meal["name"] for meal in meals] for t, meals in body["meals"].items()} for body in (first, second, shuffled)]
+    assert names[0] == names[1] == names[2]
@@ -0,0 +1,52 @@
+# tests/test_meal_usage.py - USAGE-WEIGHTED SAMPLING ACROSS CATALOG HOT RELOADS
+import random
+
+import numpy as np
+
+from app.services.meal_usage import FenwickTree, MealUsageTracker
+
+
+def test_fenwick_matches_numpy():
+    generator = np.random.default_rng(7)
+    weights = generator.random(1000)
+    tree = FenwickTree(weights)
+    for i, delta in zip(generator.integers(0, 1000, 200), generator.random(200)):
+        tree.add(int(i), float(delta))
+        weights[i] += delta
+    cumulative = np.cumsum(weights)
+    assert np.isclose(tree.total, cumulative[-1])
+    for u in generator.random(500) * cumulative[-1]:
+        assert tree.find(u) == int(np.searchsorted(cumulative, u, side="right"))
+
+
+def test_sample_from_pool_of_replaced_snapshot(make_snapshot):
+    """A request still holding the old snapshot gets ids of its own pool after a reload"""
+    old = make_snapshot(24)
+    new = make_snapshot(400, salt=3)
+    tracker = MealUsageTracker()
+    tracker.bind(old)
+    pool = old.candidate_pool([old.region_index["north"]], "lunch")
+    expected = {int(i) for i in pool.ids()}
+
+    tracker.bind(new)  # hot reload to a different-sized catalog between bind and sample
+    rng = random.Random(1)
+    drawn = {tracker.sample(pool, rng) for _ in range(200)}
+    assert drawn <= expected
+    assert len(drawn) > 1
+    assert tracker.weights_for(old) is None
+
+
+def test_sample_weights_bound_snapshot(make_snapshot):
+    snapshot = make_snapshot(64)
+    tracker = MealUsageTracker()
+    tracker.bind(snapshot)
+    pool = snapshot.candidate_pool(None, "dinner")
+    shown = int(pool.ids()[0])
+    for _ in range(50):
+        tracker.record([shown])
+
+    assert tracker.weights_for(snapshot)(shown) < 0.05
+    rng = random.Random(2)
+    draws = [tracker.sample(pool, rng) for _ in range(2000)]
+    assert set(draws) <= {int(i) for i in pool.ids()}
+    assert draws.count(shown) < 2000 / len(pool) / 4
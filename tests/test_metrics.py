@@ -0,0 +1,44 @@
+# tests/test_metrics.py - LATENCY HISTOGRAMS AND PROMETHEUS TEXT
+import random
+
+from app.services.metrics import QUANTILES, SUB_BUCKET_BITS, LatencyHistogram, Metrics, begin_timings, end_timings, stage
+
+
+def test_histogram_quantiles_within_bucket_error():
+    generator = random.Random(5)
+    values = [generator.lognormvariate(-6, 1.2) for _ in range(100000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in QUANTILES:
+        exact = values[int(q * len(values) + 0.5) - 1]
+        assert abs(histogram.quantile(q) - exact) <= exact * 2 ** -(SUB_BUCKET_BITS - 1) + 1e-6, q
+    assert len(histogram.counts) < 1000
+
+
+def test_render_counters_summaries_and_gauges():
+    metrics = Metrics()
+    metrics.describe("requests_total", "HTTP requests")
+    metrics.inc("requests_total", endpoint="/api/get-meals", status=200)
+    metrics.inc("requests_total", 2, endpoint="/api/get-meals", status=200)
+    metrics.observe("request_seconds", 0.25, endpoint='say "hi"')
+    metrics.gauge("ratio", lambda: {(("cache", "response"),): 0.5})
+
+    text = metrics.render()
+    assert "# HELP calorie_mate_requests_total HTTP requests" in text
+    assert 'calorie_mate_requests_total{endpoint="/api/get-meals",status="200"} 3' in text
+    assert 'calorie_mate_request_seconds_count{endpoint="say \\"hi\\""} 1' in text
+    assert 'calorie_mate_ratio{cache="response"} 0.5' in text
+
+
+def test_stage_timings_add_up_per_request():
+    assert end_timings() == {}
+    with stage("ignored"):
+        pass
+    begin_timings()
+    for _ in range(2):
+        with stage("selection"):
+            pass
+    timings = end_timings()
+    assert list(timings) == ["selection"] and timings["selection"] >= 0
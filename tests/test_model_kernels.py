@@ -0,0 +1,104 @@
+# tests/test_model_kernels.py - FLAT TREE KERNEL AND SUITABILITY MATRIX AGAINST A LIVE SKLEARN TREE
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import meal_model
+from app.services.feature_encoder import FeatureEncoder
+from app.services.meal_model import USER_FEATURES, user_features
+from app.services.model_registry import ModelRegistry
+from app.services.suitability import SuitabilityMatrix
+from app.services.tree_kernel import FlatTree, kernel_path_for
+
+sklearn_tree = pytest.importorskip("sklearn.tree")
+
+MODEL_COLUMNS = [
+    "calories", "protein", "carbs", "fats", "age", "height_cm", "weight_kg", "bmi",
+    "type_veg", "type_non-veg", "meal_time_breakfast", "meal_time_lunch",
+    "goal_gain", "goal_lose", "goal_maintain", "gender_male", "activity_level_moderate",
+    "diet_preference_vegetarian", "diet_preference_non-vegetarian",
+]
+
+
+def _training_rows(generator, n):
+    """Random rows in MODEL_COLUMNS order with a label that depends on bmi, goal, diet and the meal"""
+    X = np.zeros((n, len(MODEL_COLUMNS)), dtype=np.float32)
+    column = {name: i for i, name in enumerate(MODEL_COLUMNS)}
+    X[:, column["calories"]] = generator.uniform(50, 800, n)
+    X[:, column["protein"]] = generator.uniform(0, 40, n)
+    X[:, column["carbs"]] = generator.uniform(0, 90, n)
+    X[:, column["fats"]] = generator.uniform(0, 35, n)
+    X[:, [column["age"], column["height_cm"], column["weight_kg"]]] = 50
+    X[:, column["bmi"]] = generator.uniform(14, 42, n)
+    X[np.arange(n), column["type_veg"] + generator.integers(0, 2, n)] = 1
+    X[np.arange(n), column["meal_time_breakfast"] + generator.integers(0, 2, n)] = 1
+    X[np.arange(n), column["goal_gain"] + generator.integers(0, 3, n)] = 1
+    X[:, column["gender_male"]] = X[:, column["activity_level_moderate"]] = 1
+    X[np.arange(n), column["diet_preference_vegetarian"] + generator.integers(0, 2, n)] = 1
+
+    lean = X[:, column["bmi"]] < 24.7
+    veg_ok = (X[:, column["diet_preference_vegetarian"]] == 0) | (X[:, column["type_veg"]] == 1)
+    y = veg_ok & np.where(X[:, column["goal_gain"]] == 1, X[:, column["calories"]] > 300, lean | (X[:, column["calories"]] < 450))
+    return X, y.astype(int)
+
+
+@pytest.fixture(scope="module")
+def model():
+    generator = np.random.default_rng(3)
+    X, y = _training_rows(generator, 4000)
+    # Fitted on a DataFrame, like the deployed model (meal_model._predict passes the column names)
+    return sklearn_tree.DecisionTreeClassifier(max_depth=9, random_state=0).fit(frame(X), y)
+
+
+def frame(X):
+    return pd.DataFrame(X, columns=MODEL_COLUMNS)
+
+
+def test_flat_tree_matches_sklearn(model, tmp_path):
+    generator = np.random.default_rng(4)
+    X, _ = _training_rows(generator, 3000)
+    X[generator.random(X.shape) < 0.01] = np.nan  # missing values take sklearn's learned direction
+    flat = FlatTree.from_sklearn(model, MODEL_COLUMNS)
+    np.testing.assert_array_equal(flat.predict(X), model.predict(frame(X)))
+
+    path = str(tmp_path / "model.npz")
+    flat.save(path)
+    np.testing.assert_array_equal(FlatTree.load(path).predict(X), model.predict(frame(X)))
+
+
+@pytest.mark.parametrize("kernel", [False, True])
+def test_suitability_matrix_matches_live_model(model, kernel, make_snapshot):
+    snapshot = make_snapshot(120)
+    encoder = FeatureEncoder(MODEL_COLUMNS, USER_FEATURES)
+    meal_features = encoder.encode_columns(len(snapshot), snapshot.feature_columns())
+    flat = FlatTree.from_sklearn(model, MODEL_COLUMNS)
+    predictor = flat if kernel else model
+
+    def predict(user_data):
+        X = encoder.encode(meal_features, user_features(user_data))
+        return flat.predict(X) if kernel else model.predict(frame(X))
+
+    matrix = SuitabilityMatrix.build(predictor, MODEL_COLUMNS, len(snapshot), predict)
+    assert matrix is not None and len(matrix.thresholds)
+    assert matrix.verify(predict, matrix.parity_profiles()) == []
+    assert matrix.lookup({"bmi": "22"}) is None
+
+
+@pytest.mark.parametrize("kernel", [False, True])
+def test_deployed_suitability_matches_predict_suitable_meals(model, kernel, make_snapshot, tmp_path, monkeypatch):
+    """The catalog's precomputed matrix against live predictions, through the registry as served"""
+    path = str(tmp_path / "meal_recommender.pkl")
+    joblib.dump((model, MODEL_COLUMNS), path)
+    if kernel:
+        FlatTree.from_sklearn(model, MODEL_COLUMNS).save(kernel_path_for(path))
+    registry = ModelRegistry()
+    registry.register(meal_model.MODEL_NAME, path)
+    monkeypatch.setattr(meal_model, "registry", registry)
+    monkeypatch.setattr(meal_model, "_loaded", None)
+
+    snapshot = make_snapshot(120)
+    matrix = meal_model.build_suitability_matrix(meal_model.encode_meal_features(snapshot))
+    assert isinstance(meal_model.loaded_model()[0], FlatTree) == kernel
+    profiles = matrix.parity_profiles()
+    assert matrix.verify(lambda user_data: meal_model.predict_suitable_meals(user_data, snapshot.df)["suitable"], profiles) == []
@@ -0,0 +1,26 @@
+# tests/test_model_registry.py - ONE LOAD PER ARTIFACT, FAILED LOADS INCLUDED
+import joblib
+import pytest
+
+from app.services import model_registry
+from app.services.model_registry import ModelRegistry
+
+
+def test_failed_load_is_cached_until_reload(tmp_path, monkeypatch):
+    calls = []
+    real_load = joblib.load
+    monkeypatch.setattr(model_registry.joblib, "load", lambda *args, **kwargs: calls.append(args) or real_load(*args, **kwargs))
+    path = tmp_path / "model.pkl"
+    registry = ModelRegistry()
+    registry.register("model", str(path))
+
+    for _ in range(3):
+        with pytest.raises(FileNotFoundError):
+            registry.get("model")
+    assert len(calls) == 1
+    assert registry.stats()["model"]["error"]
+
+    joblib.dump({"weights": [1, 2]}, path)
+    registry.reload("model")
+    assert registry.get("model") == {"weights": [1, 2]}
+    assert registry.stats()["model"]["error"] is None and len(calls) == 2
@@ -0,0 +1,50 @@
+# tests/test_plan_optimizer.py - BEAM SEARCH OPTIMUM AND PLAN REQUEST VALIDATION
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.meal_service import MAX_PLANS, plan_options
+from app.services.plan_optimizer import _score, day_targets, optimize_plans
+
+
+def test_exhaustive_beam_matches_brute_force():
+    generator = np.random.default_rng(3)
+    targets = day_targets(2000, "maintain")
+    slot_targets = np.array([0.30, 0.30, 0.30, 0.10])[:, None] * targets
+    slot_ids = [np.arange(s * 12, (s + 1) * 12) for s in range(4)]
+    slot_nutrients = [slot_targets[s] * generator.uniform(0.5, 1.5, size=(12, 4)) for s in range(4)]
+
+    plans = optimize_plans(slot_ids, slot_nutrients, slot_targets, top_k=5, beam_width=12 ** 3, per_slot=12)
+    scale = np.maximum(targets, 1.0)
+    brute = sorted(
+        float(_score(sum(slot_nutrients[s][c] for s, c in enumerate(combo)), targets, scale))
+        for combo in itertools.product(range(12), repeat=4)
+    )[:5]
+    np.testing.assert_allclose([score for _, _, score in plans], brute)
+
+
+def test_macro_overrides_win():
+    targets = day_targets(2000, "gain", {"protein": 150, "fats": None})
+    assert targets[1] == 150.0 and targets[3] == pytest.approx(2000 * 0.25 / 9)
+
+
+def test_plan_options_defaults_and_clamping():
+    options = plan_options({"calories": "2100", "top_k": 500, "days": 0})
+    assert options["calories"] == 2100 and options["top_k"] == MAX_PLANS and options["days"] == 1
+
+
+@pytest.mark.parametrize("user_data", [
+    {"top_k": "three"},
+    {"tolerance": "loose"},
+    {"tolerance": -0.1},
+    {"tolerance": float("nan")},
+    {"calories": None},
+    {"days": [7]},
+    {"macro_targets": [120, 200, 60]},
+    {"macro_targets": {"protein": "lots"}},
+    {"macro_targets": {"fats": -5}},
+])
+def test_plan_options_rejects_malformed_input(user_data):
+    with pytest.raises(ValueError):
+        plan_options(user_data)
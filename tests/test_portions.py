@@ -0,0 +1,181 @@
+# tests/test_portions.py - COMPILED / VECTORIZED PORTION SIZING AGAINST THE ORIGINAL BRANCHES
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.meal_catalog import CatalogSnapshot
+from app.services.meal_service import process_selected_meals
+from app.services.portion_calculator import PIECE_WORDS, PortionCalculator
+from app.services.portion_table import (
+    DEFAULT_EXPLANATION, EXPLANATION_RULES, GOALS, MAX_TABLE_KCAL, PORTION_BUCKET_KCAL, PortionTable
+)
+
+from conftest import DISHES
+
+
+# --- Reference: the calculator as it was before the compiled matcher and vectorized path ---
+
+def reference_category(calculator, meal_name):
+    """Linear keyword scan over food_categories"""
+    meal_name_lower = meal_name.lower()
+    for category, info in calculator.food_categories.items():
+        for keyword in info['keywords']:
+            if keyword in meal_name_lower:
+                return category
+    return 'rice_dishes'
+
+
+def reference_piece_word(meal_name, category_info):
+    """The original if-chain"""
+    if 'roti' in meal_name and 'tandoori roti' not in meal_name:
+        return 'roti'
+    elif 'tandoori roti' in meal_name:
+        return 'tandoori roti'
+    elif 'parantha' in meal_name or 'paratha' in meal_name:
+        return 'parantha'
+    elif 'kulcha' in meal_name:
+        return 'kulcha'
+    elif 'naan' in meal_name:
+        return 'naan'
+    elif 'luchi' in meal_name:
+        return 'luchi'
+    elif 'dosa' in meal_name:
+        return 'dosa'
+    elif 'uttapam' in meal_name:
+        return 'uttapam'
+    elif 'idli' in meal_name:
+        return 'idli'
+    elif 'vada' in meal_name:
+        return 'vada'
+    elif 'samosa' in meal_name:
+        return 'samosa'
+    elif 'dhokla' in meal_name:
+        return 'piece'
+    elif 'pakora' in meal_name:
+        return 'piece'
+    elif 'bhature' in meal_name:
+        return 'bhature'
+    return category_info.get('piece_name', 'piece')
+
+
+def reference_portion(calculator, meal_name, target_calories):
+    """Per-meal branching, as calculate_portion used to be"""
+    category = reference_category(calculator, meal_name)
+    info = calculator.food_categories[category]
+
+    if info['unit'] == 'grams':
+        grams_needed = (target_calories / info['calories_per_100g']) * 100
+        if grams_needed < 50:
+            portion = 50
+        elif grams_needed < 100:
+            portion = round(grams_needed / 25) * 25
+        else:
+            portion = round(grams_needed / 50) * 50
+        return f"{portion}g"
+
+    if info['unit'] == 'pieces':
+        pieces_needed = target_calories / info.get('calories_per_piece', 100)
+        if pieces_needed < 1.5:
+            pieces = 1
+        elif pieces_needed < 2.5:
+            pieces = 2
+        elif pieces_needed < 3.5:
+            pieces = 3
+        else:
+            pieces = max(1, round(pieces_needed))
+        return f"{pieces} {reference_piece_word(meal_name.lower(), info)}"
+
+    if info['unit'] == 'servings':
+        servings_needed = target_calories / info.get('calories_per_serving', 200)
+        if servings_needed < 0.75:
+            return "1 small serving"
+        elif servings_needed < 1.25:
+            return "1 serving"
+        elif servings_needed < 1.75:
+            return "1.5 servings"
+        return f"{max(1, round(servings_needed))} servings"
+
+    if info['unit'] == 'cups':
+        cups_needed = target_calories / info.get('calories_per_serving', 100)
+        if cups_needed < 0.75:
+            return "1 small cup"
+        elif cups_needed < 1.25:
+            return "1 cup"
+        return f"{max(1, round(cups_needed))} cups"
+
+    return f"{target_calories} cal serving"
+
+
+@pytest.fixture(scope="module")
+def calculator():
+    return PortionCalculator()
+
+
+@pytest.fixture(scope="module")
+def meal_names(calculator):
+    """Every keyword alone and in pairs (both orders), so priorities between keywords are exercised"""
+    keywords = {keyword for info in calculator.food_categories.values() for keyword in info['keywords']}
+    keywords.update(keyword for keyword, _ in PIECE_WORDS)
+    keywords = sorted(keywords)
+    names = {keyword.title() for keyword in keywords}
+    names.update(f"{a} with {b}".title() for a, b in itertools.permutations(keywords, 2))
+    names.update(DISHES)
+    names.update(("Tandoori Roti", "Roti Tandoori", "Green Tea with Cookies", "Mystery Dish"))
+    return sorted(names)
+
+
+def test_classification_matches_linear_scans(calculator, meal_names):
+    for name in meal_names:
+        category = reference_category(calculator, name)
+        expected = (category, reference_piece_word(name.lower(), calculator.food_categories[category]))
+        assert (calculator.identify_food_category(name), calculator._classify(name.lower())[1]) == expected, name
+
+
+def test_vectorized_portions_match_branches(calculator, meal_names):
+    generator = np.random.default_rng(11)
+    meals = [meal_names[i] for i in generator.integers(0, len(meal_names), 20000)]
+    targets = np.concatenate([generator.uniform(0, 1500, 10000), generator.integers(0, 60, 10000) * 25.0])
+
+    quantities, units = calculator.calculate_portions(meals, targets)
+    for meal, target, quantity, unit in zip(meals, targets.tolist(), quantities, units):
+        assert calculator.format_portion(quantity, unit) == reference_portion(calculator, meal, target), (meal, target)
+    assert calculator.calculate_portion("Masala Dosa", 400) == reference_portion(calculator, "Masala Dosa", 400)
+
+
+def test_portion_table_matches_branches(calculator, meal_names):
+    names = meal_names[::7]
+    table = PortionTable(names, calculator)
+    for i, name in enumerate(names):
+        for target in range(0, MAX_TABLE_KCAL + 1, PORTION_BUCKET_KCAL * 4):
+            assert table.portion(i, name, target) == reference_portion(calculator, name, target), (name, target)
+        assert table.portion(i, name, MAX_TABLE_KCAL + 500) == reference_portion(calculator, name, MAX_TABLE_KCAL + 500)
+        for goal in GOALS + ("recomp",):
+            templates = [template for keywords, template in EXPLANATION_RULES if any(x in name.lower() for x in keywords)]
+            assert table.explanation(i, goal) == (templates[0] if templates else DEFAULT_EXPLANATION).format(goal=goal)
+
+
+def test_processed_meals_are_built_by_id(calculator):
+    records = [
+        {"name": "Dal Tadka", "calories": 180, "protein": 9, "carbs": 20, "fats": 6, "region": "north",
+         "meal_time": "lunch", "original_region": "north", "spice": "mild"},
+        {"name": "Dal Tadka", "calories": 420, "protein": 15, "carbs": 40, "fats": 18, "region": "south",
+         "meal_time": "lunch", "original_region": "South India", "spice": "hot"},
+        {"name": "Masala Dosa", "calories": 300, "protein": 7, "carbs": 45, "fats": 10, "region": "south",
+         "meal_time": "lunch", "original_region": "south", "spice": "medium"},
+    ]
+    snapshot = CatalogSnapshot.from_records(records, "duplicates", 0.0)
+    snapshot.portion_table = PortionTable(snapshot.names, calculator)
+
+    meals = process_selected_meals([1, 0, 2], 500, "gain", snapshot)
+    expected = process_selected_meals([records[1], records[0], records[2]], 500, "gain")
+    drop = ("timestamp", "portion")  # the table quantizes portion targets to PORTION_BUCKET_KCAL
+    assert [meal["portion"] for meal in meals] == [
+        snapshot.portion_table.portion(i, "Dal Tadka" if i < 2 else "Masala Dosa", meal["calories"]) for i, meal in zip([1, 0, 2], meals)
+    ]
+    assert [{k: v for k, v in meal.items() if k not in drop} for meal in meals] == \
+        [{k: v for k, v in meal.items() if k not in drop} for meal in expected]
+    assert [(meal["spice"], meal["original_calories"], meal["region_source"]) for meal in meals] == \
+        [("hot", 420, "South India"), ("mild", 180, "north"), ("medium", 300, "south")]
+    assert snapshot.records[1]["calories"] == 420 and "portion" not in snapshot.records[1]
+    assert snapshot._name_ids is None
@@ -0,0 +1,22 @@
+# tests/test_response_cache.py - SHARED FIRST-LOAD RESPONSES KEEP EACH CALLER'S TARGETS
+import numpy as np
+
+from app.services import meal_service
+from app.services.response_cache import ResponseCache
+
+
+def test_same_bucket_profiles_see_their_own_targets(make_snapshot, monkeypatch):
+    snapshot = make_snapshot(96)
+    monkeypatch.setattr(meal_service, "response_cache", ResponseCache())
+    monkeypatch.setattr(meal_service, "find_suitable_meals", lambda catalog, user_data: np.ones(len(catalog), dtype=bool))
+
+    profile = {"goal": "maintain", "region": "north", "bmi": 22.0}
+    first, status = meal_service.recommend_meals_cached({**profile, "user_id": "a", "calories": 1810}, snapshot)
+    second, _ = meal_service.recommend_meals_cached({**profile, "user_id": "b", "calories": 1790}, snapshot)
+
+    assert status == 200
+    assert meal_service.response_cache.hits == 1
+    assert first["meals"] == second["meals"]
+    for body, calories in ((first, 1810), (second, 1790)):
+        assert body["target_calories"] == body["goal_calories"] == calories
+        assert body["calorie_breakdown"]["lunch"] == int(calories * meal_service.CALORIE_SPLITS["lunch"])
@@ -0,0 +1,42 @@
+# tests/test_selection_history.py - SHUFFLE HISTORY BACKENDS
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.selection_history import MemorySelectionHistory, SelectionHistoryStore, SqliteSelectionHistory
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        SelectionHistoryStore()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_set_get_clear(backend, tmp_path):
+    store = MemorySelectionHistory() if backend == "memory" else SqliteSelectionHistory(str(tmp_path / "h.sqlite3"))
+    store.set("u1", "lunch_north", ["Dal", "Rice"])
+    store.set("u2", "lunch_north", ["Idli"])
+    assert store.get("u1", "lunch_north") == ["Dal", "Rice"]
+    assert store.get("u1", "dinner_north") is None
+    store.clear("u1")
+    assert store.get("u1", "lunch_north") is None and len(store) == 1
+
+
+def test_sqlite_database_is_wal_and_prunes_under_concurrent_writes(tmp_path):
+    path = str(tmp_path / "h.sqlite3")
+    store = SqliteSelectionHistory(path, max_entries=50, prune_every=16)
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def write(worker):
+        for i in range(64):
+            store.set(f"w{worker}", f"slot{i}", [str(i)])
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 512 writes = exactly 32 prunes; the last one ran after the final write
+    assert len(store) == 50
+    assert next(store._writes) == 8 * 64 + 1
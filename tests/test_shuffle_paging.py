@@ -0,0 +1,52 @@
+# tests/test_shuffle_paging.py - STATELESS SHUFFLE PAGES
+import numpy as np
+import pytest
+
+from app.services.shuffle_paging import KeyedPermutation, shuffle_key, shuffle_page
+
+KEY = shuffle_key("seed", "north", "lunch")
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 17, 100, 1000, 4097])
+def test_keyed_permutation_is_a_bijection(size):
+    permutation = KeyedPermutation(b"self-test", size)
+    assert sorted(permutation(i) for i in range(size)) == list(range(size))
+
+
+def test_pages_tile_each_pass():
+    pool = list(range(103))
+    pages = [shuffle_page(pool, KEY, page, 4) for page in range(25)]
+    shown = [meal for page in pages for meal in page]
+    assert len(shown) == len(set(shown)) == 100
+    assert pages[3] == shuffle_page(pool, KEY, 3, 4)
+    assert pages[3] != shuffle_page(pool, shuffle_key("other", "north", "lunch"), 3, 4)
+
+
+def test_accepted_index_matches_ids(make_snapshot):
+    snapshot = make_snapshot(1000)
+    codes = [snapshot.region_index["north"], snapshot.region_index["south"]]
+    suitable = np.random.default_rng(5).random(len(snapshot)) < 0.3
+    pool = snapshot.candidate_pool(codes, "lunch", suitable).without_names([str(snapshot.names[2])])
+    index = pool.accepted_index()
+    assert len(index) == len(pool)
+    assert [index[k] for k in range(len(index))] == [int(i) for i in pool.ids()]
+    with pytest.raises(IndexError):
+        index[len(index)]
+    assert len(snapshot.candidate_pool(codes, "lunch", np.zeros(len(snapshot), dtype=bool)).accepted_index()) == 0
+
+
+@pytest.mark.parametrize("acceptance", [0.9, 0.5, 0.3, 0.1])
+def test_filtered_pages_tile_a_full_pass(make_snapshot, monkeypatch, acceptance):
+    snapshot = make_snapshot(8000)
+    codes = [snapshot.region_index["north"], snapshot.region_index["south"]]
+    suitable = np.random.default_rng(6).random(len(snapshot)) < acceptance
+    pool = snapshot.candidate_pool(codes, "dinner", suitable)
+    expected = [shuffle_page(list(pool.ids()), KEY, page, 4) for page in range(3)]
+
+    monkeypatch.setattr(type(pool), "ids", lambda self: pytest.fail("stateless paging built the id list"))
+    index = pool.accepted_index()
+    pages = [shuffle_page(index, KEY, page, 4) for page in range(len(index) // 4)]
+    shown = [meal for page in pages for meal in page]
+    assert len(shown) == len(set(shown)) == len(index) // 4 * 4
+    assert all(suitable[i] for i in shown)
+    assert pages[:3] == expected
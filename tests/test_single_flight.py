@@ -0,0 +1,165 @@
+# tests/test_single_flight.py - COALESCED FIRST LOADS, SINGLE AND BATCH
+import threading
+import time
+
+import pytest
+
+from app.services import meal_service
+from app.services.model_registry import registry
+from app.services.response_cache import canonical_request
+from app.services.single_flight import SingleFlight
+
+PROFILE = {"goal": "maintain", "calories": 1800, "region": "north", "bmi": 22.0}
+
+
+def run_together(count, target):
+    """Start `count` threads on target(n) at once and wait for all of them"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(n):
+        barrier.wait()
+        results[n] = target(n)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_calls_compute_once():
+    flights = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"meals": []}
+
+    results = run_together(20, lambda n: flights.do("same-profile", compute))
+    assert len(calls) == 1
+    assert sum(shared for _, shared in results) == 19
+    assert all(result is results[0][0] for result, _ in results)
+    assert flights.coalesced == 19 and flights.stats()["in_flight"] == 0
+
+
+def test_follower_computes_itself_when_leader_is_slow():
+    flights = SingleFlight(timeout=0.05)
+    flight, leader = flights.begin("slow")
+    assert leader
+
+    assert flights.do("slow", lambda: "own") == ("own", False)
+    assert flights.fallbacks == 1 and flights.coalesced == 0
+    flights.finish("slow", flight, "late")
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_leader_error_releases_followers():
+    flights = SingleFlight()
+    started = threading.Event()
+    outcomes = {}
+
+    def leader():
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("model exploded")
+        try:
+            flights.do("key", fail)
+        except RuntimeError as e:
+            outcomes["leader"] = str(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    began = time.time()
+    outcomes["follower"] = flights.do("key", lambda: "recomputed")
+    thread.join()
+
+    assert outcomes == {"leader": "model exploded", "follower": ("recomputed", False)}
+    assert time.time() - began < flights.timeout
+    assert flights.fallbacks == 1 and flights.stats()["in_flight"] == 0
+
+
+def test_disabled_single_flight_always_computes():
+    flights = SingleFlight(timeout=0)
+    calls = []
+    assert flights.do("key", lambda: calls.append(1) or len(calls)) == (1, False)
+    assert flights.do("key", lambda: calls.append(1) or len(calls)) == (2, False)
+    assert flights.stats()["leaders"] == 0
+
+
+@pytest.fixture
+def service(make_snapshot, meal_service_state, monkeypatch):
+    """(snapshot, profiles computed by recommend_meals) over an isolated meal_service"""
+    computed = []
+    real = meal_service.recommend_meals
+
+    def recommend_meals(user_data, catalog, suitable=None, shown=None):
+        computed.append(user_data)
+        return real(user_data, catalog, suitable=suitable, shown=shown)
+
+    monkeypatch.setattr(meal_service, "recommend_meals", recommend_meals)
+    return make_snapshot(200), computed
+
+
+def flight_key(profile, snapshot):
+    return canonical_request(profile, snapshot, registry.version(meal_service.RESPONSE_CACHE_MODEL))[0]
+
+
+def test_batch_computes_duplicate_profiles_once(service):
+    snapshot, computed = service
+    profiles = [{**PROFILE, "user_id": "a"}, {**PROFILE, "user_id": "b", "calories": 1790}, {**PROFILE, "goal": "gain"}]
+    results = meal_service.recommend_meals_batch(profiles, snapshot)
+
+    assert len(computed) == 2
+    assert results[0]["meals"] == results[1]["meals"]
+    assert [body["target_calories"] for body in results] == [1800, 1790, 1800]
+    assert meal_service.inflight.coalesced == 1
+    # The follower's shown meals went into its own shuffle history
+    assert meal_service.selection_history.get("b", "lunch_north") is not None
+
+
+def test_batch_profile_waits_for_concurrent_leader(service):
+    snapshot, computed = service
+    flights = meal_service.inflight
+    flight, leader = flights.begin(flight_key(PROFILE, snapshot))
+    assert leader
+    body = {"meals": {"lunch": [{"name": "Shared"}]}, "target_calories": 1800}
+    threading.Timer(0.1, lambda: flights.finish(flight_key(PROFILE, snapshot), flight, (body, 200, {"lunch": ["Shared"]}))).start()
+
+    results = meal_service.recommend_meals_batch([{**PROFILE, "user_id": "a", "calories": 1810}], snapshot)
+    assert computed == []
+    assert results[0]["meals"] == body["meals"] and results[0]["target_calories"] == 1810
+    assert meal_service.selection_history.get("a", "lunch_north") == ["Shared"]
+
+
+def test_batch_profile_computes_itself_after_leader_timeout(service, monkeypatch):
+    snapshot, computed = service
+    monkeypatch.setattr(meal_service.inflight, "timeout", 0.05)
+    meal_service.inflight.begin(flight_key(PROFILE, snapshot))  # a leader that never finishes
+
+    results = meal_service.recommend_meals_batch([PROFILE], snapshot)
+    assert len(computed) == 1 and results[0]["meals"]["lunch"]
+    assert meal_service.inflight.fallbacks == 1
+
+
+def test_failed_batch_releases_its_followers(service, monkeypatch):
+    snapshot, _ = service
+    followers = []
+
+    def failing_model(profiles, features):
+        # A concurrent request joins the batch's flight, then the model call fails
+        followers.append(meal_service.inflight.begin(flight_key(PROFILE, snapshot)))
+        raise RuntimeError("model exploded")
+
+    monkeypatch.setattr(meal_service, "predict_suitability_batch", failing_model)
+    with pytest.raises(RuntimeError):
+        meal_service.recommend_meals_batch([PROFILE], snapshot)
+
+    (flight, leader), = followers
+    assert not leader and flight.done.is_set() and flight.failed
+    assert meal_service.inflight.wait(flight) is None
+    assert meal_service.inflight.stats()["in_flight"] == 0